@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of `FlatFileReport` against the usual ad-hoc parsing of a
+settlement report: decode the whole body, then `csv.DictReader` over it,
+converting amounts and dates by hand.
+
+With the package installed (`pip install -e .`):
+
+    python benchmarks/bench_flatfile.py [rows]
+"""
+from __future__ import print_function
+
+import csv
+import datetime
+import io
+import sys
+import time
+from decimal import Decimal
+
+from mws import FlatFileReport
+
+HEADER = ('settlement-id\tsettlement-start-date\tsettlement-end-date\tdeposit-date\ttotal-amount\tcurrency\t'
+          'transaction-type\torder-id\tmerchant-order-id\tadjustment-id\tshipment-id\tmarketplace-name\t'
+          'amount-type\tamount-description\tamount\tfulfillment-id\tposted-date\tposted-date-time\t'
+          'order-item-code\tmerchant-order-item-id\tmerchant-adjustment-item-id\tsku\tquantity-purchased\t'
+          'promotion-id\n')
+ROW = ('1234567890\t\t\t\t\tEUR\tOrder\t303-{0:07d}-1234567\t\t\t\tAmazon.de\tItemPrice\tPrincipal\t{1}.99\t'
+       'AFN\t2017-08-12\t2017-08-12 19:40:35 UTC\t{0}\t\t\tSKU-{0}\t1\t\n')
+
+
+def settlement(rows):
+    return (HEADER + ''.join(ROW.format(n, n % 100) for n in range(rows))).encode('cp1252')
+
+
+def legacy_parse(data):
+    for row in csv.DictReader(io.StringIO(data.decode('cp1252')), delimiter='\t'):
+        row['amount'] = Decimal(row['amount']) if row['amount'] else None
+        row['quantity-purchased'] = int(row['quantity-purchased']) if row['quantity-purchased'] else None
+        if row['posted-date-time']:
+            row['posted-date-time'] = datetime.datetime.strptime(row['posted-date-time'], '%Y-%m-%d %H:%M:%S UTC')
+        yield row
+
+
+def flat_file_parse(data):
+    return FlatFileReport(data, '_GET_V2_SETTLEMENT_REPORT_DATA_FLAT_FILE_V2_')
+
+
+def main(rows=200000):
+    data = settlement(rows)
+    for label, parse in [('csv.DictReader', legacy_parse), ('FlatFileReport', flat_file_parse)]:
+        start = time.time()
+        count = sum(1 for _ in parse(data))
+        elapsed = time.time() - start
+        print('{:<16} {} rows  {:6.2f} s  {:8.0f} rows/s'.format(label, count, elapsed, count / elapsed))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark of request signing: the cached `Signer` used by
+`MWS.sign_request` against the original implementation, which sorted and
+quoted every parameter, grew the query string with `+=` and built a new
+HMAC from the secret key for every request.
+
+With the package installed (`pip install -e .`):
+
+    python benchmarks/bench_signing.py [repeat]
+"""
+from __future__ import print_function
+
+import base64
+import hashlib
+import hmac
+import sys
+import timeit
+
+import mws
+from mws import utils
+
+try:
+    from urllib.parse import quote
+except ImportError:
+    from urllib import quote
+
+
+def legacy_sign(api, extra_data, method):
+    """
+    Signing as done before the Signer was introduced.
+    """
+    params = api.get_params()
+    params.update(extra_data)
+    request_description = ''
+    for key in sorted(params):
+        encoded_value = quote(params[key], safe='-_.~')
+        request_description += '&{}={}'.format(key, encoded_value)
+    request_description = request_description[1:]
+    sig_data = '\n'.join([method, api.domain.replace('https://', '').lower(), api.uri, request_description])
+    signature = base64.b64encode(hmac.new(api.secret_key.encode(), sig_data.encode(), hashlib.sha256).digest())
+    return '{}&Signature={}'.format(request_description, quote(signature))
+
+
+def cases():
+    credentials = dict(access_key='A' * 20, secret_key='A' * 40, account_id='A' * 14)
+    products_api = mws.Products(**credentials)
+    get_matching = dict(Action='GetMatchingProductForId', MarketplaceId='ATVPDKIKX0DER', IdType='SellerSKU')
+    get_matching.update(utils.enumerate_param('IdList.Id.', ['SKU-{:05d}'.format(n) for n in range(5)]))
+
+    inbound_api = mws.InboundShipments(**credentials)
+    plan = dict(Action='CreateInboundShipmentPlan', ShipToCountryCode='US')
+    plan.update(utils.enumerate_keyed_param('InboundShipmentPlanRequestItems.member', [
+        {'SellerSKU': 'SKU-{:05d}'.format(n), 'Quantity': str(n % 7 + 1)} for n in range(200)
+    ]))
+
+    feeds_api = mws.Feeds(**credentials)
+    feed = dict(Action='SubmitFeed', FeedType='_POST_INVENTORY_AVAILABILITY_DATA_', PurgeAndReplace='false')
+    feed.update(utils.enumerate_param('MarketplaceIdList.Id.', ['ATVPDKIKX0DER', 'A2EUQ1WTGCTBG2', 'A1AM78C64UM0Y8']))
+    return [
+        ('GetMatchingProductForId, 5 ids', products_api, get_matching, 'GET'),
+        ('SubmitFeed, 3 marketplaces', feeds_api, feed, 'POST'),
+        ('CreateInboundShipmentPlan, 200 members', inbound_api, plan, 'POST'),
+    ]
+
+
+def main(repeat=2000):
+    for label, api, extra_data, method in cases():
+        prepared = mws.PreparedRequest(extra_data, method=method)
+        legacy = min(timeit.repeat(lambda: legacy_sign(api, extra_data, method), number=repeat, repeat=3))
+        cached = min(timeit.repeat(lambda: api.sign_request(prepared), number=repeat, repeat=3))
+        print('{:<40} legacy {:8.1f} us  signer {:8.1f} us  x{:.2f}'.format(
+            label, legacy / repeat * 1e6, cached / repeat * 1e6, legacy / cached))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Compares per-call latency of `MWS.make_request` over a pooled, keep-alive
+`Transport` against opening a new connection for every call.
+
+Runs against a local plain-HTTP stub server, so no credentials or network are
+needed; against the real HTTPS endpoints the gap also includes the TLS handshake.
+With the package installed (`pip install -e .`):
+
+    python benchmarks/bench_transport.py [calls]
+"""
+from __future__ import print_function
+
+import sys
+import threading
+import time
+
+import mws
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+BODY = (
+    b'<?xml version="1.0"?>\n'
+    b'<GetServiceStatusResponse xmlns="https://mws.amazonservices.com/Orders/2013-09-01">'
+    b'<GetServiceStatusResult><Status>GREEN</Status></GetServiceStatusResult>'
+    b'</GetServiceStatusResponse>'
+)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/xml')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    # One thread per connection: idle keep-alive connections must not block the others.
+    daemon_threads = True
+
+
+def run(api, calls):
+    timings = []
+    for _ in range(calls):
+        start = time.time()
+        api.get_service_status()
+        timings.append(time.time() - start)
+    timings.sort()
+    return sum(timings) / calls, timings[len(timings) // 2]
+
+
+def main(calls=500):
+    server = StubServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    domain = 'http://127.0.0.1:{}'.format(server.server_address[1])
+    credentials = dict(access_key='A' * 20, secret_key='A' * 40, account_id='A' * 14, domain=domain)
+    try:
+        for label, keep_alive in [('new connection per call', False), ('pooled keep-alive', True)]:
+            with mws.Transport(keep_alive=keep_alive) as transport:
+                mean, median = run(mws.Orders(transport=transport, **credentials), calls)
+            print('{:<25} mean {:7.3f} ms  median {:7.3f} ms'.format(label, mean * 1000, median * 1000))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
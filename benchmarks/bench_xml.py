@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of response parsing: the single-pass `utils.parse_xml` used by
+`DictWrapper` against the original pipeline, which decoded the body,
+ran `remove_namespace` over it, built an ElementTree and converted it
+with `XML2Dict`. Reports CPU time and peak memory (tracemalloc) for
+large ListOrders and ListFinancialEvents pages, along with
+the record-level streaming done by `MWS.stream_records` and
+compact `__slots__` nodes (`compact=True`).
+
+With the package installed (`pip install -e .`), on Python 3:
+
+    python benchmarks/bench_xml.py [records]
+"""
+from __future__ import print_function
+
+import sys
+import timeit
+import tracemalloc
+
+from mws import utils
+from mws.mws import remove_namespace
+
+ORDER = '''
+      <Order>
+        <LatestShipDate>2017-08-14T06:59:59Z</LatestShipDate>
+        <OrderType>StandardOrder</OrderType>
+        <PurchaseDate>2017-08-12T19:40:35Z</PurchaseDate>
+        <AmazonOrderId>111-{0:07d}-1234567</AmazonOrderId>
+        <BuyerEmail>buyer{0}@marketplace.amazon.com</BuyerEmail>
+        <LastUpdateDate>2017-08-13T01:02:03Z</LastUpdateDate>
+        <NumberOfItemsShipped>1</NumberOfItemsShipped>
+        <ShipServiceLevel>Std US D2D Dom</ShipServiceLevel>
+        <OrderStatus>Shipped</OrderStatus>
+        <SalesChannel>Amazon.com</SalesChannel>
+        <ShippingAddress>
+          <City>SEATTLE</City>
+          <PostalCode>98101</PostalCode>
+          <StateOrRegion>WA</StateOrRegion>
+          <CountryCode>US</CountryCode>
+          <Name>Buyer {0}</Name>
+          <AddressLine1>{0} Main St</AddressLine1>
+        </ShippingAddress>
+        <OrderTotal><CurrencyCode>USD</CurrencyCode><Amount>{1}.99</Amount></OrderTotal>
+        <MarketplaceId>ATVPDKIKX0DER</MarketplaceId>
+        <PaymentMethodDetails><PaymentMethodDetail>Standard</PaymentMethodDetail></PaymentMethodDetails>
+      </Order>'''
+
+SHIPMENT_EVENT = '''
+        <ShipmentEvent>
+          <AmazonOrderId>111-{0:07d}-1234567</AmazonOrderId>
+          <PostedDate>2017-08-12T19:40:35Z</PostedDate>
+          <MarketplaceName>Amazon.com</MarketplaceName>
+          <ShipmentItemList>
+            <ShipmentItem>
+              <SellerSKU>SKU-{0}</SellerSKU>
+              <OrderItemId>{0}</OrderItemId>
+              <QuantityShipped>1</QuantityShipped>
+              <ItemChargeList>
+                <ChargeComponent>
+                  <ChargeType>Principal</ChargeType>
+                  <ChargeAmount><CurrencyCode>USD</CurrencyCode><CurrencyAmount>{1}.99</CurrencyAmount></ChargeAmount>
+                </ChargeComponent>
+                <ChargeComponent>
+                  <ChargeType>Tax</ChargeType>
+                  <ChargeAmount><CurrencyCode>USD</CurrencyCode><CurrencyAmount>1.20</CurrencyAmount></ChargeAmount>
+                </ChargeComponent>
+              </ItemChargeList>
+              <ItemFeeList>
+                <FeeComponent>
+                  <FeeType>Commission</FeeType>
+                  <FeeAmount><CurrencyCode>USD</CurrencyCode><CurrencyAmount>-1.50</CurrencyAmount></FeeAmount>
+                </FeeComponent>
+              </ItemFeeList>
+            </ShipmentItem>
+          </ShipmentItemList>
+        </ShipmentEvent>'''
+
+
+def list_orders(records):
+    return ('<?xml version="1.0"?>\n'
+            '<ListOrdersResponse xmlns="https://mws.amazonservices.com/Orders/2013-09-01">\n'
+            '  <ListOrdersResult>\n    <Orders>' + ''.join(ORDER.format(n, n % 100) for n in range(records)) +
+            '\n    </Orders>\n  </ListOrdersResult>\n</ListOrdersResponse>').encode('utf-8')
+
+
+def list_financial_events(records):
+    return ('<?xml version="1.0"?>\n'
+            '<ListFinancialEventsResponse xmlns="http://mws.amazonservices.com/Finances/2015-05-01">\n'
+            '  <ListFinancialEventsResult>\n    <FinancialEvents>\n      <ShipmentEventList>' +
+            ''.join(SHIPMENT_EVENT.format(n, n % 100) for n in range(records)) +
+            '\n      </ShipmentEventList>\n    </FinancialEvents>\n  </ListFinancialEventsResult>\n'
+            '</ListFinancialEventsResponse>').encode('utf-8')
+
+
+def legacy_parse(body):
+    """
+    Parsing as done before `utils.parse_xml`.
+    """
+    return utils.XML2Dict().fromstring(remove_namespace(body.decode('utf-8')))
+
+
+def stream_parse(path):
+    """
+    Streams the records of a page, in 64 KiB chunks, as `MWS.stream_records` does.
+    """
+    def parse(body):
+        builder = utils.RecordBuilder(path)
+        chunks = (body[start:start + 65536] for start in range(0, len(body), 65536))
+        for _ in builder.iterparse(chunks):
+            pass
+    return parse
+
+
+def peak_memory(parse, body):
+    tracemalloc.start()
+    parse(body)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main(records=2000):
+    for label, body, path in [
+        ('ListOrders', list_orders(records), [None, 'ListOrdersResult', 'Orders', 'Order']),
+        ('ListFinancialEvents', list_financial_events(records),
+         [None, 'ListFinancialEventsResult', 'FinancialEvents', '*', '*']),
+    ]:
+        print('{} page, {} records, {:.1f} MB'.format(label, records, len(body) / 1e6))
+        assert utils.parse_xml(body) == legacy_parse(body)
+        for name, parse in [('legacy', legacy_parse), ('parse_xml', utils.parse_xml),
+                            ('compact', lambda body: utils.parse_xml(body, compact=True)),
+                            ('stream', stream_parse(path))]:
+            cpu = min(timeit.repeat(lambda: parse(body), number=1, repeat=5))
+            print('  {:<10} {:8.1f} ms  peak {:7.1f} MB'.format(name, cpu * 1e3, peak_memory(parse, body) / 1e6))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -2,3 +2,10 @@
 from __future__ import absolute_import
 
 from .mws import *  # noqa: F401, F403
+from .flatfile import FlatFileReport  # noqa: F401
+from .pricing import PricingTable, extract_pricing  # noqa: F401
+from .state import MemoryStore, FileStore, SQLiteStore  # noqa: F401
+from .sync import OrderSync  # noqa: F401
+from .cache import MemoryCache, DiskCache  # noqa: F401
+from .reports import ReportJob, ReportRunner, ReportHarvester  # noqa: F401
+from .feeds import FeedBuilder, FeedJob, FeedPipeline, parse_processing_report  # noqa: F401
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""
+asyncio client for the Amazon MWS API.
+Requires Python 3.6+ and aiohttp (`pip install mws[aio]`).
+"""
+from .mws import *  # noqa: F401, F403
+from .transport import AsyncTransport  # noqa: F401
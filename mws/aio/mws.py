@@ -0,0 +1,400 @@
+# -*- coding: utf-8 -*-
+"""
+asyncio versions of the MWS API classes.
+
+Every class mirrors its `mws` counterpart: the same methods build the same
+parameters, but requests are sent through an AsyncTransport, so API methods
+return coroutines.
+
+    orders_api = mws.aio.Orders(access_key, secret_key, account_id)
+    response = await orders_api.list_orders(marketplaceids=[...], created_after=...)
+"""
+import asyncio
+from collections import deque
+
+from .. import mws, utils
+from ..offamazonpayments import OffAmazonPayments as _OffAmazonPayments
+from .transport import AsyncTransport
+
+__all__ = [
+    'MWS',
+    'Feeds',
+    'Inventory',
+    'InboundShipments',
+    'OutboundShipments',
+    'Reports',
+    'Orders',
+    'Products',
+    'Recommendations',
+    'Sellers',
+    'Finances',
+    'MerchantFulfillment',
+    'OffAmazonPayments',
+]
+
+
+class _AsyncIterator(object):
+    """
+    Async iterator over a plain iterable.
+    """
+    def __init__(self, iterable):
+        self._iterator = iter(iterable)
+
+    async def __anext__(self):
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+async def _pop_done(pending, ordered):
+    """
+    Removes from `pending`, a deque of (task, item) pairs, and returns:
+    the first pair if `ordered`, else every pair whose task is done,
+    once there is one.
+    """
+    if ordered:
+        return [pending.popleft()]
+    finished = (await asyncio.wait([task for task, _ in pending], return_when=asyncio.FIRST_COMPLETED))[0]
+    done = [entry for entry in pending if entry[0] in finished]
+    for entry in done:
+        pending.remove(entry)
+    return done
+
+
+class MWS(mws.MWS):
+    """
+    Base asyncio Amazon API class.
+
+    Throttle and RetryPolicy instances work as they do with the blocking
+    classes, except that waits are made with `asyncio.sleep`.
+    A Throttle may be shared between blocking and asyncio API instances.
+    """
+    def __init__(self, *args, **kwargs):
+        if kwargs.get('transport') is None:
+            kwargs['transport'] = AsyncTransport()
+        super(MWS, self).__init__(*args, **kwargs)
+
+    async def make_request(self, extra_data, method="GET", **kwargs):
+        """
+        Make request to Amazon MWS API with these parameters
+        """
+        return await self.send_request(self.prepare_request(extra_data, method, **kwargs))
+
+    async def send_request(self, prepared):
+        """
+        Sends a PreparedRequest, retrying it according to self.retry,
+        and returns the wrapped response.
+        """
+        parsed_response = self._cached_response(prepared)
+        if parsed_response is not None:
+            return parsed_response
+
+        response, data, retries, backoff_time = await self._send(prepared)
+
+        if prepared.stream_to is not None:
+            # The transport streamed the body: `data` is the StreamWriter it used.
+            parsed_response = mws.StreamWrapper(data, response.headers)
+        else:
+            parsed_response = self._wrap_response(data, response.headers, prepared.rootkey)
+            if self.cache is not None:
+                self.cache.set(prepared, data, response.headers)
+
+        parsed_response.response = response
+        parsed_response.retries = retries
+        parsed_response.backoff_time = backoff_time
+        parsed_response.cached = False
+        return parsed_response
+
+    async def _send(self, prepared):
+        """
+        Sends a PreparedRequest, retrying it according to self.retry.
+        Returns the successful response, its body, the number of retries made
+        and the total seconds spent waiting between them.
+        Raises MWSError for an error response that is not retried.
+        """
+        retries = 0
+        backoff_time = 0.0
+        while True:
+            if self.throttle is not None:
+                delay = self.throttle.reserve(self.account_id, prepared.action)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            if retries or prepared.is_stale():
+                self.sign_request(prepared)
+
+            response, data = await self.transport.request(prepared.method, prepared.url,
+                                                          data=prepared.body, headers=prepared.headers,
+                                                          stream_to=prepared.stream_to)
+            if response.status < 400:
+                return response, data, retries, backoff_time
+
+            delay = None
+            if self.retry is not None:
+                delay = self.retry.get_delay(retries, response.status, data, response.headers)
+            if delay is None:
+                raise self._make_error(self._decode(response, data), response, retries, backoff_time)
+            await asyncio.sleep(delay)
+            retries += 1
+            backoff_time += delay
+
+    def _decode(self, response, data):
+        """
+        Returns the body of a response decoded to text.
+        """
+        return data.decode(response.charset or 'utf-8', 'replace')
+
+    async def paginate(self, method, *args, **kwargs):
+        """
+        Async generator yielding every page of results for a request method
+        that supports next tokens. See `mws.MWS.paginate`.
+
+            async for page in orders_api.paginate(orders_api.list_orders, created_after=...):
+                ...
+        """
+        if not callable(method):
+            method = getattr(self, method)
+        if getattr(method, 'next_token_action_name', None) is None:
+            raise mws.MWSError((
+                "{} does not support next tokens. "
+                "Please refer to documentation."
+            ).format(getattr(method, '__name__', method)))
+
+        response = await method(*args, **kwargs)
+        while True:
+            yield response
+            next_token = self._get_next_token(response)
+            if next_token is None:
+                return
+            response = await method(next_token=next_token)
+
+    async def iter_records(self, method, *args, **kwargs):
+        """
+        Async generator yielding the individual records across every page
+        of a request method. See `mws.MWS.iter_records`.
+        """
+        if not callable(method):
+            method = getattr(self, method)
+        action = getattr(method, 'next_token_action_name', None)
+        if action not in self.RECORD_PATHS:
+            raise mws.MWSError((
+                "No record path known for {}. "
+                "Use `paginate` to iterate over pages instead."
+            ).format(getattr(method, '__name__', method)))
+
+        async for page in self.paginate(method, *args, **kwargs):
+            for record in utils.iterate_path(page.parsed, self.RECORD_PATHS[action]):
+                yield record
+
+    @staticmethod
+    async def _gather_limited(func, items, limit):
+        """
+        Runs the coroutine function `func` on every item, at most `limit` at a time.
+        Returns the results in the order of `items`.
+        """
+        semaphore = asyncio.Semaphore(limit)
+
+        async def run(item):
+            async with semaphore:
+                return await func(item)
+
+        return await asyncio.gather(*[run(item) for item in items])
+
+    @staticmethod
+    async def _concurrent_map(func, items, max_workers, ordered=True):
+        """
+        Async generator, counterpart of `utils.concurrent_map`: runs the
+        coroutine function `func` on every item of an iterable or async
+        iterable, `max_workers` at a time, yielding (item, result) pairs
+        in the order of `items` or, with `ordered=False`, as they complete.
+        """
+        if hasattr(items, '__aiter__'):
+            items = items.__aiter__()
+        else:
+            items = _AsyncIterator(items)
+        pending = deque()
+
+        async def submit(count):
+            for _ in range(count):
+                try:
+                    item = await items.__anext__()
+                except StopAsyncIteration:
+                    return
+                pending.append((asyncio.ensure_future(func(item)), item))
+
+        await submit(max_workers)
+        try:
+            while pending:
+                done = await _pop_done(pending, ordered)
+                for task, item in done:
+                    yield item, await task
+                await submit(len(done))
+        finally:
+            for task, _ in pending:
+                task.cancel()
+
+    async def stream_records(self, method, *args, **kwargs):
+        """
+        Async generator yielding the same records as `iter_records`.
+        AsyncTransport reads each page whole, so records are extracted
+        once their page is received, not while it downloads.
+        """
+        async for record in self.iter_records(method, *args, **kwargs):
+            yield record
+
+    async def backfill(self, method, start, end=None, partitions=None, max_workers=None, by=None, **kwargs):
+        """
+        Async generator, see `mws.MWS.backfill`; windows are paged as
+        concurrent tasks, `max_workers` at a time.
+        """
+        method, record_path, params, windows = self._prepare_backfill(method, start, end, partitions, max_workers, by)
+
+        async def page(window):
+            response = await method(**self._window_kwargs(window, params, kwargs))
+            next_token = self._get_next_token(response)
+            if next_token is not None and self._can_split(window):
+                return None
+            records = list(utils.iterate_path(response.parsed, record_path))
+            while next_token is not None:
+                response = await method(next_token=next_token)
+                records.extend(utils.iterate_path(response.parsed, record_path))
+                next_token = self._get_next_token(response)
+            return records
+
+        def queued():
+            while windows:
+                yield windows.popleft()
+
+        seen = {}
+        while windows:
+            async for window, records in self._concurrent_map(page, queued(), max_workers or self.BULK_MAX_WORKERS,
+                                                              ordered=False):
+                if records is None:
+                    windows.extend(self._split_window(window))
+                    continue
+                for record in self._window_records(records, window, params, seen):
+                    yield record
+
+
+class Feeds(MWS, mws.Feeds):
+    """
+    asyncio Amazon MWS Feeds API
+    """
+
+
+class Reports(MWS, mws.Reports):
+    """
+    asyncio Amazon MWS Reports API
+    """
+
+
+class Orders(MWS, mws.Orders):
+    """
+    asyncio Amazon Orders API
+    """
+    async def get_orders_bulk(self, amazon_order_ids, max_workers=None):
+        """
+        Async generator, see `mws.Orders.get_orders_bulk`; requests run as
+        concurrent tasks, `max_workers` at a time, and pairs are yielded in order
+        as soon as their request completes.
+        """
+        semaphore = asyncio.Semaphore(max_workers or self.BULK_MAX_WORKERS)
+
+        async def request(chunk):
+            async with semaphore:
+                return await self.get_order(chunk)
+
+        chunks = list(utils.chunks(utils.unique(amazon_order_ids), self.GET_ORDER_MAX_IDS))
+        tasks = [asyncio.ensure_future(request(chunk)) for chunk in chunks]
+        try:
+            for chunk, task in zip(chunks, tasks):
+                for pair in self._match_orders(chunk, await task):
+                    yield pair
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def iter_order_items(self, orders, max_workers=None, ordered=False):
+        """
+        Async generator, see `mws.Orders.iter_order_items`;
+        `orders` may also be an async iterable.
+        """
+        async def fetch(order):
+            order_id = self._get_order_id(order)
+            return [item async for item in self.iter_records(self.list_order_items, amazon_order_id=order_id)]
+
+        async for pair in self._concurrent_map(fetch, orders, max_workers or self.BULK_MAX_WORKERS, ordered):
+            yield pair
+
+
+class Products(MWS, mws.Products):
+    """
+    asyncio Amazon MWS Products API
+    """
+    async def bulk(self, method, ids, max_workers=None, **kwargs):
+        """
+        See `mws.Products.bulk`; requests run as concurrent tasks,
+        `max_workers` at a time.
+        """
+        method, size, param, key = self._get_bulk_operation(method)
+        ids = utils.unique(ids)
+
+        async def request(chunk):
+            request_kwargs = dict(kwargs)
+            request_kwargs[param] = chunk
+            return await method(**request_kwargs)
+
+        results = {}
+        responses = await self._gather_limited(request, utils.chunks(ids, size), max_workers or self.BULK_MAX_WORKERS)
+        for response in responses:
+            self._merge_bulk_results(results, response, key)
+        return utils.ObjectDict((id_, results[id_]) for id_ in ids if id_ in results)
+
+
+class Sellers(MWS, mws.Sellers):
+    """
+    asyncio Amazon MWS Sellers API
+    """
+
+
+class Finances(MWS, mws.Finances):
+    """
+    asyncio Amazon MWS Finances API
+    """
+
+
+class InboundShipments(MWS, mws.InboundShipments):
+    """
+    asyncio Amazon MWS FulfillmentInboundShipment API
+    """
+
+
+class Inventory(MWS, mws.Inventory):
+    """
+    asyncio Amazon MWS Inventory Fulfillment API
+    """
+
+
+class OutboundShipments(MWS, mws.OutboundShipments):
+    """
+    asyncio Amazon MWS Fulfillment Outbound Shipments API
+    """
+
+
+class Recommendations(MWS, mws.Recommendations):
+    """
+    asyncio Amazon MWS Recommendations API
+    """
+
+
+class MerchantFulfillment(MWS, mws.MerchantFulfillment):
+    """
+    asyncio Amazon MWS Merchant Fulfillment API
+    """
+
+
+class OffAmazonPayments(MWS, _OffAmazonPayments):
+    """
+    asyncio Amazon Pay (Off-Amazon Payments) API
+    """
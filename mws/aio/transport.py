@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+asyncio HTTP transport used by the `mws.aio` API classes.
+"""
+try:
+    import aiohttp
+    import yarl
+except ImportError:
+    aiohttp = None
+
+from ..mws import FeedBody, MWSError, StreamWriter
+
+
+class AsyncTransport(object):
+    """
+    Pooled, keep-alive HTTP transport backed by an `aiohttp.ClientSession`.
+
+    The session is created on first use, inside the running event loop.
+    A single AsyncTransport can be shared by many API instances, including
+    ones for different seller accounts, to drive them all from one pool.
+
+    Example:
+        async with AsyncTransport(limit=500, limit_per_host=100) as transport:
+            orders_api = mws.aio.Orders(access_key, secret_key, account_id, transport=transport)
+            ...
+    """
+    def __init__(self, limit=100, limit_per_host=0,
+                 connect_timeout=None, read_timeout=None, keep_alive=True):
+        """
+        `limit` is the total number of simultaneous connections and
+        `limit_per_host` the number per host (0 for no limit).
+        `connect_timeout` and `read_timeout` are in seconds; None waits forever.
+        With `keep_alive=False`, connections are closed after every request.
+        """
+        if aiohttp is None:
+            raise MWSError("aiohttp is required by mws.aio: pip install aiohttp")
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.keep_alive = keep_alive
+        self._session = None
+
+    @property
+    def session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit,
+                                             limit_per_host=self.limit_per_host,
+                                             force_close=not self.keep_alive)
+            timeout = aiohttp.ClientTimeout(total=None,
+                                            sock_connect=self.connect_timeout,
+                                            sock_read=self.read_timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+
+    # Size, in bytes, of the chunks in which response bodies are streamed to a file.
+    STREAM_CHUNK_SIZE = 64 * 1024
+
+    async def request(self, method, url, data=None, headers=None, stream_to=None):
+        """
+        Sends a single HTTP request.
+        Returns the (released) `aiohttp.ClientResponse` and its body, as bytes.
+
+        With `stream_to` (a file path or writable binary file object), a successful
+        response body is written there chunk by chunk, and the StreamWriter used
+        is returned in place of the body.
+        """
+        # The query string is already signed: it must be sent untouched.
+        url = yarl.URL(url, encoded=True)
+        if isinstance(data, FeedBody):
+            # Uploaded chunk by chunk, with its length known up front rather than chunked encoding.
+            headers = dict(headers or {})
+            headers['Content-Length'] = str(len(data))
+            data = _iter_body(data)
+        async with self.session.request(method, url, data=data or None, headers=headers) as response:
+            if stream_to is None or response.status >= 400:
+                body = await response.read()
+            else:
+                with StreamWriter(stream_to) as body:
+                    async for chunk in response.content.iter_chunked(self.STREAM_CHUNK_SIZE):
+                        body.write(chunk)
+        return response, body
+
+    async def close(self):
+        """
+        Closes every pooled connection.
+        """
+        if self._session is not None:
+            await self._session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+async def _iter_body(body):
+    """
+    Async generator over the chunks of a FeedBody, as aiohttp uploads them.
+    """
+    for chunk in body:
+        yield chunk
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Response caches for read-only MWS operations whose answers change slowly.
+
+Give an API instance a cache to answer repeated requests from it, without
+using the network or the throttle quota:
+
+    cache = MemoryCache(max_entries=10000)
+    products_api = mws.Products(access_key, secret_key, account_id, cache=cache)
+    products_api.get_product_categories_for_asin(marketplace_id, asin)  # sent
+    products_api.get_product_categories_for_asin(marketplace_id, asin)  # cached
+
+Only the Actions given a time-to-live in `ttls` are cached.
+"""
+from __future__ import absolute_import
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from .state import _connect
+
+__all__ = [
+    'CACHE_TTLS',
+    'MemoryCache',
+    'DiskCache',
+]
+
+# Default time-to-live, in seconds, of the responses of each cached Action.
+CACHE_TTLS = {
+    # Sellers
+    'ListMarketplaceParticipations': 24 * 60 * 60,
+    # Products
+    'GetMatchingProduct': 60 * 60,
+    'GetMatchingProductForId': 60 * 60,
+    'GetProductCategoriesForASIN': 24 * 60 * 60,
+    'GetProductCategoriesForSKU': 24 * 60 * 60,
+    # Inbound shipments
+    'GetPrepInstructionsForASIN': 24 * 60 * 60,
+    'GetPrepInstructionsForSKU': 24 * 60 * 60,
+    # Recommendations
+    'GetLastUpdatedTimeForRecommendations': 15 * 60,
+}
+
+# Query parameters set anew each time a request is signed.
+_SIGNING_PARAMS = ('Timestamp=', 'Signature=')
+
+
+class ResponseCache(object):
+    """
+    Base class of the caches: maps requests to the body and headers of
+    their response, for the time-to-live of their Action.
+
+    `ttls` updates CACHE_TTLS: map an Action to a number of seconds to
+    cache it, or to 0 not to. At most `max_entries` responses are kept,
+    the least recently used ones being dropped first.
+    """
+    def __init__(self, ttls=None, max_entries=1024, clock=time.time):
+        self.ttls = dict(CACHE_TTLS)
+        self.ttls.update(ttls or {})
+        self.max_entries = max_entries
+        self.clock = clock
+
+    def caches(self, prepared):
+        """
+        Returns True if the response to a PreparedRequest may be cached.
+        """
+        return bool(self.ttls.get(prepared.action)) and prepared.stream_to is None
+
+    @staticmethod
+    def key(prepared):
+        """
+        Returns the key of a signed PreparedRequest: its canonical description,
+        without the Timestamp and Signature, which change every time.
+        """
+        params = '&'.join(param for param in prepared.query.split('&') if not param.startswith(_SIGNING_PARAMS))
+        key = '{} {}{}?{}'.format(prepared.method, prepared.domain, prepared.uri, params)
+        if prepared.body:
+            body = prepared.body if isinstance(prepared.body, bytes) else prepared.body.encode('utf-8')
+            key += ' ' + hashlib.sha256(body).hexdigest()
+        return key
+
+    def get(self, prepared):
+        """
+        Returns the (body, headers) cached for a PreparedRequest, or None.
+        """
+        if not self.caches(prepared):
+            return None
+        return self._get(self.key(prepared), self.clock())
+
+    def set(self, prepared, body, headers):
+        """
+        Caches the response body and headers of a PreparedRequest, if its Action is cached.
+        """
+        if self.caches(prepared):
+            self._set(self.key(prepared), body, dict(headers), self.clock() + self.ttls[prepared.action])
+
+    def _get(self, key, now):
+        raise NotImplementedError
+
+    def _set(self, key, body, headers, expires):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class MemoryCache(ResponseCache):
+    """
+    Cache kept in memory, shared by the threads of a process.
+    """
+    def __init__(self, ttls=None, max_entries=1024, clock=time.time):
+        super(MemoryCache, self).__init__(ttls, max_entries, clock)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get(self, key, now):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None or entry[2] <= now:
+                return None
+            # Most recently used last.
+            self._entries[key] = entry
+            return entry[:2]
+
+    def _set(self, key, body, headers, expires):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (body, headers, expires)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DiskCache(ResponseCache):
+    """
+    Cache kept in an SQLite database, shared by the processes using the same file
+    and kept across restarts.
+    """
+    def __init__(self, path, ttls=None, max_entries=100000, clock=time.time):
+        super(DiskCache, self).__init__(ttls, max_entries, clock)
+        self.path = path
+        with self._connect() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS mws_cache ('
+                'key TEXT PRIMARY KEY, body BLOB NOT NULL, headers TEXT NOT NULL, '
+                'expires REAL NOT NULL, used REAL NOT NULL)')
+            connection.execute('CREATE INDEX IF NOT EXISTS mws_cache_used ON mws_cache (used)')
+
+    def _connect(self):
+        return _connect(self.path)
+
+    def __len__(self):
+        with self._connect() as connection:
+            return connection.execute('SELECT COUNT(*) FROM mws_cache').fetchone()[0]
+
+    def _get(self, key, now):
+        with self._connect() as connection:
+            row = connection.execute(
+                'SELECT body, headers FROM mws_cache WHERE key = ? AND expires > ?', (key, now)).fetchone()
+            if row is None:
+                return None
+            connection.execute('UPDATE mws_cache SET used = ? WHERE key = ?', (now, key))
+        return bytes(row[0]), json.loads(row[1])
+
+    def _set(self, key, body, headers, expires):
+        import sqlite3  # imported on first use, like in mws.state._connect
+        now = self.clock()
+        with self._connect() as connection:
+            connection.execute('DELETE FROM mws_cache WHERE expires <= ?', (now,))
+            connection.execute(
+                'INSERT OR REPLACE INTO mws_cache (key, body, headers, expires, used) VALUES (?, ?, ?, ?, ?)',
+                (key, sqlite3.Binary(body), json.dumps(headers), expires, now))
+            connection.execute(
+                'DELETE FROM mws_cache WHERE key IN '
+                '(SELECT key FROM mws_cache ORDER BY used DESC LIMIT -1 OFFSET ?)', (self.max_entries,))
+
+    def clear(self):
+        with self._connect() as connection:
+            connection.execute('DELETE FROM mws_cache')
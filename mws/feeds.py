@@ -0,0 +1,461 @@
+# -*- coding: utf-8 -*-
+"""
+Feed submission helpers built on the Feeds API.
+
+`FeedPipeline` submits feeds, polls them until Amazon has processed
+them and reads the processing report of each one:
+
+    pipeline = FeedPipeline(feeds_api)
+    jobs = [FeedJob(price_feed, '_POST_PRODUCT_PRICING_DATA_'),
+            FeedJob(inventory_feed, '_POST_INVENTORY_AVAILABILITY_DATA_')]
+    for job in pipeline.run(jobs):
+        print(job.feed_type, job.summary.messages_with_error, job.latency)
+
+`FeedBuilder` coalesces per-SKU updates into as few feeds as possible:
+
+    with FeedBuilder(feeds_api, '_POST_PRODUCT_PRICING_DATA_', max_age=300) as prices:
+        for sku, price in price_changes:
+            prices.add(sku, price=price)
+"""
+from __future__ import absolute_import
+
+import re
+import time
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from xml.sax.saxutils import escape
+
+from . import utils
+from .mws import MWSError
+from .polling import PollingRunner
+from .retry import parse_timestamp
+
+try:
+    text_type = unicode  # Python 2
+except NameError:
+    text_type = str
+
+__all__ = [
+    'FeedBuilder',
+    'FeedJob',
+    'FeedPipeline',
+    'parse_processing_report',
+]
+
+# FeedProcessingStatus values of submissions Amazon is done with.
+DONE = '_DONE_'
+CANCELLED = '_CANCELLED_'
+FINISHED_STATUSES = (DONE, CANCELLED)
+
+# Counters of a processing report, by XML ProcessingSummary element and by flat-file summary line.
+SUMMARY_FIELDS = (
+    ('MessagesProcessed', 'processed', 'messages_processed'),
+    ('MessagesSuccessful', 'successful', 'messages_successful'),
+    ('MessagesWithError', 'with error', 'messages_with_error'),
+    ('MessagesWithWarning', 'with warning', 'messages_with_warning'),
+)
+
+# "Number of records processed		2" lines of flat-file processing reports.
+_flat_summary_line = re.compile(r'Number of records ([a-z ]+?)\s+(\d+)')
+
+
+class FeedJob(object):
+    """
+    A feed to submit, with the `Feeds.submit_feed` arguments.
+
+    Once run, `submission_id` and `status` are those of the submission,
+    `summary` its parsed processing report (see parse_processing_report),
+    `result` the `get_feed_submission_result` response and `error` the
+    MWSError that stopped the job, if any.
+
+    Latency metrics, in seconds: `latency` from the submission to the
+    processing report being read, by the pipeline clock; `queue_time` and
+    `processing_time`, from the SubmittedDate, StartedProcessingDate and
+    CompletedProcessingDate Amazon reports.
+    """
+    def __init__(self, feed, feed_type, marketplaceids=None, content_type="text/xml", purge='false'):
+        self.feed = feed
+        self.feed_type = feed_type
+        self.marketplaceids = marketplaceids
+        self.content_type = content_type
+        self.purge = purge
+        self.submission_id = None
+        self.status = None
+        self.summary = None
+        self.result = None
+        self.error = None
+        self.submitted_at = None
+        self.finished_at = None
+        self.submitted_date = None
+        self.started_date = None
+        self.completed_date = None
+
+    def __repr__(self):
+        return '<FeedJob {} {}>'.format(self.feed_type, self.status or 'unsubmitted')
+
+    @property
+    def latency(self):
+        """
+        Seconds from the submission to the end of the job, or None.
+        """
+        if self.submitted_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.submitted_at
+
+    @property
+    def queue_time(self):
+        """
+        Seconds the feed waited for Amazon to start processing it, or None.
+        """
+        return _seconds_between(self.submitted_date, self.started_date)
+
+    @property
+    def processing_time(self):
+        """
+        Seconds Amazon spent processing the feed, or None.
+        """
+        return _seconds_between(self.started_date, self.completed_date)
+
+
+class FeedPipeline(PollingRunner):
+    """
+    Runs feed jobs with SubmitFeed, polls them with GetFeedSubmissionList
+    and reads the processing report of each processed feed; see PollingRunner.
+    `run` yields each FeedJob once it is over: processed, cancelled,
+    or failed with an MWSError.
+    """
+    SUBMIT_ACTION = 'SubmitFeed'
+    FINISHED_STATUSES = FINISHED_STATUSES
+
+    def __init__(self, feeds_api, max_workers=None, min_interval=10.0, max_interval=300.0, poll_ratio=0.25,
+                 sleep=time.sleep, clock=time.time, max_wait=PollingRunner.MAX_WAIT):
+        super(FeedPipeline, self).__init__(feeds_api, max_workers, min_interval, max_interval, poll_ratio,
+                                           sleep, clock, max_wait)
+        self.feeds_api = feeds_api
+
+    def _submit_job(self, job):
+        job.submitted_at = self.clock()
+        response = self.feeds_api.submit_feed(job.feed, job.feed_type, job.marketplaceids,
+                                              content_type=job.content_type, purge=job.purge)
+        self._update(job, response.parsed.FeedSubmissionInfo)
+        return job.submission_id
+
+    def _submitted_at(self, job):
+        return job.submitted_at
+
+    def _list(self, submission_ids):
+        return self.feeds_api.iter_records(self.feeds_api.get_feed_submission_list,
+                                           feedids=submission_ids, max_count=str(len(submission_ids)))
+
+    def _job_id(self, info):
+        return info.getvalue('FeedSubmissionId')
+
+    def _update(self, job, info):
+        job.submission_id = info.getvalue('FeedSubmissionId')
+        job.status = info.getvalue('FeedProcessingStatus')
+        job.submitted_date = info.getvalue('SubmittedDate')
+        job.started_date = info.getvalue('StartedProcessingDate')
+        job.completed_date = info.getvalue('CompletedProcessingDate')
+        return job.status
+
+    def _collect_job(self, job):
+        if job.status == DONE:
+            try:
+                job.result = self.feeds_api.get_feed_submission_result(job.submission_id)
+                job.summary = parse_processing_report(job.result)
+            except MWSError as error:
+                job.error = error
+        job.finished_at = self.clock()
+        return job
+
+    def _fail(self, job, error):
+        job.error = error
+        job.finished_at = self.clock()
+        return job
+
+
+def parse_processing_report(report):
+    """
+    Returns the summary of a feed processing report, XML or flat file,
+    given as a `get_feed_submission_result` response or its body:
+    an ObjectDict of status_code ("Complete"...), messages_processed,
+    messages_successful, messages_with_error and messages_with_warning
+    (ints, 0 when missing), and the `results` of the report, a list of
+    ObjectDicts of message_id, result_code ("Error", "Warning"),
+    message_code, description and sku.
+    """
+    data = getattr(report, 'original', report)
+    if isinstance(data, bytes):
+        data = data.decode('utf-8', 'replace')
+    summary = utils.ObjectDict({'status_code': None, 'results': []})
+    for _, _, field in SUMMARY_FIELDS:
+        summary[field] = 0
+    if data.lstrip().startswith('<'):
+        _parse_xml_report(data, summary)
+    else:
+        _parse_flat_report(data, summary)
+    return summary
+
+
+def _parse_xml_report(data, summary):
+    fields = dict((tag, field) for tag, _, field in SUMMARY_FIELDS)
+    for element in ET.fromstring(data.encode('utf-8')).iter():
+        tag = element.tag.rpartition('}')[2]
+        if tag in fields:
+            summary[fields[tag]] = int(element.text or 0)
+        elif tag == 'StatusCode':
+            summary.status_code = (element.text or '').strip()
+        elif tag == 'Result':
+            values = dict((child.tag.rpartition('}')[2], (child.text or '').strip()) for child in element.iter())
+            summary.results.append(utils.ObjectDict({
+                'message_id': values.get('MessageID'),
+                'result_code': values.get('ResultCode'),
+                'message_code': values.get('ResultMessageCode'),
+                'description': values.get('ResultDescription'),
+                'sku': values.get('SKU'),
+            }))
+
+
+def _parse_flat_report(data, summary):
+    fields = dict((label, field) for _, label, field in SUMMARY_FIELDS)
+    for label, count in _flat_summary_line.findall(data):
+        if label in fields:
+            summary[fields[label]] = int(count)
+    summary.status_code = 'Complete' if summary.messages_processed else None
+    # Rows of "original-record-number	sku	error-code	error-type	error-message", after their header.
+    header = None
+    for line in data.splitlines():
+        columns = line.strip('\r').split('\t')
+        if header is None:
+            if columns[0] == 'original-record-number':
+                header = columns
+            continue
+        if not line.strip():
+            continue
+        values = dict(zip(header, columns))
+        summary.results.append(utils.ObjectDict({
+            'message_id': values.get('original-record-number'),
+            'result_code': values.get('error-type'),
+            'message_code': values.get('error-code'),
+            'description': values.get('error-message'),
+            'sku': values.get('sku'),
+        }))
+
+
+def _seconds_between(start, end):
+    # Amazon dates carry an offset ("2017-01-01T00:00:00+00:00"), always UTC.
+    start, end = parse_timestamp((start or '')[:19]), parse_timestamp((end or '')[:19])
+    if start is None or end is None:
+        return None
+    return (end - start).total_seconds()
+
+
+class XMLFeedFormat(object):
+    """
+    Serializes updates to the messages of an XML feed: `template` is the
+    message body, formatted with the SKU and update values, all escaped.
+    """
+    content_type = 'text/xml'
+    header = ('<?xml version="1.0" encoding="utf-8"?>\n'
+              '<AmazonEnvelope xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+              'xsi:noNamespaceSchemaLocation="amzn-envelope.xsd">\n'
+              '<Header><DocumentVersion>1.01</DocumentVersion><MerchantIdentifier>{merchant_id}</MerchantIdentifier>'
+              '</Header>\n<MessageType>{message_type}</MessageType>\n')
+    footer = b'</AmazonEnvelope>\n'
+
+    def __init__(self, message_type, template, required, optional=None):
+        self.message_type = message_type
+        self.template = template
+        self.fields = tuple(required) + tuple(optional or {})
+        self.required = tuple(required)
+        # Renderers of optional values, by field: left out of the message when not given.
+        self.optional = optional or {}
+
+    def render(self, sku, values):
+        fields = dict((field, escape(text_type(value))) for field, value in values.items() if value is not None)
+        for field, render in self.optional.items():
+            fields[field] = render(fields[field]) if field in fields else ''
+        return self.template.format(sku=escape(text_type(sku)), **fields).encode('utf-8')
+
+    def build(self, merchant_id, messages):
+        parts = [self.header.format(merchant_id=escape(text_type(merchant_id)),
+                                    message_type=self.message_type).encode('utf-8')]
+        for message_id, message in enumerate(messages, 1):
+            parts.append(b'<Message><MessageID>' + str(message_id).encode('ascii') + b'</MessageID>'
+                         b'<OperationType>Update</OperationType>' + message + b'</Message>\n')
+        parts.append(self.footer)
+        return b''.join(parts)
+
+
+class FlatFeedFormat(object):
+    """
+    Serializes updates to the rows of a tab-delimited flat-file feed;
+    the values of the `columns` an update leaves out are left empty, unchanged.
+    """
+    content_type = 'text/tab-separated-values; charset=UTF-8'
+
+    def __init__(self, columns, required=()):
+        self.columns = tuple(columns)
+        self.fields = tuple(column.replace('-', '_') for column in self.columns)
+        self.required = tuple(required)
+
+    def render(self, sku, values):
+        cells = [sku] + [values.get(field) for field in self.fields]
+        row = u'\t'.join(u'' if cell is None else text_type(cell).replace(u'\t', u' ') for cell in cells)
+        return row.encode('utf-8') + b'\n'
+
+    def build(self, merchant_id, messages):
+        return '\t'.join(('sku',) + self.columns).encode('utf-8') + b'\n' + b''.join(messages)
+
+
+# Formats of the feeds FeedBuilder writes, by FeedType; more can be added.
+FEED_FORMATS = {
+    '_POST_PRODUCT_PRICING_DATA_': XMLFeedFormat(
+        'Price', '<Price><SKU>{sku}</SKU><StandardPrice currency="{currency}">{price}</StandardPrice></Price>',
+        required=('price', 'currency')),
+    '_POST_INVENTORY_AVAILABILITY_DATA_': XMLFeedFormat(
+        'Inventory', '<Inventory><SKU>{sku}</SKU><Quantity>{quantity}</Quantity>{fulfillment_latency}</Inventory>',
+        required=('quantity',),
+        optional={'fulfillment_latency': '<FulfillmentLatency>{}</FulfillmentLatency>'.format}),
+    '_POST_FLAT_FILE_PRICEANDQUANTITYONLY_UPDATE_DATA_': FlatFeedFormat(
+        ('price', 'quantity', 'handling-time')),
+}
+
+
+class FeedBuilder(object):
+    """
+    Coalesces a stream of per-SKU updates into feeds of one FeedType
+    (see FEED_FORMATS), submitted with `Feeds.submit_feed`.
+
+    Updates to a SKU already waiting are merged into it, the latest value of
+    each field winning, so that a feed carries one message per SKU. Each
+    update is serialized once, as it is added; the feed is only assembled
+    when submitted.
+
+    A feed is submitted, by `add` or `flush_if_due`, once it holds
+    `max_messages` SKUs, reaches `max_bytes`, or its first update is `max_age`
+    seconds old. `max_age` is the one setting that trades update latency for
+    SubmitFeed quota: one builder submits at most one feed every `max_age`
+    seconds while updates fit in a feed, and with a Throttle on the Feeds
+    instance, a feed due by age keeps coalescing updates until the SubmitFeed
+    quota allows it. The default, 120 seconds, is the rate the quota is restored at.
+
+        with FeedBuilder(feeds_api, '_POST_INVENTORY_AVAILABILITY_DATA_', max_age=600) as inventory:
+            for sku, quantity in stock_changes:
+                inventory.add(sku, quantity=quantity)
+                inventory.flush_if_due()
+
+    `currency` is the default currency of pricing updates, and `merchant_id`
+    the MerchantIdentifier of XML feeds (by default the account ID).
+    """
+    MAX_MESSAGES = 10000
+    MAX_BYTES = 10 * 1024 * 1024
+    MAX_AGE = 120.0
+
+    def __init__(self, feeds_api, feed_type, max_messages=MAX_MESSAGES, max_bytes=MAX_BYTES, max_age=MAX_AGE,
+                 marketplaceids=None, currency='USD', merchant_id=None, clock=time.time):
+        if feed_type not in FEED_FORMATS:
+            raise MWSError("No feed format known for {}.".format(feed_type))
+        self.feeds_api = feeds_api
+        self.feed_type = feed_type
+        self.format = FEED_FORMATS[feed_type]
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.marketplaceids = marketplaceids
+        self.currency = currency
+        self.merchant_id = merchant_id or feeds_api.account_id
+        self.clock = clock
+        # (values, serialized message) pairs, by SKU.
+        self._updates = OrderedDict()
+        self.size = 0
+        self.started_at = None
+
+    def __len__(self):
+        return len(self._updates)
+
+    def add(self, sku, **values):
+        """
+        Adds the update of a SKU, e.g. `add('SKU-1', price=Decimal('9.99'))`,
+        then submits the feed if it is due.
+        Returns the `submit_feed` response if a feed was submitted, else None.
+        """
+        unknown = set(values) - set(self.format.fields)
+        if unknown:
+            raise MWSError("Unknown fields for {}: {}.".format(self.feed_type, ', '.join(sorted(unknown))))
+        if 'currency' in self.format.fields:
+            values.setdefault('currency', self.currency)
+        previous, message = self._updates.pop(sku, ({}, b''))
+        merged = dict(previous)
+        merged.update(values)
+        missing = [field for field in self.format.required if merged.get(field) is None]
+        if missing:
+            raise MWSError("Missing fields for SKU {}: {}.".format(sku, ', '.join(missing)))
+        self._updates[sku] = (merged, self.format.render(sku, merged))
+        self.size += len(self._updates[sku][1]) - len(message)
+        if self.started_at is None:
+            self.started_at = self.clock()
+        return self.flush_if_due()
+
+    def is_due(self):
+        """
+        Returns True if the pending updates should be submitted now.
+        """
+        if not self._updates:
+            return False
+        if len(self._updates) >= self.max_messages or self.size >= self.max_bytes:
+            return True
+        if self.clock() - self.started_at < self.max_age:
+            return False
+        throttle = self.feeds_api.throttle
+        return throttle is None or throttle.available(self.feeds_api.account_id, 'SubmitFeed') >= 1
+
+    def flush_if_due(self):
+        """
+        Submits the pending updates if they are due (see `is_due`).
+        Returns the `submit_feed` response, or None.
+        """
+        if self.is_due():
+            return self.flush()
+        return None
+
+    def build(self):
+        """
+        Returns a FeedJob for the pending updates, for a FeedPipeline,
+        or None if there are none. The updates stay pending: call `clear`
+        once the feed is submitted.
+        """
+        if not self._updates:
+            return None
+        feed = self.format.build(self.merchant_id, (message for _, message in self._updates.values()))
+        return FeedJob(feed, self.feed_type, self.marketplaceids, content_type=self.format.content_type)
+
+    def clear(self):
+        """
+        Forgets the pending updates.
+        """
+        self._updates.clear()
+        self.size = 0
+        self.started_at = None
+
+    def flush(self):
+        """
+        Submits the pending updates in one feed, and forgets them once submitted:
+        if `submit_feed` raises, they stay pending.
+        Returns the `submit_feed` response, or None if there were no updates.
+        """
+        job = self.build()
+        if job is None:
+            return None
+        response = self.feeds_api.submit_feed(job.feed, job.feed_type, job.marketplaceids,
+                                              content_type=job.content_type, purge=job.purge)
+        self.clear()
+        return response
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        # Leaves a batch cut short by an error unsubmitted.
+        if exc_type is None:
+            self.flush()
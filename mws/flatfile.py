@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming parser for tab-delimited (flat file) MWS reports.
+
+Reports such as listings, orders, inventory and settlements come back as
+tab-separated text. `FlatFileReport` decodes them incrementally and yields
+one row at a time, so multi-gigabyte reports are processed in constant memory:
+
+    response = reports_api.get_report(report_id, stream_to='/tmp/settlement.txt')
+    for row in FlatFileReport.from_response(response, '_GET_V2_SETTLEMENT_REPORT_DATA_FLAT_FILE_V2_'):
+        print(row.order_id, row.amount)
+"""
+from __future__ import absolute_import
+
+import codecs
+import datetime
+import re
+from decimal import Decimal, InvalidOperation
+from functools import partial
+
+from .mws import MWSError
+from .utils import ObjectDict, is_path, text_type
+
+# Charsets MWS announces in the Content-Type of reports, and the Python codec to decode them with.
+CHARSETS = {
+    'windows-31j': 'cp932',
+    'shift_jis': 'cp932',
+    'x-sjis': 'cp932',
+}
+
+# Encoding of reports, by region, when the response does not announce one.
+# cp932 is the Microsoft Shift_JIS variant (Windows-31J) Amazon uses for Japan.
+REGION_ENCODINGS = {
+    'JP': 'cp932',
+}
+DEFAULT_ENCODING = 'cp1252'
+
+# Offsets, in hours, of the time zone names found in report dates.
+TIME_ZONES = {
+    'UTC': 0, 'GMT': 0, 'Z': 0,
+    'BST': 1, 'CET': 1, 'CEST': 2, 'JST': 9, 'IST': 5.5,
+    'EST': -5, 'EDT': -4, 'CST': -6, 'CDT': -5,
+    'MST': -7, 'MDT': -6, 'PST': -8, 'PDT': -7,
+}
+
+_datetime_match = re.compile(
+    r'(?:(\d{4})-(\d{2})-(\d{2})|(\d{2})\.(\d{2})\.(\d{4}))'  # 2017-08-12 or 12.08.2017
+    r'(?:[T ](\d{2}):(\d{2})(?::(\d{2}))?(?:\.\d+)?)?'        # T19:40:35.000
+    r'\s*(Z|[A-Z]{3,4}|[+-]\d{2}:?\d{2})?\Z'                   # Z, UTC, PST, +09:00
+).match
+
+
+def _parse_offset(zone):
+    """
+    Returns the UTC offset of a time zone name or "+09:00" suffix, as a timedelta.
+    """
+    if zone[0] in '+-':
+        digits = zone[1:].replace(':', '')
+        offset = datetime.timedelta(hours=int(digits[:2]), minutes=int(digits[2:]))
+        return -offset if zone[0] == '-' else offset
+    if zone not in TIME_ZONES:
+        raise ValueError("unknown time zone {}".format(zone))
+    return datetime.timedelta(hours=TIME_ZONES[zone])
+
+
+def to_datetime(value):
+    """
+    Converts a report date, such as "2017-08-12T19:40:35+00:00",
+    "2017-08-12 19:40:35 PST" or "12.08.2017 19:40:35 UTC",
+    to a naive datetime in UTC.
+    """
+    match = _datetime_match(value)
+    if match is None:
+        raise ValueError("invalid date {!r}".format(value))
+    year, month, day, day_eu, month_eu, year_eu, hour, minute, second, zone = match.groups()
+    result = datetime.datetime(int(year or year_eu), int(month or month_eu), int(day or day_eu),
+                               int(hour or 0), int(minute or 0), int(second or 0))
+    if zone:
+        result -= _parse_offset(zone)
+    return result
+
+
+def to_date(value):
+    """
+    Converts a report date, such as "2017-08-12" or "12.08.2017", to a date.
+    """
+    return to_datetime(value).date()
+
+
+def to_decimal(value):
+    """
+    Converts an amount to a Decimal, accepting a comma as decimal separator ("12,99").
+    """
+    if ',' in value and '.' not in value:
+        value = value.replace(',', '.')
+    return Decimal(value)
+
+
+def to_int(value):
+    return int(value)
+
+
+def to_bool(value):
+    """
+    Converts "true"/"false", "yes"/"no" or "y"/"n" to a bool.
+    """
+    value = value.lower()
+    if value in ('true', 'yes', 'y', '1'):
+        return True
+    if value in ('false', 'no', 'n', '0'):
+        return False
+    raise ValueError("invalid boolean {!r}".format(value))
+
+
+_ORDER_COLUMNS = {
+    'purchase_date': to_datetime,
+    'last_updated_date': to_datetime,
+    'payments_date': to_datetime,
+    'quantity': to_int,
+    'quantity_purchased': to_int,
+    'item_price': to_decimal,
+    'item_tax': to_decimal,
+    'shipping_price': to_decimal,
+    'shipping_tax': to_decimal,
+    'gift_wrap_price': to_decimal,
+    'gift_wrap_tax': to_decimal,
+    'item_promotion_discount': to_decimal,
+    'ship_promotion_discount': to_decimal,
+    'is_business_order': to_bool,
+}
+
+_SETTLEMENT_COLUMNS = {
+    'settlement_start_date': to_datetime,
+    'settlement_end_date': to_datetime,
+    'deposit_date': to_datetime,
+    'total_amount': to_decimal,
+    'amount': to_decimal,
+    'posted_date': to_date,
+    'posted_date_time': to_datetime,
+    'quantity_purchased': to_int,
+}
+
+# Column converters of the known report types, keyed by column name as normalize_header returns it.
+# Columns without a converter are left as strings.
+REPORT_TYPES = {
+    '_GET_FLAT_FILE_OPEN_LISTINGS_DATA_': {
+        'price': to_decimal,
+        'quantity': to_int,
+    },
+    '_GET_MERCHANT_LISTINGS_DATA_': {
+        'price': to_decimal,
+        'quantity': to_int,
+        'open_date': to_datetime,
+        'item_is_marketplace': to_bool,
+        'will_ship_internationally': to_bool,
+        'expedited_shipping': to_bool,
+        'pending_quantity': to_int,
+    },
+    '_GET_FLAT_FILE_ALL_ORDERS_DATA_BY_LAST_UPDATE_': _ORDER_COLUMNS,
+    '_GET_FLAT_FILE_ALL_ORDERS_DATA_BY_ORDER_DATE_': _ORDER_COLUMNS,
+    '_GET_FLAT_FILE_ACTIONABLE_ORDER_DATA_': _ORDER_COLUMNS,
+    '_GET_FLAT_FILE_ORDERS_DATA_': _ORDER_COLUMNS,
+    '_GET_AFN_INVENTORY_DATA_': {
+        'quantity_available': to_int,
+    },
+    '_GET_FBA_MYI_UNSUPPRESSED_INVENTORY_DATA_': {
+        'your_price': to_decimal,
+        'mfn_listing_exists': to_bool,
+        'mfn_fulfillable_quantity': to_int,
+        'afn_listing_exists': to_bool,
+        'afn_warehouse_quantity': to_int,
+        'afn_fulfillable_quantity': to_int,
+        'afn_unsellable_quantity': to_int,
+        'afn_reserved_quantity': to_int,
+        'afn_total_quantity': to_int,
+        'per_unit_volume': to_decimal,
+        'afn_inbound_working_quantity': to_int,
+        'afn_inbound_shipped_quantity': to_int,
+        'afn_inbound_receiving_quantity': to_int,
+    },
+    '_GET_V2_SETTLEMENT_REPORT_DATA_FLAT_FILE_': _SETTLEMENT_COLUMNS,
+    '_GET_V2_SETTLEMENT_REPORT_DATA_FLAT_FILE_V2_': _SETTLEMENT_COLUMNS,
+}
+
+_non_word = re.compile(r'\W+', re.UNICODE)
+
+
+def normalize_header(header):
+    """
+    Turns a report column header into an identifier:
+    "amazon-order-id" becomes "amazon_order_id", "Quantity Available" "quantity_available".
+    """
+    return _non_word.sub('_', header.lower()).strip('_')
+
+
+def detect_encoding(sample, charset=None, region=None):
+    """
+    Returns the codec to decode a report with, from:
+    the charset announced by the response (`charset`), a UTF-8 byte order mark
+    or non-ASCII UTF-8 content in `sample`, then the encoding used for the
+    marketplace `region` (Cp1252 everywhere but Japan, which uses Shift_JIS).
+    """
+    if charset:
+        return CHARSETS.get(charset.lower(), charset)
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    try:
+        # Not final: the sample may end in the middle of a character.
+        text = codecs.getincrementaldecoder('utf-8')().decode(sample)
+    except UnicodeDecodeError:
+        pass
+    else:
+        # Pure ASCII fits every encoding, so it tells nothing.
+        if any(ord(char) > 127 for char in text):
+            return 'utf-8'
+    return REGION_ENCODINGS.get(region, DEFAULT_ENCODING)
+
+
+def _charset(headers):
+    """
+    Returns the charset of a Content-Type header, such as "text/plain;charset=Cp1252".
+    """
+    for param in headers.get('content-type', '').split(';')[1:]:
+        key, _, value = param.partition('=')
+        if key.strip().lower() == 'charset':
+            return value.strip().strip('"')
+    return None
+
+
+class FlatFileReport(object):
+    """
+    Iterates, lazily, over the rows of a tab-delimited report.
+
+    `source` is the report content as bytes, the path of a file holding it,
+    a binary file object or an iterable of byte chunks. File objects and
+    chunk iterables can only be read once. Text is taken as a path; on
+    Python 2, a `str` is taken as a path if it names an existing file,
+    and as content otherwise.
+
+    Each row is an ObjectDict keyed by normalized column header. Values of
+    columns known for `report_type` (see REPORT_TYPES), or given in
+    `converters`, are converted; empty values become None.
+    Other values are kept as strings.
+
+    The encoding is detected with `detect_encoding` unless given.
+    """
+    # Size, in bytes, of the chunks read from the source.
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, source, report_type=None, encoding=None, region=None,
+                 converters=None, errors='strict'):
+        self.source = source
+        self.report_type = report_type
+        self.encoding = encoding
+        self.region = region
+        self.errors = errors
+        self.converters = dict(REPORT_TYPES.get(report_type, {}))
+        self.converters.update(converters or {})
+        self.headers = None
+        self.columns = None
+        self.charset = None
+
+    @classmethod
+    def from_response(cls, response, report_type=None, **kwargs):
+        """
+        Parses the report returned by `Reports.get_report`, read from memory
+        or from the `stream_to` file it was downloaded to.
+        The charset announced by Amazon is used unless an encoding is given.
+        """
+        source = response.parsed
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        report = cls(source, report_type, **kwargs)
+        if response.response is not None:
+            report.charset = _charset(response.response.headers)
+        return report
+
+    def _chunks(self):
+        if hasattr(self.source, 'read'):
+            for chunk in iter(partial(self.source.read, self.CHUNK_SIZE), b''):
+                yield chunk
+        elif is_path(self.source) or isinstance(self.source, text_type):
+            with open(self.source, 'rb') as report:
+                for chunk in iter(partial(report.read, self.CHUNK_SIZE), b''):
+                    yield chunk
+        elif isinstance(self.source, bytes):
+            for start in range(0, len(self.source), self.CHUNK_SIZE):
+                yield self.source[start:start + self.CHUNK_SIZE]
+        else:
+            for chunk in self.source:
+                yield chunk
+
+    def _lines(self):
+        """
+        Yields the decoded lines of the report, without line endings.
+        """
+        decoder = None
+        pending = ''
+        for chunk in self._chunks():
+            if decoder is None:
+                if self.encoding is None:
+                    self.encoding = detect_encoding(chunk, self.charset, self.region)
+                decoder = codecs.getincrementaldecoder(self.encoding)(self.errors)
+            lines = (pending + decoder.decode(chunk)).split('\n')
+            pending = lines.pop()
+            for line in lines:
+                yield line.rstrip('\r')
+        if decoder is not None:
+            pending += decoder.decode(b'', True)
+        if pending.rstrip('\r'):
+            yield pending.rstrip('\r')
+
+    def __iter__(self):
+        lines = self._lines()
+        for line in lines:
+            if line.strip():
+                self.headers = line.lstrip(u'\ufeff').split('\t')
+                break
+        else:
+            return
+        self.columns = [normalize_header(header) for header in self.headers]
+        width = len(self.columns)
+        converters = [
+            (index, column, self.converters[column])
+            for index, column in enumerate(self.columns)
+            if column in self.converters
+        ]
+        for line_number, line in enumerate(lines, 2):
+            if not line:
+                continue
+            values = line.split('\t')
+            if len(values) < width:
+                values.extend([''] * (width - len(values)))
+            for index, column, converter in converters:
+                values[index] = self._convert(converter, values[index], line_number, column)
+            yield ObjectDict(zip(self.columns, values))
+
+    @staticmethod
+    def _convert(converter, value, line_number, column):
+        if not value:
+            return None
+        try:
+            return converter(value)
+        except (ValueError, InvalidOperation) as exc:
+            raise MWSError("Line {}, column {}: cannot convert {!r} ({})".format(
+                line_number, column, value, exc))
+
+    def batches(self, size=10000):
+        """
+        Yields the rows in columnar batches of up to `size` rows:
+        ObjectDicts mapping each column to the list of its values,
+        ready to be written to a columnar store or data frame.
+        """
+        batch = None
+        count = 0
+        for row in self:
+            if batch is None:
+                batch = ObjectDict((column, []) for column in self.columns)
+            for column, value in row.items():
+                batch[column].append(value)
+            count += 1
+            if count == size:
+                yield batch
+                batch, count = None, 0
+        if batch is not None:
+            yield batch
@@ -1,18 +1,26 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import
 
+from collections import deque
 from time import gmtime, strftime
 import base64
+import copy
 import datetime
 import hashlib
 import hmac
+import os
 import re
+import tempfile
+import time
 import warnings
 
-from requests import request
-from requests.exceptions import HTTPError
+from requests.exceptions import ConnectionError as NetworkError, HTTPError, Timeout
+from requests.structures import CaseInsensitiveDict
 
 from . import utils
+from .retry import RetryPolicy, parse_timestamp
+from .throttle import Throttle
+from .transport import Transport
 
 try:
     from urllib.parse import quote
@@ -29,6 +37,8 @@ __all__ = [
     'Inventory',
     'InboundShipments',
     'MWSError',
+    'PreparedRequest',
+    'Signer',
     'Reports',
     'Orders',
     'Products',
@@ -36,6 +46,9 @@ __all__ = [
     'Sellers',
     'Finances',
     'MerchantFulfillment',
+    'RetryPolicy',
+    'Throttle',
+    'Transport',
 ]
 
 # See https://images-na.ssl-images-amazon.com/images/G/01/mwsportal/doc/en_US/bde/MWSDeveloperGuide._V357736853_.pdf
@@ -76,11 +89,20 @@ def calc_md5(string):
 
 
 def calc_request_description(params):
-    request_description = ''
-    for key in sorted(params):
-        encoded_value = quote(params[key], safe='-_.~')
-        request_description += '&{}={}'.format(key, encoded_value)
-    return request_description[1:]  # don't include leading ampersand
+    return '&'.join(
+        key + '=' + quote(params[key], safe='-_.~')
+        for key in sorted(params)
+    )
+
+
+def _looks_like_xml(data):
+    """
+    Returns True if data (bytes or text) starts like an XML document,
+    without copying it.
+    """
+    if isinstance(data, bytes):
+        return re.match(br'(\xef\xbb\xbf)?\s*<', data) is not None
+    return re.match(r'\ufeff?\s*<', data) is not None
 
 
 def remove_empty(dict_):
@@ -99,19 +121,52 @@ def remove_namespace(xml):
     return regex.sub('', xml)
 
 
+# Marks a DictWrapper not parsed yet.
+_UNPARSED = object()
+
+
 class DictWrapper(object):
-    def __init__(self, xml, rootkey=None):
-        self.original = xml
+    """
+    Wrapper of an XML response, parsed the first time `parsed` is read:
+    callers only after `original` or `response` never pay for the parse.
+    A body that turns out not to be XML is then served as DataWrapper
+    serves it, once its Content-MD5 `headers` is checked.
+    """
+    def __init__(self, xml, rootkey=None, compact=False, headers=None):
+        self._data = xml
+        self._original = xml
         self.response = None
         self._rootkey = rootkey
-        self._mydict = utils.XML2Dict().fromstring(remove_namespace(xml))
-        self._response_dict = self._mydict.get(list(self._mydict.keys())[0], self._mydict)
+        self._compact = compact
+        self._headers = headers or {}
+        self._is_xml = True
+        self._mydict = None
+        self._parsed = _UNPARSED
+
+    @property
+    def original(self):
+        """
+        The XML document, as text; the body as is if it is not XML.
+        """
+        if isinstance(self._original, bytes) and bytes is not str and self._is_xml:
+            # Parsed straight from the response bytes: MWS sends UTF-8.
+            self._original = self._original.decode('utf-8')
+        return self._original
 
     @property
     def parsed(self):
-        if self._rootkey:
-            return self._response_dict.get(self._rootkey)
-        return self._response_dict
+        if self._parsed is _UNPARSED:
+            try:
+                self._mydict = utils.parse_xml(self._original, self._compact)
+            except XMLError:
+                # Not XML after all: served by a DataWrapper, which raises MWSError for a corrupted body.
+                fallback = DataWrapper(self._data, self._headers)
+                self._is_xml = False
+                self._original = self._parsed = fallback.parsed
+                return self._parsed
+            response_dict = self._mydict.get(list(self._mydict.keys())[0], self._mydict)
+            self._parsed = response_dict.get(self._rootkey) if self._rootkey else response_dict
+        return self._parsed
 
 
 class DataWrapper(object):
@@ -131,6 +186,284 @@ class DataWrapper(object):
         return self.original
 
 
+class StreamWriter(object):
+    """
+    Writes a response body, chunk by chunk, to a file path or a writable
+    file object, computing its MD5 hash along the way.
+
+    A path is only written once the body is complete and verified: chunks go
+    to a temporary file next to it, moved to the path by `commit`. `discard`
+    drops what was written instead: the temporary file is removed, and a file
+    object is truncated back to where writing started, if it can seek.
+    Leaving a `with` block on an exception discards.
+    """
+    def __init__(self, sink):
+        self.sink = sink
+        self.size = 0
+        self._md5 = hashlib.md5()
+        if hasattr(sink, 'write'):
+            self._file = sink
+            self._owns_file = False
+            try:
+                self._start = sink.tell()
+            except (AttributeError, IOError, OSError):
+                self._start = None
+        else:
+            directory, name = os.path.split(os.path.abspath(sink))
+            self._file = tempfile.NamedTemporaryFile(prefix=name + '.', suffix='.part', dir=directory,
+                                                     delete=False)
+            self._owns_file = True
+
+    @property
+    def content_md5(self):
+        """
+        Base64-encoded MD5 of everything written so far, as calc_md5 returns it.
+        """
+        return base64.b64encode(self._md5.digest()).strip(b'\n')
+
+    def write(self, chunk):
+        self._md5.update(chunk)
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def close(self):
+        """
+        Closes the file if it was opened from a path; file objects are left open.
+        """
+        if self._owns_file:
+            self._file.close()
+
+    def commit(self):
+        """
+        Moves the body written to its path. Does nothing for file objects.
+        """
+        if self._owns_file:
+            self._file.close()
+            utils.replace_file(self._file.name, self.sink)
+
+    def discard(self):
+        """
+        Drops the body written so far.
+        """
+        if self._owns_file:
+            self._file.close()
+            if os.path.exists(self._file.name):
+                os.remove(self._file.name)
+        elif self._start is not None:
+            self._file.seek(self._start)
+            self._file.truncate()
+        self.size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is not None:
+            self.discard()
+        else:
+            self.close()
+
+
+class StreamWrapper(object):
+    """
+    Wrapper of a response body streamed to a file by a StreamWriter,
+    in charge of validating the hash sent by Amazon: the body is committed
+    to its sink if it matches, and discarded otherwise.
+    """
+    def __init__(self, writer, header):
+        self.original = None
+        self.response = None
+        self.sink = writer.sink
+        self.size = writer.size
+        self.content_md5 = writer.content_md5
+        if 'content-md5' in header and header['content-md5'].encode() != self.content_md5:
+            writer.discard()
+            raise MWSError("Content-MD5 mismatch: expected {}, got {} for {} bytes received".format(
+                header['content-md5'], self.content_md5.decode(), self.size))
+        writer.commit()
+
+    @property
+    def parsed(self):
+        return self.sink
+
+
+class FeedBody(object):
+    """
+    Request body read, chunk by chunk, from a file path, a readable binary
+    file object or an iterable of bytes chunks, so that feeds are uploaded
+    without ever being held in memory whole.
+
+    Its size and Content-MD5 are computed up front, in a first pass over the
+    feed. Every iteration reads the feed again from the start, so the body can
+    be sent again when a request is retried: paths are reopened, file objects
+    are rewound, and chunks that can only be read once (iterables, pipes) are
+    spooled to a temporary file during the first pass.
+    """
+    # Size, in bytes, of the chunks in which feeds are read.
+    CHUNK_SIZE = 64 * 1024
+    # Size, in bytes, above which spooled feeds are written to disk.
+    SPOOL_SIZE = 1024 * 1024
+
+    def __init__(self, feed, chunk_size=CHUNK_SIZE):
+        self.feed = feed
+        self.chunk_size = chunk_size
+        self._path = None
+        self._file = None
+        self._start = 0
+        if not hasattr(feed, 'read'):
+            if utils.is_path(feed):
+                self._path = feed
+                feed = None
+            elif isinstance(feed, (bytes, bytearray, utils.text_type)):
+                raise MWSError("FeedBody takes a path, a file object or an iterable: send content as it is.")
+            else:
+                feed = self._spool(feed)
+        elif not self._seekable(feed):
+            feed = self._spool(iter(lambda: feed.read(self.chunk_size), b''))
+        if feed is not None:
+            self._file = feed
+            self._start = feed.tell()
+
+        md5_hash = hashlib.md5()
+        self.size = 0
+        for chunk in self:
+            md5_hash.update(chunk)
+            self.size += len(chunk)
+        self.content_md5 = base64.b64encode(md5_hash.digest()).strip(b'\n')
+
+    @staticmethod
+    def _seekable(file_):
+        if hasattr(file_, 'seekable'):
+            return file_.seekable()
+        try:
+            file_.seek(file_.tell())
+        except (AttributeError, IOError, OSError):
+            return False
+        return True
+
+    def _spool(self, chunks):
+        """
+        Copies chunks to a temporary file, deleted once the body is garbage collected.
+        """
+        spool = tempfile.SpooledTemporaryFile(max_size=self.SPOOL_SIZE)
+        for chunk in chunks:
+            spool.write(chunk)
+        spool.seek(0)
+        return spool
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        if self._path is not None:
+            with open(self._path, 'rb') as file_:
+                for chunk in iter(lambda: file_.read(self.chunk_size), b''):
+                    yield chunk
+            return
+        self._file.seek(self._start)
+        for chunk in iter(lambda: self._file.read(self.chunk_size), b''):
+            yield chunk
+
+
+# Matches strings made only of characters `quote(value, safe='-_.~')` leaves as they are.
+_is_unreserved = re.compile(r'[A-Za-z0-9_.~-]*\Z').match
+
+
+def _quote_value(value):
+    """
+    Quotes a parameter value for the canonical query string,
+    skipping the (slower) quoting for the common already-safe values.
+    """
+    if isinstance(value, str) and _is_unreserved(value):
+        return value
+    return quote(value, safe='-_.~')
+
+
+class Signer(object):
+    """
+    Computes MWS request signatures (Signature Version 2, HmacSHA256)
+    for one set of credentials and one endpoint.
+
+    The keyed HMAC state, the host and URI part of the signed string and
+    the quoted parameters sent with every request are computed once, so
+    signing a request only quotes and hashes that request's own data.
+    """
+    def __init__(self, secret_key, domain, uri, constant_params):
+        self._hmac = hmac.new(secret_key.encode(), digestmod=hashlib.sha256)
+        self._sig_suffix = '\n{}\n{}\n'.format(domain.replace('https://', '').lower(), uri)
+        self._constant_pairs = [
+            (key, key + '=' + _quote_value(value))
+            for key, value in constant_params.items()
+        ]
+
+    def request_description(self, params):
+        """
+        Returns the canonical (sorted, quoted) query string
+        of the constant params plus `params`.
+        """
+        pairs = [pair for pair in self._constant_pairs if pair[0] not in params]
+        pairs.extend(
+            (key, key + '=' + _quote_value(value))
+            for key, value in params.items()
+        )
+        pairs.sort()
+        return '&'.join([pair for _, pair in pairs])
+
+    def sign(self, method, request_description):
+        """
+        Returns the base64-encoded signature of a request.
+        """
+        digest = self._hmac.copy()
+        digest.update((method + self._sig_suffix + request_description).encode())
+        return base64.b64encode(digest.digest())
+
+
+class PreparedRequest(object):
+    """
+    A signed request to Amazon MWS API, ready to be sent.
+
+    Built by `MWS.prepare_request` (or `MWS.prepare` for an API method) and
+    sent by `MWS.send_request`, so that requests can be built up front and
+    handed to another executor, batched or replayed.
+    """
+    # MWS rejects requests whose Timestamp is more than 15 minutes old:
+    # requests signed longer ago than this (in seconds) are signed again when sent.
+    MAX_AGE = 10 * 60
+
+    def __init__(self, params, method="GET", domain='', uri='/', body='', headers=None, rootkey=None,
+                 stream_to=None):
+        # Request parameters, without the ones added by signing.
+        self.params = params
+        self.method = method
+        self.domain = domain
+        self.uri = uri
+        self.body = body
+        self.headers = headers or {}
+        self.rootkey = rootkey
+        # File path or writable file object to stream the response body to, if any.
+        self.stream_to = stream_to
+        # Signed query string, and time it was signed at.
+        self.query = None
+        self.signed_at = None
+
+    def __repr__(self):
+        return '<PreparedRequest {} {}>'.format(self.method, self.action)
+
+    @property
+    def action(self):
+        return self.params.get('Action')
+
+    @property
+    def url(self):
+        return "{domain}{uri}?{query}".format(domain=self.domain, uri=self.uri, query=self.query)
+
+    def is_stale(self):
+        """
+        Returns True if the request is unsigned or its signature is about to expire.
+        """
+        return self.signed_at is None or time.time() - self.signed_at > self.MAX_AGE
+
+
 class MWS(object):
     """
     Base Amazon API class
@@ -155,6 +488,11 @@ class MWS(object):
     # will raise an error.
     NEXT_TOKEN_OPERATIONS = []
 
+    # Dotted path, relative to the '...Result' element, to the individual
+    # records returned by each of the NEXT_TOKEN_OPERATIONS.
+    # Used by self.iter_records; '*' matches any child element.
+    RECORD_PATHS = {}
+
     # Some APIs are available only to either a "Merchant" or "Seller"
     # the type of account needs to be sent in every call to the amazon MWS.
     # This constant defines the exact name of the parameter Amazon expects
@@ -165,15 +503,53 @@ class MWS(object):
     # Which is the name of the parameter for that specific account type.
     ACCOUNT_TYPE = "SellerId"
 
+    # Size, in bytes, of the chunks in which response bodies are streamed to a file.
+    STREAM_CHUNK_SIZE = 64 * 1024
+
+    # Default number of requests bulk methods run at once.
+    BULK_MAX_WORKERS = 4
+
+    # NEXT_TOKEN_OPERATIONS whose results `backfill` can split by date:
+    # (keyword argument of the start date, of the end date,
+    #  date field of the records, field identifying a record or None).
+    BACKFILL_PARAMS = {}
+
+    # `backfill` windows are split in halves down to this width.
+    BACKFILL_MIN_WINDOW = datetime.timedelta(hours=1)
+
+    # Latest end date Amazon accepts, before now, for date range filters.
+    DATE_FILTER_LAG = datetime.timedelta(minutes=2)
+
     def __init__(self, access_key, secret_key, account_id,
                  region='US', domain='', uri="",
-                 version="", auth_token=""):
+                 version="", auth_token="", transport=None, throttle=None,
+                 retry=None, compact=False, raw=False, cache=None):
         self.access_key = access_key
         self.secret_key = secret_key
         self.account_id = account_id
         self.auth_token = auth_token
         self.version = version or self.VERSION
         self.uri = uri or self.URI
+        # Pooled HTTP session; pass the same Transport to several API
+        # instances to have them share connections.
+        self.transport = transport or Transport()
+        # Optional Throttle delaying requests to stay within MWS quotas;
+        # share it between API instances using the same seller account.
+        self.throttle = throttle
+        # Optional RetryPolicy for throttled and server-side errors.
+        self.retry = retry
+        # Parse responses to compact `__slots__` nodes rather than ObjectDicts,
+        # see utils.CompactNode.
+        self.compact = compact
+        # Return every response body as is, in a DataWrapper, without parsing it
+        # (`paginate` then stops after the first page, as it cannot read next tokens).
+        self.raw = raw
+        # Optional response cache (see mws.cache) answering repeated read-only
+        # requests without sending them.
+        self.cache = cache
+        # Cached Signer, see self.signer
+        self._signer = None
+        self._signer_key = None
 
         if domain:
             self.domain = domain
@@ -190,11 +566,18 @@ class MWS(object):
         """
         Get the parameters required in all MWS requests
         """
+        params = self._get_constant_params()
+        params['Timestamp'] = self.get_timestamp()
+        return params
+
+    def _get_constant_params(self):
+        """
+        Get the parameters required in all MWS requests which do not change between requests
+        """
         params = {
             'AWSAccessKeyId': self.access_key,
             self.ACCOUNT_TYPE: self.account_id,
             'SignatureVersion': '2',
-            'Timestamp': self.get_timestamp(),
             'Version': self.version,
             'SignatureMethod': 'HmacSHA256',
         }
@@ -202,11 +585,137 @@ class MWS(object):
             params['MWSAuthToken'] = self.auth_token
         return params
 
+    @property
+    def signer(self):
+        """
+        Signer for the current credentials and endpoint,
+        built again only when one of them changes.
+        """
+        signer_key = (self.access_key, self.secret_key, self.account_id,
+                      self.auth_token, self.version, self.domain, self.uri)
+        if self._signer is None or self._signer_key != signer_key:
+            self._signer = Signer(self.secret_key, self.domain, self.uri, self._get_constant_params())
+            self._signer_key = signer_key
+        return self._signer
+
     def make_request(self, extra_data, method="GET", **kwargs):
         """
         Make request to Amazon MWS API with these parameters
         """
+        return self.send_request(self.prepare_request(extra_data, method, **kwargs))
+
+    def prepare_request(self, extra_data, method="GET", **kwargs):
+        """
+        Builds and signs a request to Amazon MWS API with these parameters,
+        without sending it. Takes the same arguments as `make_request`.
+        Returns a PreparedRequest, to be sent with `send_request`.
+        """
+        extra_data = self._clean_extra_data(extra_data)
+        prepared = PreparedRequest(
+            extra_data,
+            method=method,
+            domain=self.domain,
+            uri=self.uri,
+            body=kwargs.get('body', ''),
+            headers=self._get_headers(kwargs.get('extra_headers')),
+            rootkey=kwargs.get('rootkey', extra_data.get("Action") + "Result"),
+            stream_to=kwargs.get('stream_to'),
+        )
+        return self.sign_request(prepared)
+
+    def prepare(self, method, *args, **kwargs):
+        """
+        Returns the PreparedRequest an API method would send, without sending it.
+        `method` is the bound method (or its name); all other args and kwargs
+        are passed to it.
 
+        Example:
+            prepared = orders_api.prepare(orders_api.list_orders, created_after=...)
+            response = orders_api.send_request(prepared)
+        """
+        name = getattr(method, '__name__', method)
+        # API methods end with `return self.make_request(...)`:
+        # run the method on a copy of this instance that only prepares requests.
+        preparer = copy.copy(self)
+        preparer.make_request = preparer.prepare_request
+        return getattr(preparer, name)(*args, **kwargs)
+
+    def sign_request(self, prepared):
+        """
+        Signs a PreparedRequest with a fresh Timestamp, updating its query.
+        Returns the PreparedRequest.
+        """
+        params = dict(prepared.params)
+        params.setdefault('Timestamp', self.get_timestamp())
+        signer = self.signer
+        request_description = signer.request_description(params)
+        signature = signer.sign(prepared.method, request_description)
+        prepared.query = "{description}&Signature={signature}".format(
+            description=request_description,
+            signature=quote(signature),
+        )
+        prepared.signed_at = time.time()
+        return prepared
+
+    def send_request(self, prepared):
+        """
+        Sends a PreparedRequest, retrying it according to self.retry,
+        and returns the wrapped response.
+        The request is signed again if its signature is about to expire.
+        """
+        parsed_response = self._cached_response(prepared)
+        if parsed_response is not None:
+            return parsed_response
+
+        response, retries, backoff_time = self._send(prepared)
+
+        if prepared.stream_to is not None:
+            # Write the body to its sink as it arrives, never holding all of it in memory.
+            try:
+                with StreamWriter(prepared.stream_to) as writer:
+                    for chunk in response.iter_content(self.STREAM_CHUNK_SIZE):
+                        writer.write(chunk)
+            finally:
+                response.close()
+            parsed_response = StreamWrapper(writer, response.headers)
+        else:
+            # When retrieving data from the response object,
+            # be aware that response.content returns the content in bytes while response.text calls
+            # response.content and converts it to unicode.
+            parsed_response = self._wrap_response(response.content, response.headers, prepared.rootkey)
+            if self.cache is not None:
+                self.cache.set(prepared, response.content, response.headers)
+
+        # Store the response object in the parsed_response for quick access
+        parsed_response.response = response
+        # Number of retries made by self.retry, and total seconds spent waiting between them.
+        parsed_response.retries = retries
+        parsed_response.backoff_time = backoff_time
+        parsed_response.cached = False
+        return parsed_response
+
+    def _cached_response(self, prepared):
+        """
+        Returns the wrapped response self.cache holds for a PreparedRequest, or None.
+        Cached responses have no `response` object.
+        """
+        if self.cache is None:
+            return None
+        cached = self.cache.get(prepared)
+        if cached is None:
+            return None
+        data, headers = cached
+        parsed_response = self._wrap_response(data, CaseInsensitiveDict(headers), prepared.rootkey)
+        parsed_response.response = None
+        parsed_response.retries = 0
+        parsed_response.backoff_time = 0.0
+        parsed_response.cached = True
+        return parsed_response
+
+    def _clean_extra_data(self, extra_data):
+        """
+        Returns the request parameters in the form MWS accepts them.
+        """
         # Remove all keys with an empty value because
         # Amazon's MWS does not allow such a thing.
         extra_data = remove_empty(extra_data)
@@ -215,53 +724,92 @@ class MWS(object):
         for key, value in extra_data.items():
             if isinstance(value, (datetime.datetime, datetime.date)):
                 extra_data[key] = value.isoformat()
+        return extra_data
 
-        params = self.get_params()
-        params.update(extra_data)
-        request_description = calc_request_description(params)
-        signature = self.calc_signature(method, request_description)
-        url = "{domain}{uri}?{description}&Signature={signature}".format(
-            domain=self.domain,
-            uri=self.uri,
-            description=request_description,
-            signature=quote(signature),
-        )
+    def _get_headers(self, extra_headers=None):
+        """
+        Returns the HTTP headers sent with every request, plus `extra_headers`.
+        """
         headers = {'User-Agent': 'python-amazon-mws/0.8.0 (Language=Python)'}
-        headers.update(kwargs.get('extra_headers', {}))
+        headers.update(extra_headers or {})
+        return headers
 
-        try:
-            # Some might wonder as to why i don't pass the params dict as the params argument to request.
-            # My answer is, here i have to get the url parsed string of params in order to sign it, so
-            # if i pass the params dict as params to request, request will repeat that step because it will need
-            # to convert the dict to a url parsed string, so why do it twice if i can just pass the full url :).
-            response = request(method, url, data=kwargs.get('body', ''), headers=headers)
-            response.raise_for_status()
-            # When retrieving data from the response object,
-            # be aware that response.content returns the content in bytes while response.text calls
-            # response.content and converts it to unicode.
-
-            data = response.content
-            # I do not check the headers to decide which content structure to server simply because sometimes
-            # Amazon's MWS API returns XML error responses with "text/plain" as the Content-Type.
-            rootkey = kwargs.get('rootkey', extra_data.get("Action") + "Result")
-            try:
-                try:
-                    parsed_response = DictWrapper(data, rootkey)
-                except TypeError:  # raised when using Python 3 and trying to remove_namespace()
-                    # When we got CSV as result, we will got error on this
-                    parsed_response = DictWrapper(response.text, rootkey)
+    def _wrap_response(self, data, headers, rootkey):
+        """
+        Wraps the body of a successful response: DictWrapper for XML,
+        DataWrapper for anything else (flat files, PDFs...).
+        """
+        # I do not check the headers to decide which content structure to server simply because sometimes
+        # Amazon's MWS API returns XML error responses with "text/plain" as the Content-Type.
+        if self.raw or not _looks_like_xml(data):
+            # Do not try to XML-parse (possibly huge) flat file reports.
+            return DataWrapper(data, headers)
+        return DictWrapper(data, rootkey, self.compact, headers)
 
-            except XMLError:
-                parsed_response = DataWrapper(data, response.headers)
+    def _send(self, prepared, stream=False):
+        """
+        Sends a PreparedRequest, retrying it according to self.retry.
+        Returns the successful response, the number of retries made
+        and the total seconds spent waiting between them.
+        With `stream`, the body of the successful response is left unread.
+        Raises MWSError for an error response that is not retried, and the
+        `requests` exception of a network error that is not retried.
+        """
+        retries = 0
+        backoff_time = 0.0
+        while True:
+            if self.throttle is not None:
+                self.throttle.wait(self.account_id, prepared.action)
 
-        except HTTPError as e:
-            error = MWSError(str(e.response.text))
-            error.response = e.response
-            raise error
+            # Retries are signed again,
+            # as the Timestamp must stay close to the time the request is sent.
+            if retries or prepared.is_stale():
+                self.sign_request(prepared)
 
-        # Store the response object in the parsed_response for quick access
-        parsed_response.response = response
-        return parsed_response
+            try:
+                # Some might wonder as to why i don't pass the params dict as the params argument to request.
+                # My answer is, here i have to get the url parsed string of params in order to sign it, so
+                # if i pass the params dict as params to request, request will repeat that step because it will
+                # need to convert the dict to a url parsed string, so why do it twice if i can just pass the full
+                # url :).
+                response = self.transport.request(prepared.method, prepared.url,
+                                                  data=prepared.body, headers=prepared.headers,
+                                                  stream=stream or prepared.stream_to is not None)
+                response.raise_for_status()
+                return response, retries, backoff_time
+            except HTTPError as e:
+                delay = self._retry_delay(retries, e.response)
+                if delay is None:
+                    raise self._make_error(e.response.text, e.response, retries, backoff_time)
+            except (NetworkError, Timeout):
+                delay = self._retry_delay(retries)
+                if delay is None:
+                    raise
+            self.retry.sleep(delay)
+            retries += 1
+            backoff_time += delay
+
+    def _retry_delay(self, retries, response=None):
+        """
+        Returns the seconds to wait before retrying a request that failed
+        with an error response or, without one, a network error;
+        None if it should not be retried.
+        """
+        if self.retry is None:
+            return None
+        if response is None:
+            return self.retry.get_delay(retries)
+        return self.retry.get_delay(retries, response.status_code, response.content, response.headers)
+
+    def _make_error(self, text, response, retries, backoff_time):
+        """
+        Returns the MWSError raised for an error response.
+        """
+        error = MWSError(str(text))
+        error.response = response
+        error.retries = retries
+        error.backoff_time = backoff_time
+        return error
 
     def get_service_status(self):
         """
@@ -292,6 +840,241 @@ class MWS(object):
         )
         return self.make_request(data, method="POST")
 
+    def paginate(self, method, *args, **kwargs):
+        """
+        Generator yielding every page of results for a request method that
+        supports next tokens, such as `Orders.list_orders`.
+
+        `method` is the bound method (or its name); all other args and kwargs
+        are passed to it for the first page. Following pages are requested,
+        one at a time, with the NextToken of the previous page, so only one
+        page is held in memory at once.
+
+        Example:
+            for page in orders_api.paginate(orders_api.list_orders, created_after=...):
+                ...
+        """
+        if not callable(method):
+            method = getattr(self, method)
+        if getattr(method, 'next_token_action_name', None) is None:
+            raise MWSError((
+                "{} does not support next tokens. "
+                "Please refer to documentation."
+            ).format(getattr(method, '__name__', method)))
+
+        response = method(*args, **kwargs)
+        while True:
+            yield response
+            next_token = self._get_next_token(response)
+            if next_token is None:
+                return
+            response = method(next_token=next_token)
+
+    def iter_records(self, method, *args, **kwargs):
+        """
+        Generator yielding the individual records (orders, order items,
+        inventory supply members...) across every page of a request method,
+        as described by RECORD_PATHS.
+
+        Takes the same arguments as `paginate`.
+        """
+        method, record_path = self._get_record_path(method)
+        for page in self.paginate(method, *args, **kwargs):
+            for record in utils.iterate_path(page.parsed, record_path):
+                yield record
+
+    def stream_records(self, method, *args, **kwargs):
+        """
+        Generator yielding the same records as `iter_records`, each one
+        as soon as it is received: pages are parsed while they download,
+        and records are not kept in a page tree, so memory use is bounded
+        by a single record rather than a whole page.
+        Next tokens are followed, so one loop covers every page.
+
+        Takes the same arguments as `paginate`.
+
+        Example:
+            for order in orders_api.stream_records(orders_api.list_orders, created_after=...):
+                ...
+        """
+        method, record_path = self._get_record_path(method)
+        prepared = self.prepare(method, *args, **kwargs)
+        while True:
+            path = [None] + ([prepared.rootkey] if prepared.rootkey else []) + record_path.split('.')
+            builder = utils.RecordBuilder(path, self.compact)
+            response = self._send(prepared, stream=True)[0]
+            try:
+                for record in builder.iterparse(response.iter_content(self.STREAM_CHUNK_SIZE)):
+                    yield record
+            finally:
+                response.close()
+
+            parsed = list(builder.root.values())[0]
+            next_token = self._parsed_next_token(parsed.get(prepared.rootkey) if prepared.rootkey else parsed)
+            if next_token is None:
+                return
+            prepared = self.prepare(method, next_token=next_token)
+
+    def backfill(self, method, start, end=None, partitions=None, max_workers=None, by=None, **kwargs):
+        """
+        Generator yielding the records of a request method filtered by date,
+        such as `Orders.list_orders` or `Finances.list_financial_events`
+        (see BACKFILL_PARAMS), from `start` to `end`, naive UTC datetimes.
+        `end` defaults to the latest date Amazon accepts, two minutes ago.
+
+        Rather than following one chain of next tokens, the range is split
+        into `partitions` windows (twice `max_workers` by default), paged by
+        `max_workers` threads at once. When the first page of a window has a
+        next token, its records are kept and the rest of the window, after
+        the date of its last record, is split in halves, down to
+        BACKFILL_MIN_WINDOW, so busy periods get narrower windows than quiet
+        ones; narrower windows, and pages not in date order, are paged with
+        next tokens instead. Records are yielded
+        a window at a time, as windows complete: records at the shared bound
+        of two windows, which Amazon returns in both, are yielded once.
+        Give the instance a Throttle to keep within the operation quotas.
+
+        `by` replaces the BACKFILL_PARAMS of the method, e.g. to list
+        orders by last update: ('lastupdatedafter', 'lastupdatedbefore', 'LastUpdateDate', 'AmazonOrderId').
+        Other keyword arguments are passed to `method` for every window.
+
+        Example:
+            for order in orders_api.backfill(orders_api.list_orders, datetime.datetime(2017, 1, 1),
+                                              marketplaceids=[...], max_workers=4):
+                ...
+        """
+        method, record_path, params, windows = self._prepare_backfill(method, start, end, partitions, max_workers, by)
+
+        def page(window):
+            """
+            Returns the window the records listed cover, the records,
+            and the windows left to list.
+            """
+            response = method(**self._window_kwargs(window, params, kwargs))
+            records = list(utils.iterate_path(response.parsed, record_path))
+            next_token = self._get_next_token(response)
+            if next_token is not None:
+                last = self._last_date(records, params)
+                if last is not None and window[0] < last and self._can_split((last, window[1])):
+                    return (window[0], last), records, self._split_window((last, window[1]))
+            while next_token is not None:
+                response = method(next_token=next_token)
+                records.extend(utils.iterate_path(response.parsed, record_path))
+                next_token = self._get_next_token(response)
+            return window, records, []
+
+        def queued():
+            while windows:
+                yield windows.popleft()
+
+        seen = {}
+        # Windows split while others are paged are queued behind them.
+        while windows:
+            for _, (window, records, rest) in utils.concurrent_map(
+                    page, queued(), max_workers or self.BULK_MAX_WORKERS, ordered=False):
+                windows.extend(rest)
+                for record in self._window_records(records, window, params, seen):
+                    yield record
+
+    def _prepare_backfill(self, method, start, end, partitions, max_workers, by):
+        """
+        Returns the bound method, record path and BACKFILL_PARAMS of a `backfill`,
+        and a deque of its initial (start, end) windows.
+        """
+        method, record_path = self._get_record_path(method)
+        params = by or self.BACKFILL_PARAMS.get(method.next_token_action_name)
+        if params is None:
+            raise MWSError("{} cannot be split by date. Please refer to documentation.".format(method.__name__))
+        if end is None:
+            end = datetime.datetime.utcnow() - self.DATE_FILTER_LAG
+        start, end = start.replace(microsecond=0), end.replace(microsecond=0)
+        partitions = partitions or 2 * (max_workers or self.BULK_MAX_WORKERS)
+        width = max((end - start) // partitions, self.BACKFILL_MIN_WINDOW)
+        windows = deque()
+        while start < end:
+            windows.append((start, min(start + width, end)))
+            start += width
+        return method, record_path, params, windows
+
+    @staticmethod
+    def _window_kwargs(window, params, kwargs):
+        """
+        Returns the request method kwargs listing the records of a window.
+        """
+        window_kwargs = dict(kwargs)
+        window_kwargs[params[0]] = window[0].strftime('%Y-%m-%dT%H:%M:%SZ')
+        window_kwargs[params[1]] = window[1].strftime('%Y-%m-%dT%H:%M:%SZ')
+        return window_kwargs
+
+    def _can_split(self, window):
+        return window[1] - window[0] >= 2 * self.BACKFILL_MIN_WINDOW
+
+    @staticmethod
+    def _last_date(records, params):
+        """
+        Returns the date of the last of a page of records,
+        or None unless they are in date order.
+        """
+        dates = [parse_timestamp(record.getvalue(params[2])) for record in records]
+        if not dates or None in dates or dates != sorted(dates):
+            return None
+        return dates[-1]
+
+    @staticmethod
+    def _split_window(window):
+        start, end = window
+        middle = (start + (end - start) // 2).replace(microsecond=0)
+        return [(start, middle), (middle, end)]
+
+    @staticmethod
+    def _window_records(records, window, params, seen):
+        """
+        Yields the records of a window, except those at its bounds already
+        yielded for another window. `seen` maps the key of every record
+        met at a bound to its window.
+        """
+        date_field, key_field = params[2], params[3]
+        for record in records:
+            date = parse_timestamp(record.getvalue(date_field))
+            if date is None or date <= window[0] or date >= window[1]:
+                key = record.getvalue(key_field) if key_field else repr(record)
+                if seen.setdefault(key, window) != window:
+                    continue
+            yield record
+
+    def _get_record_path(self, method):
+        """
+        Returns the bound request method and the path of its records in RECORD_PATHS.
+        """
+        if not callable(method):
+            method = getattr(self, method)
+        action = getattr(method, 'next_token_action_name', None)
+        if action not in self.RECORD_PATHS:
+            raise MWSError((
+                "No record path known for {}. "
+                "Use `paginate` to iterate over pages instead."
+            ).format(getattr(method, '__name__', method)))
+        return method, self.RECORD_PATHS[action]
+
+    def _get_next_token(self, response):
+        """
+        Returns the NextToken of a parsed response,
+        or None if there are no more pages.
+        """
+        return self._parsed_next_token(response.parsed)
+
+    @staticmethod
+    def _parsed_next_token(parsed):
+        """
+        Returns the NextToken of the parsed result of a page, or None.
+        """
+        if not isinstance(parsed, (dict, utils.CompactNode)):
+            return None
+        if parsed.getvalue('HasNext', 'true').lower() == 'false':
+            # Some APIs return a NextToken along with HasNext=false
+            return None
+        return parsed.getvalue('NextToken')
+
     def calc_signature(self, method, request_description):
         """
         Calculate MWS signature to interface with Amazon
@@ -300,13 +1083,7 @@ class MWS(object):
             method (str)
             request_description (str)
         """
-        sig_data = '\n'.join([
-            method,
-            self.domain.replace('https://', '').lower(),
-            self.uri,
-            request_description
-        ])
-        return base64.b64encode(hmac.new(self.secret_key.encode(), sig_data.encode(), hashlib.sha256).digest())
+        return self.signer.sign(method, request_description)
 
     def get_timestamp(self):
         """
@@ -336,20 +1113,35 @@ class Feeds(MWS):
     NEXT_TOKEN_OPERATIONS = [
         'GetFeedSubmissionList',
     ]
+    RECORD_PATHS = {
+        'GetFeedSubmissionList': 'FeedSubmissionInfo',
+    }
 
     def submit_feed(self, feed, feed_type, marketplaceids=None,
                     content_type="text/xml", purge='false'):
         """
         Uploads a feed ( xml or .tsv ) to the seller's inventory.
         Can be used for creating/updating products on Amazon.
+
+        `feed` is the feed as bytes or, to upload it in chunks without loading
+        it in memory, a file path, a readable binary file object or an
+        iterable of bytes chunks (see FeedBody). A string (text, or a Python 2
+        `str`) is taken as a path if it names an existing file, and as content
+        otherwise; text content is sent UTF-8 encoded.
         """
         data = dict(Action='SubmitFeed',
                     FeedType=feed_type,
                     PurgeAndReplace=purge)
         data.update(utils.enumerate_param('MarketplaceIdList.Id.', marketplaceids))
-        md = calc_md5(feed)
+        if isinstance(feed, utils.text_type) and not utils.is_path(feed):
+            feed = feed.encode('utf-8')
+        if isinstance(feed, bytearray) or (isinstance(feed, bytes) and not utils.is_path(feed)):
+            md = calc_md5(feed)
+        else:
+            feed = FeedBody(feed)
+            md = feed.content_md5
         return self.make_request(data, method="POST", body=feed,
-                                 extra_headers={'Content-MD5': md, 'Content-Type': content_type})
+                                 extra_headers={'Content-MD5': md.decode('ascii'), 'Content-Type': content_type})
 
     @utils.next_token_action('GetFeedSubmissionList')
     def get_feed_submission_list(self, feedids=None, max_count=None, feedtypes=None,
@@ -398,9 +1190,15 @@ class Feeds(MWS):
         data.update(utils.enumerate_param('FeedTypeList.Type.', feedtypes))
         return self.make_request(data)
 
-    def get_feed_submission_result(self, feedid):
+    def get_feed_submission_result(self, feedid, stream_to=None):
+        """
+        Returns the processing report of a feed submission.
+
+        With `stream_to` (a file path or a writable binary file object), the report
+        is written there chunk by chunk as it downloads, instead of being loaded in memory.
+        """
         data = dict(Action='GetFeedSubmissionResult', FeedSubmissionId=feedid)
-        return self.make_request(data, rootkey='Message')
+        return self.make_request(data, rootkey='Message', stream_to=stream_to)
 
 
 class Reports(MWS):
@@ -409,17 +1207,33 @@ class Reports(MWS):
     """
     ACCOUNT_TYPE = "Merchant"
     NEXT_TOKEN_OPERATIONS = [
+        'GetReportList',
         'GetReportRequestList',
         'GetReportScheduleList',
     ]
+    RECORD_PATHS = {
+        'GetReportList': 'ReportInfo',
+        'GetReportRequestList': 'ReportRequestInfo',
+        'GetReportScheduleList': 'ReportSchedule',
+    }
 
     # * REPORTS * #
 
-    def get_report(self, report_id):
+    def get_report(self, report_id, stream_to=None):
+        """
+        Returns the contents of a report.
+
+        With `stream_to` (a file path or a writable binary file object), the report
+        is written there chunk by chunk as it downloads, and its MD5 checked on the way,
+        instead of being loaded in memory.
+        """
         data = dict(Action='GetReport', ReportId=report_id)
-        return self.make_request(data)
+        return self.make_request(data, stream_to=stream_to)
 
     def get_report_count(self, report_types=(), acknowledged=None, fromdate=None, todate=None):
+        if isinstance(acknowledged, bool):
+            # False would be dropped as an empty value.
+            acknowledged = 'true' if acknowledged else 'false'
         data = dict(Action='GetReportCount',
                     Acknowledged=acknowledged,
                     AvailableFromDate=fromdate,
@@ -430,6 +1244,9 @@ class Reports(MWS):
     @utils.next_token_action('GetReportList')
     def get_report_list(self, requestids=(), max_count=None, types=(), acknowledged=None,
                         fromdate=None, todate=None, next_token=None):
+        if isinstance(acknowledged, bool):
+            # False would be dropped as an empty value.
+            acknowledged = 'true' if acknowledged else 'false'
         data = dict(Action='GetReportList',
                     Acknowledged=acknowledged,
                     AvailableFromDate=fromdate,
@@ -486,6 +1303,19 @@ class Reports(MWS):
         )
         return self.get_report_request_list(next_token=token)
 
+    # Most report IDs an UpdateReportAcknowledgements request accepts.
+    ACKNOWLEDGE_MAX_IDS = 100
+
+    def update_report_acknowledgements(self, report_ids, acknowledged=True):
+        """
+        Marks up to 100 reports as acknowledged (or, with `acknowledged=False`,
+        as not acknowledged), as listed by `get_report_list(acknowledged=...)`.
+        """
+        data = dict(Action='UpdateReportAcknowledgements',
+                    Acknowledged='true' if acknowledged else 'false')
+        data.update(utils.enumerate_param('ReportIdList.Id.', report_ids))
+        return self.make_request(data, "POST")
+
     def request_report(self, report_type, start_date=None, end_date=None, marketplaceids=()):
         data = dict(Action='RequestReport',
                     ReportType=report_type,
@@ -496,7 +1326,8 @@ class Reports(MWS):
 
     # * ReportSchedule * #
 
-    def get_report_schedule_list(self, types=()):
+    @utils.next_token_action('GetReportScheduleList')
+    def get_report_schedule_list(self, types=(), next_token=None):
         data = dict(Action='GetReportScheduleList')
         data.update(utils.enumerate_param('ReportTypeList.Type.', types))
         return self.make_request(data)
@@ -518,6 +1349,14 @@ class Orders(MWS):
         'ListOrders',
         'ListOrderItems',
     ]
+    RECORD_PATHS = {
+        'ListOrders': 'Orders.Order',
+        'ListOrderItems': 'OrderItems.OrderItem',
+        'GetOrder': 'Orders.Order',
+    }
+    BACKFILL_PARAMS = {
+        'ListOrders': ('created_after', 'created_before', 'PurchaseDate', 'AmazonOrderId'),
+    }
 
     @utils.next_token_action('ListOrders')
     def list_orders(self, marketplaceids=None, created_after=None, created_before=None,
@@ -558,6 +1397,70 @@ class Orders(MWS):
         data.update(utils.enumerate_param('AmazonOrderId.Id.', amazon_order_ids))
         return self.make_request(data)
 
+    # Most order IDs a GetOrder request accepts.
+    GET_ORDER_MAX_IDS = 50
+
+    def get_orders_bulk(self, amazon_order_ids, max_workers=None):
+        """
+        Generator fetching any number of orders: IDs are de-duplicated and
+        split into GetOrder requests of 50, run `max_workers` at a time.
+        Give the instance a Throttle to keep them within the GetOrder quota.
+
+        Yields an (amazon_order_id, order) pair per distinct ID, in the order
+        of `amazon_order_ids`; order is None for IDs MWS did not find.
+
+        Example:
+            for order_id, order in orders_api.get_orders_bulk(order_ids):
+                if order is None:
+                    missing.append(order_id)
+        """
+        def request(chunk):
+            return self.get_order(chunk)
+
+        chunks = utils.chunks(utils.unique(amazon_order_ids), self.GET_ORDER_MAX_IDS)
+        for chunk, response in utils.concurrent_map(request, chunks, max_workers or self.BULK_MAX_WORKERS):
+            for pair in self._match_orders(chunk, response):
+                yield pair
+
+    def iter_order_items(self, orders, max_workers=None, ordered=False):
+        """
+        Generator fetching the items of a stream of orders (parsed orders,
+        e.g. from `iter_records(list_orders, ...)`, or AmazonOrderIds),
+        `max_workers` orders at a time, every page of items included.
+        Give the instance a Throttle to keep within the ListOrderItems quota.
+
+        Yields an (order, items) pair per order, items being the list of
+        its OrderItems: as soon as they are fetched, or in the order of
+        `orders` with `ordered=True`. Orders are read from `orders` as
+        they are needed.
+
+        Example:
+            orders = orders_api.iter_records(orders_api.list_orders, created_after=...)
+            for order, items in orders_api.iter_order_items(orders, max_workers=8):
+                ...
+        """
+        def fetch(order):
+            return list(self.iter_records(self.list_order_items, amazon_order_id=self._get_order_id(order)))
+
+        return utils.concurrent_map(fetch, orders, max_workers or self.BULK_MAX_WORKERS, ordered)
+
+    @staticmethod
+    def _get_order_id(order):
+        """
+        Returns the AmazonOrderId of a parsed order, or the order ID itself.
+        """
+        return order.getvalue('AmazonOrderId') if hasattr(order, 'getvalue') else order
+
+    def _match_orders(self, amazon_order_ids, response):
+        """
+        Returns (amazon_order_id, order or None) pairs for the IDs of a GetOrder request.
+        """
+        orders = dict(
+            (order.getvalue('AmazonOrderId'), order)
+            for order in utils.iterate_path(response.parsed, self.RECORD_PATHS['GetOrder'])
+        )
+        return [(order_id, orders.get(order_id)) for order_id in amazon_order_ids]
+
     @utils.next_token_action('ListOrderItems')
     def list_order_items(self, amazon_order_id=None, next_token=None):
         data = dict(Action='ListOrderItems', AmazonOrderId=amazon_order_id)
@@ -586,6 +1489,68 @@ class Products(MWS):
     NAMESPACE = '{http://mws.amazonservices.com/schema/Products/2011-10-01}'
     # NEXT_TOKEN_OPERATIONS = []
 
+    # Methods `bulk` accepts: maximum number of IDs per request,
+    # name of the ID list argument and result attribute holding each ID.
+    BULK_OPERATIONS = {
+        'get_matching_product': (10, 'asins', 'ASIN'),
+        'get_matching_product_for_id': (5, 'ids', 'Id'),
+        'get_competitive_pricing_for_sku': (20, 'skus', 'SellerSKU'),
+        'get_competitive_pricing_for_asin': (20, 'asins', 'ASIN'),
+        'get_lowest_offer_listings_for_sku': (20, 'skus', 'SellerSKU'),
+        'get_lowest_offer_listings_for_asin': (20, 'asins', 'ASIN'),
+        'get_my_price_for_sku': (20, 'skus', 'SellerSKU'),
+        'get_my_price_for_asin': (20, 'asins', 'ASIN'),
+    }
+
+    def bulk(self, method, ids, max_workers=None, **kwargs):
+        """
+        Calls an ID-list method (see BULK_OPERATIONS) for any number of IDs:
+        IDs are de-duplicated and split into requests of the most IDs MWS
+        accepts, run `max_workers` at a time. Give the instance a Throttle
+        to keep concurrent requests within the operation quota.
+
+        `method` is the bound method or its name; other arguments of the
+        method are passed by keyword.
+        Returns an ObjectDict mapping each ID to its result, in the order
+        of `ids`; results include the status and any Error of their ID.
+
+        Example:
+            results = products_api.bulk(products_api.get_my_price_for_sku, skus,
+                                        marketplaceid='ATVPDKIKX0DER')
+            results['SKU-1'].Product.Offers
+        """
+        method, size, param, key = self._get_bulk_operation(method)
+        ids = utils.unique(ids)
+
+        def request(chunk):
+            request_kwargs = dict(kwargs)
+            request_kwargs[param] = chunk
+            return method(**request_kwargs)
+
+        results = {}
+        for _, response in utils.concurrent_map(request, utils.chunks(ids, size),
+                                                max_workers or self.BULK_MAX_WORKERS, ordered=False):
+            self._merge_bulk_results(results, response, key)
+        return utils.ObjectDict((id_, results[id_]) for id_ in ids if id_ in results)
+
+    def _get_bulk_operation(self, method):
+        """
+        Returns the bound method, maximum IDs per request, ID list argument
+        and ID attribute of a method `bulk` accepts.
+        """
+        name = getattr(method, '__name__', method)
+        if name not in self.BULK_OPERATIONS:
+            raise MWSError("{} does not take a list of IDs. Please refer to documentation.".format(name))
+        return (getattr(self, name),) + self.BULK_OPERATIONS[name]
+
+    @staticmethod
+    def _merge_bulk_results(results, response, key):
+        """
+        Adds the per-ID results of a response to `results`, keyed by their `key` attribute.
+        """
+        for result in utils.iterate_path(response.parsed, ''):
+            results[result.getvalue(key)] = result
+
     def list_matching_products(self, marketplaceid, query, contextid=None):
         """
         Returns a list of products and their attributes, ordered by
@@ -709,6 +1674,9 @@ class Sellers(MWS):
     NEXT_TOKEN_OPERATIONS = [
         'ListMarketplaceParticipations',
     ]
+    RECORD_PATHS = {
+        'ListMarketplaceParticipations': 'ListParticipations.Participation',
+    }
 
     @utils.next_token_action('ListMarketplaceParticipations')
     def list_marketplace_participations(self, next_token=None):
@@ -748,6 +1716,15 @@ class Finances(MWS):
         'ListFinancialEventGroups',
         'ListFinancialEvents',
     ]
+    RECORD_PATHS = {
+        'ListFinancialEventGroups': 'FinancialEventGroupList.FinancialEventGroup',
+        # Every event, of every type: FinancialEvents.ShipmentEventList.ShipmentEvent, ...
+        'ListFinancialEvents': 'FinancialEvents.*.*',
+    }
+    BACKFILL_PARAMS = {
+        # Events have no ID: identical events at a window bound are told apart by their content.
+        'ListFinancialEvents': ('posted_after', 'posted_before', 'PostedDate', None),
+    }
 
     @utils.next_token_action('ListFinancialEventGroups')
     def list_financial_event_groups(self, created_after=None, created_before=None, max_results=None, next_token=None):
@@ -813,6 +1790,10 @@ class InboundShipments(MWS):
         'ListInboundShipments',
         'ListInboundShipmentItems',
     ]
+    RECORD_PATHS = {
+        'ListInboundShipments': 'ShipmentData.member',
+        'ListInboundShipmentItems': 'ItemData.member',
+    }
     SHIPMENT_STATUSES = ['WORKING', 'SHIPPED', 'CANCELLED']
     DEFAULT_SHIP_STATUS = 'WORKING'
     LABEL_PREFERENCES = ['SELLER_LABEL',
@@ -1217,7 +2198,8 @@ class InboundShipments(MWS):
 
     @utils.next_token_action('ListInboundShipments')
     def list_inbound_shipments(self, shipment_ids=None, shipment_statuses=None,
-                               last_updated_after=None, last_updated_before=None,):
+                               last_updated_after=None, last_updated_before=None,
+                               next_token=None):
         """
         Returns list of shipments based on statuses, IDs, and/or
         before/after datetimes.
@@ -1238,7 +2220,7 @@ class InboundShipments(MWS):
 
     @utils.next_token_action('ListInboundShipmentItems')
     def list_inbound_shipment_items(self, shipment_id=None, last_updated_after=None,
-                                    last_updated_before=None,):
+                                    last_updated_before=None, next_token=None):
         """
         Returns list of items within inbound shipments and/or
         before/after datetimes.
@@ -1266,6 +2248,9 @@ class Inventory(MWS):
     NEXT_TOKEN_OPERATIONS = [
         'ListInventorySupply',
     ]
+    RECORD_PATHS = {
+        'ListInventorySupply': 'InventorySupplyList.member',
+    }
 
     @utils.next_token_action('ListInventorySupply')
     def list_inventory_supply(self, skus=(), datetime_=None,
@@ -1317,6 +2302,10 @@ class Recommendations(MWS):
     NEXT_TOKEN_OPERATIONS = [
         "ListRecommendations",
     ]
+    RECORD_PATHS = {
+        # Members of every recommendation category list.
+        'ListRecommendations': '*.member',
+    }
 
     def get_last_updated_time_for_recommendations(self, marketplaceid):
         """
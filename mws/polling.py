@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Submit, poll and collect loop shared by ReportRunner and FeedPipeline.
+"""
+from __future__ import absolute_import
+
+import time
+from collections import deque
+
+from . import utils
+from .mws import MWSError
+
+
+class PollingRunner(object):
+    """
+    Runs jobs Amazon processes asynchronously: jobs are submitted as fast as
+    the `SUBMIT_ACTION` quota allows, every outstanding job is polled with one
+    list call per `MAX_POLL_IDS` jobs, and the results of finished jobs are
+    collected `max_workers` at a time.
+
+    Polls are spaced by `poll_ratio` times the age of the most recent
+    outstanding job, between `min_interval` and `max_interval` seconds:
+    jobs that come back quickly are noticed quickly, and jobs that take
+    hours do not use up the quota of the list call.
+    Give the API instance a Throttle to stay within every quota.
+
+    A job still outstanding `max_wait` seconds after it was submitted, such
+    as one whose request was purged and is no longer listed, is given up on
+    and fails with an MWSError; None waits forever.
+
+    Subclasses implement `_submit_job`, `_submitted_at`, `_list`, `_job_id`,
+    `_update`, `_collect_job` and `_fail`.
+    """
+    # Action of the submit calls, whose quota paces submissions.
+    SUBMIT_ACTION = None
+    # Most job IDs a list call accepts.
+    MAX_POLL_IDS = 100
+    # Statuses of jobs Amazon is done with.
+    FINISHED_STATUSES = ()
+    # Seconds after which outstanding jobs are given up on.
+    MAX_WAIT = 24 * 3600.0
+
+    def __init__(self, api, max_workers=None, min_interval=5.0, max_interval=300.0, poll_ratio=0.25,
+                 sleep=time.sleep, clock=time.time, max_wait=MAX_WAIT):
+        self.api = api
+        self.max_workers = max_workers or api.BULK_MAX_WORKERS
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.poll_ratio = poll_ratio
+        self.sleep = sleep
+        self.clock = clock
+        self.max_wait = max_wait
+
+    def run(self, jobs):
+        """
+        Generator running jobs, yielding each one once it is over:
+        collected, or failed with an MWSError.
+        """
+        queued = deque(jobs)
+        outstanding = {}
+        while queued or outstanding:
+            for job in self._submit(queued, outstanding):
+                yield job
+            if not outstanding:
+                continue
+            self.sleep(self._poll_interval(outstanding.values()))
+            for job in self._collect(self._poll(outstanding)):
+                yield job
+            for job in self._expire(outstanding):
+                yield job
+
+    def _submit(self, queued, outstanding):
+        """
+        Submits the queued jobs the submit quota allows right away,
+        or the next one if none are outstanding. Returns the jobs that failed.
+        """
+        throttle = self.api.throttle
+        failed = []
+        while queued:
+            if outstanding and throttle is not None and \
+                    throttle.available(self.api.account_id, self.SUBMIT_ACTION) < 1:
+                break
+            job = queued.popleft()
+            try:
+                job_id = self._submit_job(job)
+            except MWSError as error:
+                failed.append(self._fail(job, error))
+                continue
+            outstanding[job_id] = job
+        return failed
+
+    def _poll_interval(self, jobs):
+        age = self.clock() - max(self._submitted_at(job) for job in jobs)
+        return min(max(age * self.poll_ratio, self.min_interval), self.max_interval)
+
+    def _poll(self, outstanding):
+        """
+        Updates the status of the outstanding jobs.
+        Removes and returns those Amazon is done with.
+        """
+        finished = []
+        for job_ids in utils.chunks(list(outstanding), self.MAX_POLL_IDS):
+            for info in self._list(job_ids):
+                job_id = self._job_id(info)
+                job = outstanding.get(job_id)
+                if job is None:
+                    continue
+                if self._update(job, info) in self.FINISHED_STATUSES:
+                    finished.append(outstanding.pop(job_id))
+        return finished
+
+    def _expire(self, outstanding):
+        """
+        Removes the jobs outstanding for `max_wait` seconds or more,
+        and returns them, failed.
+        """
+        if self.max_wait is None:
+            return []
+        now = self.clock()
+        expired = [job_id for job_id, job in outstanding.items() if now - self._submitted_at(job) >= self.max_wait]
+        return [self._fail(outstanding.pop(job_id),
+                           MWSError("{} not finished after {} seconds.".format(job_id, self.max_wait)))
+                for job_id in expired]
+
+    def _collect(self, jobs):
+        """
+        Generator collecting the results of finished jobs,
+        yielding each job as soon as its result is in.
+        """
+        for job, _ in utils.concurrent_map(self._collect_job, jobs, self.max_workers, ordered=False):
+            yield job
+
+    def _submit_job(self, job):
+        """
+        Submits a job and returns its ID; raises MWSError if it failed.
+        """
+        raise NotImplementedError
+
+    def _submitted_at(self, job):
+        """
+        Returns the time, by the runner clock, a job was submitted at.
+        """
+        raise NotImplementedError
+
+    def _list(self, job_ids):
+        """
+        Returns the status records of a list of job IDs.
+        """
+        raise NotImplementedError
+
+    def _job_id(self, info):
+        """
+        Returns the job ID of a status record.
+        """
+        raise NotImplementedError
+
+    def _update(self, job, info):
+        """
+        Updates a job from its status record, and returns its status.
+        """
+        raise NotImplementedError
+
+    def _collect_job(self, job):
+        """
+        Collects the result of a finished job, and returns the job.
+        """
+        raise NotImplementedError
+
+    def _fail(self, job, error):
+        """
+        Records the MWSError that stopped a job, and returns the job.
+        """
+        raise NotImplementedError
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Columnar extraction of offer prices from Products API responses.
+
+`PricingTable` reads GetCompetitivePricingFor*, GetLowestOfferListingsFor*
+and GetMyPriceFor* responses straight from their XML, one row per offer,
+into typed columns, without building a parsed tree:
+
+    table = PricingTable()
+    for asins in batches:
+        table.add(products_api.get_lowest_offer_listings_for_asin(marketplace_id, asins))
+    columns = table.columns()
+    columns.landed_price  # numpy.ndarray of float64, if NumPy is installed
+"""
+from __future__ import absolute_import
+
+from array import array
+from xml.parsers import expat
+
+from .utils import ObjectDict, _parse_error
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Elements holding one offer, and so one row, by response type.
+OFFER_TAGS = ('CompetitivePrice', 'LowestOfferListing', 'Offer')
+
+# Price elements, holding a CurrencyCode and an Amount, read for each offer.
+PRICE_TAGS = ('LandedPrice', 'ListingPrice', 'Shipping')
+
+# Text columns, then numeric ones.
+TEXT_COLUMNS = ('asin', 'sku', 'condition', 'fulfillment_channel', 'currency')
+PRICE_COLUMNS = ('landed_price', 'listing_price', 'shipping')
+COLUMNS = TEXT_COLUMNS + PRICE_COLUMNS + ('count',)
+
+_NAN = float('nan')
+
+
+class PricingTable(object):
+    """
+    Accumulates the offers of Products pricing responses in columns:
+
+    asin, sku: the product, from the request (result attributes) or its Identifiers.
+    condition: ItemCondition or condition attribute ("New", "Used"...).
+    fulfillment_channel: "Amazon" or "Merchant"; empty for competitive prices.
+    currency: currency of the landed price.
+    landed_price, listing_price, shipping: floats, NaN when missing.
+    count: NumberOfOfferListingsConsidered of lowest offer listings, 0 otherwise.
+
+    Results with an error status add no row; they are listed in `errors`.
+    """
+    def __init__(self):
+        self._text = dict((column, []) for column in TEXT_COLUMNS)
+        self._prices = dict((column, array('d')) for column in PRICE_COLUMNS)
+        self._count = array('l')
+        self.errors = []
+
+    def __len__(self):
+        return len(self._count)
+
+    def add(self, response):
+        """
+        Adds the offers of a response: an API method return value,
+        or its XML body as bytes or text.
+        """
+        data = getattr(response, 'original', response)
+        _PricingParser(self).parse(data)
+        return self
+
+    def _append(self, text_values, prices, count):
+        for column, value in zip(TEXT_COLUMNS, text_values):
+            self._text[column].append(value)
+        for column, value in zip(PRICE_COLUMNS, prices):
+            self._prices[column].append(value)
+        self._count.append(count)
+
+    def columns(self, use_numpy=None):
+        """
+        Returns an ObjectDict mapping each column name to its values.
+        With NumPy (used when installed, unless `use_numpy` is False), columns
+        are arrays: float64 prices, int64 counts and unicode text.
+        Without, prices and counts are `array.array`s and text columns lists.
+        """
+        if use_numpy is None:
+            use_numpy = numpy is not None
+        columns = ObjectDict()
+        for column in TEXT_COLUMNS:
+            values = self._text[column]
+            columns[column] = numpy.array(values, dtype=str) if use_numpy else list(values)
+        for column in PRICE_COLUMNS:
+            values = self._prices[column]
+            columns[column] = numpy.array(values, dtype='float64') if use_numpy else array('d', values)
+        columns['count'] = numpy.array(self._count, dtype='int64') if use_numpy else array('l', self._count)
+        return columns
+
+
+class _PricingParser(object):
+    """
+    Expat handlers filling a PricingTable from one response document.
+    """
+    def __init__(self, table):
+        self.table = table
+        self.stack = []
+        self.texts = []
+        self.product = None
+        self.offer = None
+
+    def parse(self, data):
+        """
+        Raises `xml.etree.ElementTree.ParseError` for malformed documents.
+        """
+        parser = expat.ParserCreate(namespace_separator=' ')
+        parser.buffer_text = True
+        parser.StartElementHandler = self.start
+        parser.EndElementHandler = self.end
+        parser.CharacterDataHandler = self.texts.append
+        try:
+            parser.Parse(data, True)
+        except expat.ExpatError as exc:
+            raise _parse_error(exc)
+
+    def start(self, name, attributes):
+        name = name.rpartition(' ')[2]
+        self.stack.append(name)
+        del self.texts[:]
+        if len(self.stack) == 2:
+            # One result per requested ASIN or SKU: [asin, sku, status, error code, message].
+            self.product = [attributes.get('ASIN', ''), attributes.get('SellerSKU', ''),
+                            attributes.get('status', 'Success'), '', '']
+        elif name in OFFER_TAGS and self.product is not None:
+            # [condition, fulfillment channel, currency], prices, count
+            self.offer = ([attributes.get('condition', ''), '', ''], [_NAN, _NAN, _NAN], 0)
+
+    def end(self, name):
+        name = self.stack.pop()
+        parent = self.stack[-1] if self.stack else None
+        text = ''.join(self.texts)
+        if self.offer is not None:
+            self._end_offer_child(name, parent, text)
+        elif len(self.stack) == 1:
+            self._end_product()
+        elif self.product is not None:
+            self._end_product_child(name, parent, text)
+        del self.texts[:]
+
+    def _end_offer_child(self, name, parent, text):
+        texts, prices, count = self.offer
+        if name == 'Amount' and parent in PRICE_TAGS:
+            prices[PRICE_TAGS.index(parent)] = float(text)
+        elif name == 'CurrencyCode' and parent == 'LandedPrice':
+            texts[2] = text
+        elif name == 'ItemCondition':
+            texts[0] = text
+        elif name == 'FulfillmentChannel':
+            texts[1] = text
+        elif name == 'NumberOfOfferListingsConsidered':
+            self.offer = (texts, prices, int(text))
+        elif name in OFFER_TAGS:
+            self.table._append(self.product[:2] + texts, prices, count)
+            self.offer = None
+
+    def _end_product_child(self, name, parent, text):
+        product = self.product
+        if name == 'ASIN' and parent == 'MarketplaceASIN' and not product[0]:
+            product[0] = text
+        elif name == 'SellerSKU' and parent == 'SKUIdentifier' and not product[1]:
+            product[1] = text
+        elif name == 'Code' and parent == 'Error':
+            product[3] = text
+        elif name == 'Message' and parent == 'Error':
+            product[4] = text
+
+    def _end_product(self):
+        asin, sku, status, code, message = self.product
+        if status != 'Success':
+            self.table.errors.append(ObjectDict({
+                'asin': asin, 'sku': sku, 'status': status, 'code': code, 'message': message,
+            }))
+        self.product = None
+
+
+def extract_pricing(responses, use_numpy=None):
+    """
+    Returns the offer columns (see PricingTable) of one or several
+    Products pricing responses.
+    """
+    if not isinstance(responses, (list, tuple)):
+        responses = [responses]
+    table = PricingTable()
+    for response in responses:
+        table.add(response)
+    return table.columns(use_numpy)
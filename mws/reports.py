@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+Report lifecycle helpers built on the Reports API.
+
+`ReportRunner` requests reports, polls them until Amazon has generated
+them and downloads each one as soon as it is ready:
+
+    runner = ReportRunner(reports_api)
+    jobs = [ReportJob('_GET_FLAT_FILE_OPEN_LISTINGS_DATA_', sink='/tmp/listings.txt'),
+            ReportJob('_GET_MERCHANT_LISTINGS_DATA_', sink='/tmp/merchant.txt')]
+    for job in runner.run(jobs):
+        print(job.report_type, job.status, job.error)
+
+`ReportHarvester` downloads, once, every new report Amazon makes
+available, such as scheduled reports:
+
+    harvester = ReportHarvester(reports_api, SQLiteStore('mws-state.db'), sink='/data/reports')
+    for job in harvester.run():
+        print(job.report_type, job.report_id, job.error)
+"""
+from __future__ import absolute_import
+
+import datetime
+import os
+import time
+
+from . import utils
+from .mws import MWSError
+from .polling import PollingRunner
+from .retry import parse_timestamp
+
+__all__ = [
+    'ReportJob',
+    'ReportRunner',
+    'ReportHarvester',
+]
+
+# ReportProcessingStatus values of report requests Amazon is done with.
+DONE = '_DONE_'
+DONE_NO_DATA = '_DONE_NO_DATA_'
+CANCELLED = '_CANCELLED_'
+FINISHED_STATUSES = (DONE, DONE_NO_DATA, CANCELLED)
+
+
+class ReportJob(object):
+    """
+    A report to request and download.
+
+    `sink` is the file path or writable binary file object the report is
+    streamed to; without one, the report is loaded in memory, as
+    `response.parsed`. Other keyword arguments (`start_date`, `end_date`,
+    `marketplaceids`) are passed to `Reports.request_report`.
+
+    Once run, `status` is the last ReportProcessingStatus of the request,
+    `response` the `get_report` response (None if there is no report) and
+    `error` the MWSError that stopped the job, if any. `requested_at` and
+    `finished_at` are the times (as given by the runner clock) the report was
+    requested and downloaded or given up on.
+    """
+    def __init__(self, report_type, sink=None, **kwargs):
+        self.report_type = report_type
+        self.sink = sink
+        self.kwargs = kwargs
+        self.request_id = None
+        self.report_id = None
+        self.status = None
+        self.response = None
+        self.error = None
+        self.requested_at = None
+        self.finished_at = None
+
+    def __repr__(self):
+        return '<ReportJob {} {}>'.format(self.report_type, self.status or 'unrequested')
+
+    @property
+    def latency(self):
+        """
+        Seconds from the report request to the end of the job, or None.
+        """
+        if self.requested_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.requested_at
+
+
+class ReportRunner(PollingRunner):
+    """
+    Runs report jobs with RequestReport, polls them with GetReportRequestList
+    and downloads finished reports to their sinks; see PollingRunner.
+    `run` yields each ReportJob once it is over: downloaded, without data,
+    cancelled, or failed with an MWSError.
+    """
+    SUBMIT_ACTION = 'RequestReport'
+    FINISHED_STATUSES = FINISHED_STATUSES
+
+    def __init__(self, reports_api, max_workers=None, min_interval=5.0, max_interval=300.0, poll_ratio=0.25,
+                 sleep=time.sleep, clock=time.time, max_wait=PollingRunner.MAX_WAIT):
+        super(ReportRunner, self).__init__(reports_api, max_workers, min_interval, max_interval, poll_ratio,
+                                           sleep, clock, max_wait)
+        self.reports_api = reports_api
+
+    def _submit_job(self, job):
+        job.requested_at = self.clock()
+        info = self.reports_api.request_report(job.report_type, **job.kwargs).parsed.ReportRequestInfo
+        job.request_id = info.getvalue('ReportRequestId')
+        job.status = info.getvalue('ReportProcessingStatus')
+        return job.request_id
+
+    def _submitted_at(self, job):
+        return job.requested_at
+
+    def _list(self, request_ids):
+        return self.reports_api.iter_records(self.reports_api.get_report_request_list,
+                                             requestids=request_ids, max_count=str(len(request_ids)))
+
+    def _job_id(self, info):
+        return info.getvalue('ReportRequestId')
+
+    def _update(self, job, info):
+        job.status = info.getvalue('ReportProcessingStatus')
+        job.report_id = info.getvalue('GeneratedReportId')
+        return job.status
+
+    def _collect_job(self, job):
+        if job.status != DONE or job.report_id is None:
+            return self._finish(job)
+        try:
+            response = self.reports_api.get_report(job.report_id, stream_to=job.sink)
+        except MWSError as error:
+            return self._finish(job, error=error)
+        return self._finish(job, response)
+
+    def _fail(self, job, error):
+        return self._finish(job, error=error)
+
+    def _finish(self, job, response=None, error=None):
+        job.response = response
+        job.error = error
+        job.finished_at = self.clock()
+        return job
+
+
+class ReportHarvester(object):
+    """
+    Downloads every new report listed by GetReportList exactly once.
+
+    Each run lists the unacknowledged reports available since the saved
+    watermark, downloads them `max_workers` at a time, and acknowledges
+    each report once it is written, so that it is never listed again.
+    The AvailableDate of the latest report harvested is saved under `key`
+    in `store` (see mws.state) as the next watermark; a report that failed
+    to download holds the watermark back, to be retried on the next run.
+    Each report is recorded as harvested before its job is yielded, and
+    acknowledgements are sent even when the run is cut short.
+
+    `sink` is the directory reports are written to, as <directory>/<ReportId>,
+    or a callable taking a ReportInfo record and returning a file path or
+    writable binary file object. `types` restricts the ReportTypes harvested.
+    `start` (naive UTC datetime) is the watermark of the first run; by default,
+    Amazon lists the reports of the last 90 days. With `acknowledge=False`,
+    reports are left unacknowledged, for other consumers, and only the
+    watermark keeps them from being harvested again.
+    """
+    def __init__(self, reports_api, store, sink, types=(), key='reports', start=None, acknowledge=True,
+                 max_workers=None, clock=time.time):
+        self.reports_api = reports_api
+        self.store = store
+        self.sink = sink
+        self.types = types
+        self.key = key
+        self.start = start
+        self.acknowledge = acknowledge
+        self.max_workers = max_workers or reports_api.BULK_MAX_WORKERS
+        self.clock = clock
+
+    def run(self):
+        """
+        Generator yielding a ReportJob for every new report, once written to
+        its sink or, with its `error` set, once its download failed.
+        """
+        state = self.store.get(self.key) or {}
+        after = state.get('after') or (self.start and self.start.strftime('%Y-%m-%dT%H:%M:%SZ'))
+        seen = state.get('seen') or {}
+        infos = self.reports_api.iter_records(self.reports_api.get_report_list, types=self.types, fromdate=after,
+                                              acknowledged=False if self.acknowledge else None, max_count='100')
+        dates = {}
+        harvested = {}
+        failed = []
+        unacknowledged = []
+        new_infos = (info for info in infos if info.getvalue('ReportId') not in seen)
+        finished = False
+        try:
+            for info, job in utils.concurrent_map(self._download, new_infos, self.max_workers, ordered=False):
+                dates[job.report_id] = info.getvalue('AvailableDate')
+                if job.error is not None:
+                    failed.append(dates[job.report_id])
+                else:
+                    harvested[job.report_id] = dates[job.report_id]
+                    unacknowledged.append(job.report_id)
+                    # Saved before the job is handed over, so that a run cut short never harvests it again.
+                    self.store.set(self.key, self._partial_state(after, seen, harvested))
+                yield job
+                if len(unacknowledged) == self.reports_api.ACKNOWLEDGE_MAX_IDS:
+                    self._acknowledge(unacknowledged)
+            finished = True
+        finally:
+            self._acknowledge(unacknowledged)
+            if finished:
+                self.store.set(self.key, self._next_state(after, seen, harvested, failed))
+
+    def _sink(self, info):
+        if callable(self.sink):
+            return self.sink(info)
+        return os.path.join(self.sink, info.getvalue('ReportId'))
+
+    def _download(self, info):
+        job = ReportJob(info.getvalue('ReportType'), self._sink(info))
+        job.request_id = info.getvalue('ReportRequestId')
+        job.report_id = info.getvalue('ReportId')
+        job.status = DONE
+        job.requested_at = self.clock()
+        try:
+            job.response = self.reports_api.get_report(job.report_id, stream_to=job.sink)
+        except MWSError as error:
+            job.error = error
+        job.finished_at = self.clock()
+        return job
+
+    def _acknowledge(self, report_ids):
+        """
+        Acknowledges, then forgets, a list of report IDs.
+        """
+        if report_ids and self.acknowledge:
+            self.reports_api.update_report_acknowledgements(report_ids)
+        del report_ids[:]
+
+    @staticmethod
+    def _partial_state(after, seen, harvested):
+        """
+        Returns the state of a run still under way: the watermark it started
+        from, as reports listed after it may not be harvested yet, and the
+        dates of the reports harvested so far, by ID.
+        """
+        seen = dict(seen)
+        seen.update(harvested)
+        return {'after': after, 'seen': seen}
+
+    @staticmethod
+    def _next_state(after, seen, harvested, failed):
+        """
+        Returns the state following a run: the watermark, and the dates of
+        the reports available at or after it that were harvested, by ID.
+        """
+        seen = dict(seen)
+        seen.update(harvested)
+        if failed:
+            after = min(failed, key=_date_key)
+        elif seen:
+            after = max(list(seen.values()) + ([after] if after else []), key=_date_key)
+        return {
+            'after': after,
+            'seen': dict((report_id, date) for report_id, date in seen.items()
+                         if after is None or _date_key(date) >= _date_key(after)),
+        }
+
+
+def _date_key(value):
+    """
+    Sort key of an ISO 8601 date, such as an AvailableDate ("2017-01-01T00:00:00+00:00").
+    """
+    return parse_timestamp((value or '')[:19]) or datetime.datetime.min
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Retry policy for throttled and failed MWS requests.
+"""
+from __future__ import absolute_import
+
+import datetime
+import random
+import time
+import xml.etree.ElementTree as ET
+
+# MWS error codes worth retrying: the request itself was fine,
+# Amazon just could not serve it at that time.
+RETRYABLE_ERRORS = (
+    'RequestThrottled',
+    'QuotaExceeded',
+    'InternalError',
+    'ServiceUnavailable',
+)
+
+# HTTP status codes worth retrying, whatever the error code.
+RETRYABLE_STATUS_CODES = (500, 502, 503, 504)
+
+
+def parse_error(body):
+    """
+    Returns the Code and Message of an MWS error response body,
+    such as:
+
+        <ErrorResponse>
+          <Error>
+            <Type>Sender</Type>
+            <Code>RequestThrottled</Code>
+            <Message>Request is throttled</Message>
+          </Error>
+          <RequestID>...</RequestID>
+        </ErrorResponse>
+
+    Returns (None, None) if the body is not an MWS error document.
+    """
+    try:
+        root = ET.fromstring(body)
+    except (ET.ParseError, ValueError, TypeError):
+        return None, None
+    code = message = None
+    for element in root.iter():
+        tag = element.tag.rpartition('}')[2]
+        if tag == 'Code' and code is None:
+            code = (element.text or '').strip()
+        elif tag == 'Message' and message is None:
+            message = (element.text or '').strip()
+    return code, message
+
+
+def parse_timestamp(value):
+    """
+    Parses an ISO 8601 UTC timestamp, as sent by MWS in headers
+    (e.g. '2017-08-30T13:00:00.000Z'), to a naive UTC datetime.
+    Returns None if it cannot be parsed.
+    """
+    value = (value or '').strip().rstrip('Z')
+    value = value.partition('.')[0]
+    try:
+        return datetime.datetime.strptime(value, '%Y-%m-%dT%H:%M:%S')
+    except ValueError:
+        return None
+
+
+class RetryPolicy(object):
+    """
+    Decides whether, and after how long, a failed request should be retried.
+
+    Throttled (`RequestThrottled`, `QuotaExceeded`) and server-side
+    (`InternalError`, `ServiceUnavailable`, 5xx) errors are retried up to
+    `max_retries` times, with a jittered exponential backoff:
+    the n-th retry waits between half and all of
+    `min(backoff_max, backoff_base * 2 ** n)` seconds.
+
+    When the response reports an exhausted hourly quota
+    (`x-mws-quota-remaining: 0`), the retry waits at least until
+    the time given by `x-mws-quota-resetsOn`.
+
+    Network errors (connection resets, timeouts), which come without a
+    response, are retried the same way unless `retry_network_errors` is False.
+
+    Example:
+        orders_api = Orders(access_key, secret_key, account_id,
+                            retry=RetryPolicy(max_retries=8, backoff_max=120))
+    """
+    def __init__(self, max_retries=5, backoff_base=1.0, backoff_max=60.0,
+                 retry_errors=RETRYABLE_ERRORS, retry_status_codes=RETRYABLE_STATUS_CODES,
+                 retry_network_errors=True, sleep=time.sleep, utcnow=datetime.datetime.utcnow):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_errors = retry_errors
+        self.retry_status_codes = retry_status_codes
+        self.retry_network_errors = retry_network_errors
+        self.sleep = sleep
+        self._utcnow = utcnow
+
+    def is_retryable(self, status_code, body):
+        """
+        Returns True if a response with this status code and body
+        describes a transient error.
+        """
+        code, _ = parse_error(body)
+        return code in self.retry_errors or status_code in self.retry_status_codes
+
+    def backoff(self, attempt):
+        """
+        Returns the jittered backoff, in seconds, before retry number `attempt`
+        (starting at 0).
+        """
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        return delay / 2.0 + random.uniform(0, delay / 2.0)
+
+    def quota_reset_delay(self, headers):
+        """
+        Returns the seconds left until the hourly quota resets,
+        if the response headers report it as exhausted, else 0.
+        """
+        remaining = headers.get('x-mws-quota-remaining')
+        resets_on = parse_timestamp(headers.get('x-mws-quota-resetsOn'))
+        if remaining is None or resets_on is None:
+            return 0.0
+        try:
+            if float(remaining) > 0:
+                return 0.0
+        except ValueError:
+            return 0.0
+        return max(0.0, (resets_on - self._utcnow()).total_seconds())
+
+    def get_delay(self, attempt, status_code=None, body=None, headers=None):
+        """
+        Returns the number of seconds to wait before retrying a failed request,
+        or None if it should not be retried.
+        `attempt` is the number of retries already made; `status_code`, `body`
+        and `headers` are None for a network error.
+        """
+        if attempt >= self.max_retries:
+            return None
+        if status_code is None:
+            if not self.retry_network_errors:
+                return None
+        elif not self.is_retryable(status_code, body):
+            return None
+        return max(self.backoff(attempt), self.quota_reset_delay(headers or {}))
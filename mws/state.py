@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Small key-value stores persisting the progress of long-running jobs,
+such as `mws.sync.OrderSync`, between runs.
+
+Every store maps string keys to JSON-serializable values:
+
+    store = SQLiteStore('mws-state.db')
+    store.set('orders', {'after': '2017-01-01T00:00:00Z'})
+    store.get('orders')
+    store.delete('orders')
+
+Any object with the same `get`, `set` and `delete` methods can be used instead.
+"""
+from __future__ import absolute_import
+
+import copy
+import json
+import os
+import tempfile
+import threading
+
+from . import utils
+
+__all__ = [
+    'MemoryStore',
+    'FileStore',
+    'SQLiteStore',
+]
+
+
+class MemoryStore(object):
+    """
+    Store kept in memory, for tests and single-process jobs
+    that do not need to survive a restart.
+    """
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            return copy.deepcopy(self._values.get(key, default))
+
+    def set(self, key, value):
+        with self._lock:
+            self._values[key] = copy.deepcopy(value)
+
+    def delete(self, key):
+        with self._lock:
+            self._values.pop(key, None)
+
+
+class FileStore(object):
+    """
+    Store kept in a JSON file, rewritten whole, atomically, on every change:
+    a crash leaves either the previous or the new content, never a mix.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path) as state_file:
+                return json.load(state_file)
+        except (IOError, OSError):
+            return {}
+
+    def _save(self, values):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'w') as state_file:
+                json.dump(values, state_file, sort_keys=True)
+            utils.replace_file(temp_path, self.path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._load().get(key, default)
+
+    def set(self, key, value):
+        with self._lock:
+            values = self._load()
+            values[key] = value
+            self._save(values)
+
+    def delete(self, key):
+        with self._lock:
+            values = self._load()
+            if values.pop(key, None) is not None:
+                self._save(values)
+
+
+class SQLiteStore(object):
+    """
+    Store kept in a table of an SQLite database, created if needed.
+    Several processes can share the same database file.
+    """
+    def __init__(self, path, table='mws_state'):
+        self.path = path
+        self.table = table
+        with self._connect() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS {} (key TEXT PRIMARY KEY, value TEXT NOT NULL)'.format(table))
+
+    def _connect(self):
+        # A connection per call keeps the store usable from any thread.
+        return _connect(self.path)
+
+    def get(self, key, default=None):
+        with self._connect() as connection:
+            row = connection.execute(
+                'SELECT value FROM {} WHERE key = ?'.format(self.table), (key,)).fetchone()
+        return default if row is None else json.loads(row[0])
+
+    def set(self, key, value):
+        with self._connect() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO {} (key, value) VALUES (?, ?)'.format(self.table),
+                (key, json.dumps(value, sort_keys=True)))
+
+    def delete(self, key):
+        with self._connect() as connection:
+            connection.execute('DELETE FROM {} WHERE key = ?'.format(self.table), (key,))
+
+
+def _connect(path):
+    """
+    Opens an SQLite connection to `path`, as a _Connection.
+    sqlite3 is imported on first use: `import mws` works on Pythons built without it.
+    """
+    import sqlite3
+    return _Connection(sqlite3.connect(path, timeout=30))
+
+
+class _Connection(object):
+    """
+    Context manager committing (or rolling back) then closing an SQLite connection.
+    """
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self.connection
+
+    def __exit__(self, exc_type, *exc_info):
+        try:
+            if exc_type is None:
+                self.connection.commit()
+            else:
+                self.connection.rollback()
+        finally:
+            self.connection.close()
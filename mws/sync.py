@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental order synchronisation.
+
+`OrderSync` lists the orders updated since its previous run, keeping its
+progress in a store (see `mws.state`) so that each run only asks Amazon
+for what changed in the meantime:
+
+    sync = OrderSync(orders_api, SQLiteStore('mws-state.db'),
+                     marketplaceids=[marketplace_id], start=datetime.datetime(2017, 1, 1))
+    for order in sync.run():
+        save(order)
+"""
+from __future__ import absolute_import
+
+import datetime
+
+from . import utils
+from .mws import MWSError
+from .retry import parse_error, parse_timestamp
+
+__all__ = [
+    'OrderSync',
+]
+
+# Amazon requires LastUpdatedBefore to be at least two minutes in the past.
+LAG = datetime.timedelta(minutes=2)
+
+# Error codes of ListOrdersByNextToken for a next token that can no longer be used.
+EXPIRED_TOKEN_ERRORS = ('InvalidParameterValue', 'InvalidNextToken')
+
+_TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+class OrderSync(object):
+    """
+    Lists new and changed orders, window after window of LastUpdateDate.
+
+    Each run of `run` covers the orders updated from the end of the
+    previous window (or `start`, a naive UTC datetime, the first time)
+    up to `lag` before now.
+    The window and the NextToken of its last fully consumed page are saved
+    under `key` in `store` after every page, and the window end becomes
+    the next start once its last page is consumed. A run interrupted by a
+    crash resumes with the page that was being consumed, which is listed
+    again: orders are delivered at least once.
+
+    Amazon includes orders updated exactly at a window bound in both windows
+    sharing it: those are only listed again if their LastUpdateDate changed.
+
+    Other keyword arguments, such as `marketplaceids` or `orderstatus`,
+    are passed to `list_orders` for every window.
+    """
+    def __init__(self, orders_api, store, start=None, key='orders', lag=LAG,
+                 utcnow=datetime.datetime.utcnow, **list_kwargs):
+        self.orders_api = orders_api
+        self.store = store
+        self.start = start
+        self.key = key
+        self.lag = lag
+        self.utcnow = utcnow
+        self.list_kwargs = list_kwargs
+
+    @property
+    def state(self):
+        """
+        The saved progress: a dict with the start of the next window ("after")
+        or, mid-window, the window bounds ("after", "before") and the pending "next_token".
+        """
+        return self.store.get(self.key)
+
+    def reset(self):
+        """
+        Forgets the saved progress: the next run starts again from `start`.
+        """
+        self.store.delete(self.key)
+
+    def run(self):
+        """
+        Generator yielding the orders updated since the previous run,
+        as parsed `Order` records.
+        """
+        state = self.store.get(self.key) or {}
+        if state.get('next_token'):
+            response = self._resume(state)
+        else:
+            state = self._open_window(state)
+            if state is None:
+                return
+            response = self._list_orders(state)
+
+        while True:
+            for order in self._changed_orders(response, state):
+                yield order
+            state['next_token'] = self.orders_api._get_next_token(response)
+            if state['next_token'] is None:
+                break
+            self.store.set(self.key, state)
+            response = self.orders_api.list_orders(next_token=state['next_token'])
+
+        self.store.set(self.key, {'after': state['before'], 'skip': state['boundary']})
+
+    def _open_window(self, state):
+        """
+        Returns the state of a new window following the saved one,
+        or None if it would be empty.
+        """
+        after = state.get('after')
+        if after is None:
+            if self.start is None:
+                raise MWSError("No saved progress for {}: give OrderSync a start date.".format(self.key))
+            after = self.start.strftime(_TIMESTAMP_FORMAT)
+        before = (self.utcnow() - self.lag).replace(microsecond=0)
+        if before <= parse_timestamp(after):
+            return None
+        return {
+            'after': after,
+            'before': before.strftime(_TIMESTAMP_FORMAT),
+            'next_token': None,
+            'skip': state.get('skip') or {},
+            'boundary': {},
+        }
+
+    def _list_orders(self, state):
+        return self.orders_api.list_orders(lastupdatedafter=state['after'],
+                                           lastupdatedbefore=state['before'],
+                                           **self.list_kwargs)
+
+    def _resume(self, state):
+        """
+        Requests the page of a saved next token, or, if Amazon no longer
+        accepts it, the first page of its window again.
+        """
+        try:
+            return self.orders_api.list_orders(next_token=state['next_token'])
+        except MWSError as error:
+            if parse_error(str(error))[0] not in EXPIRED_TOKEN_ERRORS:
+                raise
+        state['next_token'] = None
+        return self._list_orders(state)
+
+    def _changed_orders(self, response, state):
+        """
+        Yields the orders of a page, except those already listed at the end
+        of the previous window. Orders at the end of this window are
+        recorded in the state's "boundary" for the next one.
+        """
+        skip = state['skip']
+        boundary = state['boundary']
+        before = parse_timestamp(state['before'])
+        path = self.orders_api.RECORD_PATHS['ListOrders']
+        for order in utils.iterate_path(response.parsed, path):
+            order_id = order.getvalue('AmazonOrderId')
+            updated = order.getvalue('LastUpdateDate')
+            if updated is not None and skip.get(order_id) == updated:
+                continue
+            if updated is not None and parse_timestamp(updated) >= before:
+                boundary[order_id] = updated
+            yield order
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Client-side request throttling, following the MWS token bucket model.
+
+Every MWS operation has a maximum request quota (the bucket size) and a
+restore rate (one request added back to the bucket every so many seconds).
+Requests beyond the quota are rejected by Amazon with a `RequestThrottled` error.
+"""
+from __future__ import absolute_import
+
+import threading
+import time
+
+# Clock used to measure elapsed time: monotonic where available.
+_clock = getattr(time, 'monotonic', time.time)
+
+# Throttling limits of each Action, as documented by Amazon:
+# (maximum request quota, seconds to restore one request).
+# "...ByNextToken" actions not listed here share the quota of their base action.
+THROTTLE_LIMITS = {
+    # Feeds
+    'SubmitFeed': (15, 120.0),
+    'GetFeedSubmissionList': (10, 45.0),
+    'GetFeedSubmissionListByNextToken': (30, 2.0),
+    'GetFeedSubmissionCount': (10, 45.0),
+    'CancelFeedSubmissions': (10, 45.0),
+    'GetFeedSubmissionResult': (15, 60.0),
+    # Reports
+    'RequestReport': (15, 60.0),
+    'GetReportRequestList': (10, 45.0),
+    'GetReportRequestListByNextToken': (30, 2.0),
+    'GetReportRequestCount': (10, 45.0),
+    'CancelReportRequests': (10, 45.0),
+    'GetReportList': (10, 60.0),
+    'GetReportListByNextToken': (30, 2.0),
+    'GetReportCount': (10, 45.0),
+    'GetReport': (15, 60.0),
+    'ManageReportSchedule': (10, 45.0),
+    'GetReportScheduleList': (10, 45.0),
+    'GetReportScheduleCount': (10, 45.0),
+    'UpdateReportAcknowledgements': (10, 45.0),
+    # Orders
+    'ListOrders': (6, 60.0),
+    'ListOrderItems': (30, 2.0),
+    'GetOrder': (6, 60.0),
+    # Products
+    'ListMatchingProducts': (20, 5.0),
+    'GetMatchingProduct': (20, 0.5),
+    'GetMatchingProductForId': (20, 0.2),
+    'GetCompetitivePricingForSKU': (20, 0.1),
+    'GetCompetitivePricingForASIN': (20, 0.1),
+    'GetLowestOfferListingsForSKU': (20, 0.1),
+    'GetLowestOfferListingsForASIN': (20, 0.1),
+    'GetLowestPricedOffersForSKU': (10, 0.2),
+    'GetLowestPricedOffersForASIN': (10, 0.2),
+    'GetMyPriceForSKU': (20, 0.1),
+    'GetMyPriceForASIN': (20, 0.1),
+    'GetProductCategoriesForSKU': (20, 5.0),
+    'GetProductCategoriesForASIN': (20, 5.0),
+    # Sellers
+    'ListMarketplaceParticipations': (15, 60.0),
+    # Finances
+    'ListFinancialEventGroups': (30, 2.0),
+    'ListFinancialEvents': (30, 2.0),
+    # Fulfillment Inbound Shipment
+    'CreateInboundShipmentPlan': (30, 0.5),
+    'CreateInboundShipment': (30, 0.5),
+    'UpdateInboundShipment': (30, 0.5),
+    'GetPrepInstructionsForSKU': (30, 0.5),
+    'GetPrepInstructionsForASIN': (30, 0.5),
+    'GetPackageLabels': (30, 0.5),
+    'GetTransportContent': (30, 0.5),
+    'EstimateTransportRequest': (30, 0.5),
+    'VoidTransportRequest': (30, 0.5),
+    'GetBillOfLading': (30, 0.5),
+    'ListInboundShipments': (30, 0.5),
+    'ListInboundShipmentItems': (30, 0.5),
+    # Fulfillment Inventory
+    'ListInventorySupply': (30, 0.5),
+    # Recommendations
+    'GetLastUpdatedTimeForRecommendations': (5, 2.0),
+    'ListRecommendations': (5, 2.0),
+    # Merchant Fulfillment
+    'GetEligibleShippingServices': (10, 0.2),
+    'CreateShipment': (10, 0.2),
+    'GetShipment': (10, 0.2),
+    'CancelShipment': (10, 0.2),
+    # Every API section
+    'GetServiceStatus': (2, 300.0),
+}
+
+
+class TokenBucket(object):
+    """
+    Thread-safe token bucket holding the remaining request quota of one Action.
+
+    Requests are never refused: each call to `reserve` takes a token,
+    possibly in advance, and returns how long the caller must wait
+    before that token is actually available. Concurrent callers are
+    therefore queued one restore interval apart.
+    """
+    def __init__(self, max_quota, restore_interval, clock=_clock):
+        self.max_quota = max_quota
+        self.restore_interval = float(restore_interval)
+        self._clock = clock
+        self._tokens = float(max_quota)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Takes one request from the bucket.
+        Returns the number of seconds to wait before sending it.
+        """
+        with self._lock:
+            now = self._clock()
+            restored = (now - self._updated) / self.restore_interval
+            self._tokens = min(self.max_quota, self._tokens + restored)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens * self.restore_interval
+
+    def available(self):
+        """
+        Returns the number of requests that can be sent right away, without reserving any.
+        """
+        with self._lock:
+            restored = (self._clock() - self._updated) / self.restore_interval
+            return min(self.max_quota, self._tokens + restored)
+
+
+class Throttle(object):
+    """
+    Request scheduler delaying calls just enough to stay within the MWS
+    quota of each Action.
+
+    Quotas are tracked per seller account, so one Throttle can be shared by
+    every API instance (and thread) using the same seller credentials:
+
+        throttle = Throttle()
+        orders_api = Orders(access_key, secret_key, account_id, throttle=throttle)
+        products_api = Products(access_key, secret_key, account_id, throttle=throttle)
+
+    `limits` may override or extend THROTTLE_LIMITS, as a dict of
+    {action: (max_quota, restore_interval_seconds)}.
+    Actions without known limits are not throttled.
+    """
+    def __init__(self, limits=None, sleep=time.sleep, clock=_clock):
+        self.limits = dict(THROTTLE_LIMITS)
+        self.limits.update(limits or {})
+        self._sleep = sleep
+        self._clock = clock
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _limit_key(self, action):
+        """
+        Returns the action whose quota applies to `action`, or None.
+        """
+        if action in self.limits:
+            return action
+        if action.endswith('ByNextToken') and action[:-len('ByNextToken')] in self.limits:
+            return action[:-len('ByNextToken')]
+        return None
+
+    def bucket(self, seller_id, action):
+        """
+        Returns the TokenBucket for an action of the given seller,
+        or None if the action has no known limits.
+        """
+        limit_key = self._limit_key(action)
+        if limit_key is None:
+            return None
+        key = (seller_id, limit_key)
+        with self._lock:
+            if key not in self._buckets:
+                max_quota, restore_interval = self.limits[limit_key]
+                self._buckets[key] = TokenBucket(max_quota, restore_interval, clock=self._clock)
+            return self._buckets[key]
+
+    def reserve(self, seller_id, action):
+        """
+        Reserves a request for the action and returns
+        the number of seconds to wait before sending it.
+        """
+        bucket = self.bucket(seller_id, action)
+        if bucket is None:
+            return 0.0
+        return bucket.reserve()
+
+    def available(self, seller_id, action):
+        """
+        Returns the number of requests for the action that can be sent
+        right away (infinity for actions without known limits).
+        """
+        bucket = self.bucket(seller_id, action)
+        if bucket is None:
+            return float('inf')
+        return bucket.available()
+
+    def wait(self, seller_id, action):
+        """
+        Blocks until a request for the action can be sent.
+        Returns the number of seconds waited.
+        """
+        delay = self.reserve(seller_id, action)
+        if delay > 0:
+            self._sleep(delay)
+        return delay
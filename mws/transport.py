@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP transport used by the MWS API classes to talk to Amazon.
+"""
+from __future__ import absolute_import
+
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+
+class ClosingHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter closing each connection once its response is read: the
+    connection goes back to the pool closed, and the next request through
+    it opens a new socket instead of reusing one the server may have dropped.
+    """
+    def build_response(self, req, resp):
+        connection, release = resp.connection, resp.release_conn
+
+        def release_conn():
+            if connection is not None:
+                connection.close()
+            release()
+
+        resp.release_conn = release_conn
+        return super(ClosingHTTPAdapter, self).build_response(req, resp)
+
+
+class Transport(object):
+    """
+    Pooled, keep-alive HTTP transport backed by a `requests.Session`.
+
+    Every MWS API instance owns a Transport by default, so repeated calls reuse
+    the same TCP+TLS connection instead of opening a new one per request.
+    A single Transport can also be passed to several API instances
+    (`Orders`, `Reports`, `Products`...) so that they share one connection pool.
+
+    Example:
+        transport = Transport(pool_maxsize=20, connect_timeout=5, read_timeout=60)
+        orders_api = Orders(access_key, secret_key, account_id, transport=transport)
+        reports_api = Reports(access_key, secret_key, account_id, transport=transport)
+    """
+    def __init__(self, pool_connections=10, pool_maxsize=10, pool_block=False,
+                 connect_timeout=None, read_timeout=None, keep_alive=True):
+        """
+        `pool_connections` is the number of hosts to keep pools for, and
+        `pool_maxsize` the number of connections kept alive per host.
+        `connect_timeout` and `read_timeout` are in seconds; None waits forever.
+        With `keep_alive=False`, connections are closed after every request.
+        """
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.keep_alive = keep_alive
+        self.session = Session()
+        adapter_class = HTTPAdapter if keep_alive else ClosingHTTPAdapter
+        adapter = adapter_class(pool_connections=pool_connections,
+                                pool_maxsize=pool_maxsize,
+                                pool_block=pool_block)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+
+    @property
+    def timeout(self):
+        """
+        Timeout tuple in the form `requests` expects: (connect, read).
+        """
+        return (self.connect_timeout, self.read_timeout)
+
+    def request(self, method, url, data=None, headers=None, stream=False):
+        """
+        Sends a single HTTP request through the pooled session and
+        returns the `requests.Response` object.
+        """
+        return self.session.request(method, url, data=data, headers=headers,
+                                    timeout=self.timeout, stream=stream)
+
+    def close(self):
+        """
+        Closes every pooled connection.
+        """
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
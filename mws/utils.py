@@ -7,10 +7,27 @@ Borrowed from https://github.com/timotheus/ebaysdk-python
 @author: pierre
 """
 from __future__ import absolute_import
+from collections import deque
 from functools import wraps
+import itertools
+import os
 import re
 import datetime
 import xml.etree.ElementTree as ET
+from xml.parsers import expat
+
+try:
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+except ImportError:  # Python 2 without the `futures` backport
+    ThreadPoolExecutor = None
+
+try:
+    text_type = unicode  # Python 2
+except NameError:
+    text_type = str
+
+# Atomic rename, replacing the destination (os.rename does on POSIX only).
+replace_file = getattr(os, 'replace', os.rename)
 
 
 class ObjectDict(dict):
@@ -48,8 +65,16 @@ class ObjectDict(dict):
     def getvalue(self, item, value=None):
         """
         Old Python 2-compatible getter method for default value.
+        Children parsed as plain strings (text-only elements of compact
+        results) are their own value.
         """
-        return self.get(item, {}).get('value', value)
+        node = self.get(item, {})
+        if isinstance(node, (str, text_type)):
+            return node
+        return node.get('value', value)
+
+
+_namespaced_tag = re.compile(r"\{(.*)\}(.*)").search
 
 
 class XML2Dict(object):
@@ -86,7 +111,7 @@ class XML2Dict(object):
         ns = http://cs.sfsu.edu/csc867/myscheduler
         name = patients
         """
-        result = re.compile(r"\{(.*)\}(.*)").search(tag)
+        result = _namespaced_tag(tag)
         if result:
             value.namespace, tag = result.groups()
 
@@ -108,6 +133,345 @@ class XML2Dict(object):
         return ObjectDict({root_tag: root_tree})
 
 
+class CompactNode(object):
+    """
+    Base of the compact result nodes built with `parse_xml(..., compact=True)`.
+
+    Each element becomes an instance of a `__slots__` class generated for its
+    tag and set of children (see `compact_class`), so the many records of a
+    page share one class and carry no per-instance dict. Text-only elements
+    and attributes are plain strings; repeated children are lists.
+
+    Children are read as attributes, like ObjectDict ones:
+        order.AmazonOrderId, order.OrderTotal.Amount
+    Item access, `get`, `keys`, `items` and `getvalue` also work, with the
+    children sorted by name. Children whose names are not identifiers, or
+    clash with a method (`items`, `keys`...), are read by item access.
+    """
+    __slots__ = ()
+    # Names of the children, in slot order, and the slot of each.
+    _fields = ()
+    _slot_names = {}
+
+    def __init__(self, *values):
+        for key, value in zip(self.__slots__, values):
+            setattr(self, key, value)
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, self._slot_names[key])
+        except (KeyError, AttributeError):
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        slot = self._slot_names.get(key)
+        return default if slot is None else getattr(self, slot, default)
+
+    def getvalue(self, item, value=None):
+        """
+        Same as `ObjectDict.getvalue`: the text of child `item`, or `value`.
+        """
+        node = self.get(item)
+        if isinstance(node, CompactNode):
+            return node.get('value', value)
+        return value if node is None else node
+
+    def keys(self):
+        return list(self._fields)
+
+    def items(self):
+        return [(key, getattr(self, slot)) for key, slot in zip(self._fields, self.__slots__)]
+
+    def __contains__(self, key):
+        return key in self._slot_names
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __eq__(self, other):
+        return isinstance(other, CompactNode) and self.items() == other.items()
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, ', '.join(
+            '{}={!r}'.format(key, value) for key, value in self.items()))
+
+    def _asdict(self):
+        return ObjectDict(self.items())
+
+
+# Generated CompactNode classes, by tag and sorted field names. Documents with
+# ever-changing shapes cannot grow it for good: it is emptied once full.
+_compact_classes = {}
+COMPACT_CLASSES_MAX = 4096
+_non_identifier = re.compile(r'\W|^(?=\d)', re.UNICODE)
+# Slot names that would hide the attributes of CompactNode.
+_reserved_slots = frozenset(dir(CompactNode))
+
+
+def _identifier(name):
+    return str(_non_identifier.sub('_', name))
+
+
+def _slot_names(fields):
+    """
+    Returns a distinct identifier for each field, adding underscores to those
+    that clash with a CompactNode attribute or with another field once mangled.
+    """
+    slots = []
+    for field in fields:
+        slot = _identifier(field)
+        while slot in _reserved_slots or slot in slots:
+            slot += '_'
+        slots.append(slot)
+    return tuple(slots)
+
+
+def compact_class(tag, fields):
+    """
+    Returns the CompactNode subclass for elements named `tag`
+    holding the `fields` children and attributes, a sorted tuple,
+    generating it the first time.
+    """
+    key = (tag, fields)
+    try:
+        return _compact_classes[key]
+    except KeyError:
+        slots = _slot_names(fields)
+        cls = type(_identifier(tag), (CompactNode,), {
+            '__slots__': slots,
+            '_fields': fields,
+            '_slot_names': dict(zip(fields, slots)),
+        })
+        if len(_compact_classes) >= COMPACT_CLASSES_MAX:
+            _compact_classes.clear()
+        _compact_classes[key] = cls
+        return cls
+
+
+# Namespace prefixes stripped from tag and attribute names,
+# as well as those of the default namespace.
+STRIPPED_PREFIXES = ('ns2', 'xml')
+
+
+class ObjectDictBuilder(object):
+    """
+    Builds nested ObjectDicts from expat parser events, in a single pass.
+
+    The result has the shape XML2Dict gives for a document whose namespaces were
+    removed with `remove_namespace`: text before the first child goes in 'value',
+    attributes are ObjectDicts holding a 'value' and repeated children become lists.
+    Names in the default namespace or with a prefix of STRIPPED_PREFIXES have their
+    namespace dropped; other namespaced names keep it in a 'namespace' key.
+
+    With `compact`, elements are built as CompactNodes instead: attributes and
+    text-only elements are strings, and whitespace before the first child of
+    an element is dropped. The document root is still an ObjectDict.
+    """
+    def __init__(self, compact=False):
+        self.root = None
+        self.compact = compact
+        # Compact nodes are built from plain dicts, which are quicker to make.
+        self._new_node = dict if compact else ObjectDict
+        # One [tag, node, namespace, attributes, text parts] list per open element.
+        # Text parts become None once the text before the first child is saved.
+        self._stack = []
+        self._names = {}
+
+    def create_parser(self):
+        parser = expat.ParserCreate(namespace_separator=' ')
+        parser.namespace_prefixes = True
+        parser.buffer_text = True
+        parser.ordered_attributes = True
+        parser.StartElementHandler = self.start
+        parser.EndElementHandler = self.end
+        parser.CharacterDataHandler = self.data
+        return parser
+
+    def _split(self, name):
+        """
+        Returns the local name and the kept namespace of an expat
+        "uri local prefix" name, caching the result: names repeat a lot.
+        """
+        try:
+            return self._names[name]
+        except KeyError:
+            parts = name.split(' ')
+            if len(parts) == 3 and parts[2] not in STRIPPED_PREFIXES:
+                split = (parts[1], parts[0])
+            else:
+                split = (parts[1] if len(parts) > 1 else name, None)
+            self._names[name] = split
+            return split
+
+    def _flush(self, frame, has_children=False):
+        """
+        Saves the text and attributes of an element, once its first child starts or it ends.
+        """
+        node, attributes, texts = frame[1], frame[3], frame[4]
+        if texts:
+            text = ''.join(texts)
+            if not (self.compact and has_children and text.isspace()):
+                node['value'] = text
+        for index in range(0, len(attributes), 2):
+            key, namespace = self._split(attributes[index])
+            if self.compact:
+                node[key] = attributes[index + 1]
+                continue
+            value = ObjectDict({'value': attributes[index + 1]})
+            if namespace is not None:
+                value['namespace'] = namespace
+            node[key] = value
+        frame[4] = None
+
+    def start(self, name, attributes):
+        if self._stack and self._stack[-1][4] is not None:
+            self._flush(self._stack[-1], has_children=True)
+        tag, namespace = self._split(name)
+        self._stack.append([tag, self._new_node(), namespace, attributes, []])
+
+    def data(self, text):
+        texts = self._stack[-1][4]
+        if texts is not None:
+            texts.append(text)
+
+    def end(self, name):
+        tag, node = self._close()
+        if self._stack:
+            self.add_child(self._stack[-1][1], tag, node)
+        else:
+            self.root = ObjectDict({tag: node})
+
+    def _close(self):
+        """
+        Completes the innermost open element and removes it from the stack.
+        Returns its tag and node.
+        """
+        frame = self._stack.pop()
+        if frame[4] is not None:
+            self._flush(frame)
+        tag, node, namespace = frame[0], frame[1], frame[2]
+        if namespace is not None:
+            node['namespace'] = namespace
+        if self.compact:
+            node = self._compact(tag, node) if self._stack else ObjectDict(node)
+        return tag, node
+
+    @staticmethod
+    def _compact(tag, node):
+        """
+        Turns the ObjectDict of an element into a string or a CompactNode.
+        """
+        if len(node) == 1 and 'value' in node:
+            return node['value']
+        fields = tuple(sorted(node))
+        return compact_class(tag, fields)(*[node[field] for field in fields])
+
+    @staticmethod
+    def add_child(parent, tag, node):
+        if tag not in parent:  # the first time, so store it in dict
+            parent[tag] = node
+            return
+        old = parent[tag]
+        if not isinstance(old, list):
+            parent[tag] = old = [old]  # multi times, so change old dict to a list
+        old.append(node)
+
+
+class RecordBuilder(ObjectDictBuilder):
+    """
+    ObjectDictBuilder setting aside the records found at `path` as soon as
+    they are complete, instead of attaching them to the tree: with a parser
+    fed chunk by chunk, only one record at a time is held in memory.
+
+    `path` lists the tags from the document root down to the records,
+    None or '*' matching any tag, e.g.
+    [None, 'ListOrdersResult', 'Orders', 'Order'].
+    Completed records are returned by `pop_records`; the rest of the document
+    (NextToken...) is built in `root` as usual.
+    """
+    def __init__(self, path, compact=False):
+        super(RecordBuilder, self).__init__(compact)
+        self.path = [None if tag == '*' else tag for tag in path]
+        self.records = []
+        # Whether each open element lies on the path, and the depth of the records.
+        self._on_path = []
+        self._depth = len(self.path) - 1
+
+    def start(self, name, attributes):
+        super(RecordBuilder, self).start(name, attributes)
+        depth = len(self._stack) - 1
+        pattern = self.path[depth] if depth <= self._depth else False
+        self._on_path.append(
+            (depth == 0 or self._on_path[-1]) and
+            (pattern is None or pattern == self._stack[-1][0])
+        )
+
+    def end(self, name):
+        if self._on_path.pop() and len(self._stack) - 1 == self._depth:
+            self.records.append(self._close()[1])
+        else:
+            super(RecordBuilder, self).end(name)
+
+    def pop_records(self):
+        """
+        Returns the records completed since the last call.
+        """
+        records, self.records = self.records, []
+        return records
+
+    def iterparse(self, chunks):
+        """
+        Generator parsing a document from an iterable of byte chunks,
+        yielding each record as soon as the chunk completing it is parsed.
+        Raises `xml.etree.ElementTree.ParseError` for malformed documents.
+        """
+        parser = self.create_parser()
+        try:
+            for chunk in chunks:
+                parser.Parse(chunk, False)
+                for record in self.pop_records():
+                    yield record
+            parser.Parse(b'', True)
+        except expat.ExpatError as exc:
+            raise _parse_error(exc)
+        for record in self.pop_records():
+            yield record
+
+
+def _parse_error(exc):
+    """
+    Turns an ExpatError into the ParseError ElementTree raises.
+    """
+    error = ET.ParseError("{}: line {}, column {}".format(
+        expat.ErrorString(exc.code), exc.lineno, exc.offset))
+    error.code = exc.code
+    error.position = (exc.lineno, exc.offset)
+    return error
+
+
+def parse_xml(data, compact=False):
+    """
+    Parses an XML document, bytes or text, to nested ObjectDicts, in a single pass,
+    stripping namespaces on the fly (see ObjectDictBuilder).
+    With `compact`, elements below the root are CompactNodes.
+    Raises `xml.etree.ElementTree.ParseError` for malformed documents.
+    """
+    builder = ObjectDictBuilder(compact)
+    try:
+        builder.create_parser().Parse(data, True)
+    except expat.ExpatError as exc:
+        raise _parse_error(exc)
+    return builder.root
+
+
 def enumerate_param(param, values):
     """
     Builds a dictionary of an enumerated parameter, using the param string and some values.
@@ -277,10 +641,119 @@ def next_token_action(action_name):
                 # Token captured: run the "next" action.
                 return self.action_by_next_token(action_name, next_token)
             return request_func(self, *args, **kwargs)
+        # Lets `MWS.paginate` recognise methods that accept a `next_token`.
+        _wrapped_func.next_token_action_name = action_name
         return _wrapped_func
     return _decorator
 
 
+def iterate_path(node, path):
+    """
+    Generator yielding every node found at a dotted `path` below `node`,
+    a parsed response (nested ObjectDicts).
+
+    Lists met along the way (repeated XML elements) are walked item by item,
+    so a single child and several children are both yielded one by one.
+    A '*' path segment matches every child element of a node.
+
+    Example:
+        iterate_path(response.parsed, 'Orders.Order')
+    Yields:
+        each Order ObjectDict, whether the page holds one order or many.
+    """
+    if isinstance(node, list):
+        for item in node:
+            for found in iterate_path(item, path):
+                yield found
+        return
+    if not path:
+        yield node
+        return
+    if not isinstance(node, (dict, CompactNode)):
+        return
+    key, _, rest = path.partition('.')
+    if key == '*':
+        # 'value' holds the (usually whitespace) text of the node itself.
+        children = [child for name, child in node.items() if name != 'value']
+    else:
+        children = [node[key]] if key in node else []
+    for child in children:
+        for found in iterate_path(child, rest):
+            yield found
+
+
+def unique(values):
+    """
+    Returns the distinct values of an iterable, as a list, in the order first seen.
+    """
+    seen = set()
+    return [value for value in values if not (value in seen or seen.add(value))]
+
+
+def chunks(values, size):
+    """
+    Generator splitting an iterable into lists of at most `size` values.
+
+    Example:
+        chunks(['a', 'b', 'c'], 2)
+    Yields:
+        ['a', 'b'], then ['c']
+    """
+    values = iter(values)
+    while True:
+        chunk = list(itertools.islice(values, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def concurrent_map(func, items, max_workers=4, ordered=True):
+    """
+    Generator calling `func` on every item of an iterable from a pool of
+    `max_workers` threads, yielding (item, result) pairs: in the order of
+    `items`, or as soon as each call completes with `ordered=False`.
+
+    Items are consumed lazily: at most twice `max_workers` calls are
+    pending at once, so `items` may be a long or endless stream.
+    An exception raised by `func` is raised again when its result is due.
+    Calls are made one after the other when `max_workers` is 1 or
+    `concurrent.futures` is not available.
+    """
+    items = iter(items)
+    if ThreadPoolExecutor is None or max_workers <= 1:
+        for item in items:
+            yield item, func(item)
+        return
+
+    window = max_workers * 2
+    with ThreadPoolExecutor(max_workers) as executor:
+        pending = deque((executor.submit(func, item), item) for item in itertools.islice(items, window))
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                finished = wait([future for future, _ in pending], return_when=FIRST_COMPLETED)[0]
+                done = [entry for entry in pending if entry[0] in finished]
+                pending = deque(entry for entry in pending if entry[0] not in finished)
+            for future, item in done:
+                yield item, future.result()
+            pending.extend((executor.submit(func, item), item) for item in itertools.islice(items, len(done)))
+
+
+def is_path(source):
+    """
+    Returns True if a report or feed source is a file path rather than
+    content: a string (text, or a Python 2 `str`) naming an existing file.
+    Content holding a line break is never taken for a path.
+    """
+    if not isinstance(source, (str, text_type)) or '\n' in source:
+        return False
+    try:
+        return os.path.isfile(source)
+    except (TypeError, ValueError):
+        return False
+
+
 # DEPRECATION: these are old names for these objects, which have been updated
 # to more idiomatic naming convention. Leaving these names in place in case
 # anyone is using the old object names.
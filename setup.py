@@ -17,10 +17,16 @@ setup(
     url="http://github.com/jameshiew/mws",
     description=short_description,
     long_description=long_description,
-    packages=['mws'],
+    packages=['mws', 'mws.aio'],
     install_requires=[
         'requests',
     ],
+    extras_require={
+        # asyncio client, Python 3.6+ only
+        'aio': ['aiohttp>=3.0'],
+        # NumPy-backed columns in mws.pricing
+        'numpy': ['numpy'],
+    },
     classifiers=[
         'Development Status :: 2 - Pre-Alpha',
         'Environment :: Web Environment',
@@ -1,4 +1,13 @@
+import io
+import sys
+
 import pytest
+from requests.models import Response
+
+try:
+    from urllib.parse import parse_qsl, urlparse
+except ImportError:
+    from urlparse import parse_qsl, urlparse
 
 
 @pytest.fixture
@@ -29,3 +38,73 @@ def credentials(access_key, secret_key, account_id):
         "secret_key": secret_key,
         "account_id": account_id,
     }
+
+
+class FakeTransport(object):
+    """
+    Stand-in for `mws.Transport` that records every request made
+    and answers with queued responses, in order.
+    """
+    def __init__(self):
+        self.requests = []
+        self.responses = []
+        self.responder = None
+
+    @staticmethod
+    def make_response(body, status_code=200, headers=None):
+        response = Response()
+        response.status_code = status_code
+        response.headers.update(headers or {})
+        response.raw = io.BytesIO(body)
+        return response
+
+    def add_response(self, body, status_code=200, headers=None):
+        response = self.make_response(body, status_code, headers)
+        self.responses.append(response)
+        return response
+
+    def add_error(self, error):
+        """
+        Queues an exception, raised by the request it answers.
+        """
+        self.responses.append(error)
+
+    def respond_with(self, responder):
+        """
+        Answers every request with the body `responder` returns for its query params,
+        whatever the order requests are made in (e.g. from several threads).
+        The responder may also return a (body, status_code) pair.
+        """
+        self.responder = responder
+
+    def request(self, method, url, data=None, headers=None, stream=False):
+        query = dict(parse_qsl(urlparse(url).query))
+        self.requests.append({
+            'method': method,
+            'url': url,
+            'params': query,
+            'data': data,
+            'headers': headers,
+        })
+        if self.responder is not None:
+            answer = self.responder(query)
+            return self.make_response(*answer) if isinstance(answer, tuple) else self.make_response(answer)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    @property
+    def actions(self):
+        return [req['params']['Action'] for req in self.requests]
+
+
+@pytest.fixture
+def transport():
+    """Fake transport answering with queued responses"""
+    return FakeTransport()
+
+
+if sys.version_info < (3, 6):
+    # asyncio client tests use async/await syntax
+    collect_ignore = ['test_aio.py']
@@ -0,0 +1,211 @@
+"""
+Testing the asyncio API classes in `mws.aio`.
+"""
+import asyncio
+from urllib.parse import parse_qsl, urlparse
+
+import pytest
+
+import mws
+import mws.aio
+from .test_backfill import END, START, order_dates, render_orders, window_responder
+from .test_bulk import get_order, matching_product
+from .test_order_items import order_items
+from .test_pagination import orders_page
+from .test_retry import THROTTLED
+from .test_transport import SERVICE_STATUS, stub_domain, stub_server  # noqa: F401
+# pylint: disable=invalid-name
+
+pytest.importorskip('aiohttp')
+
+
+class FakeAsyncResponse(object):
+    charset = 'utf-8'
+
+    def __init__(self, body, status=200, headers=None):
+        self.body = body
+        self.status = status
+        self.headers = headers or {}
+
+
+class FakeAsyncTransport(object):
+    """
+    Async counterpart of the `transport` fixture, answering with queued responses.
+    """
+    def __init__(self):
+        self.requests = []
+        self.responses = []
+        self.responder = None
+
+    def add_response(self, body, status=200, headers=None):
+        self.responses.append(FakeAsyncResponse(body, status, headers))
+
+    async def request(self, method, url, data=None, headers=None, stream_to=None):
+        self.requests.append(url)
+        await asyncio.sleep(0)
+        if self.responder is not None:
+            response = FakeAsyncResponse(self.responder(dict(parse_qsl(urlparse(url).query))))
+        else:
+            response = self.responses.pop(0)
+        return response, response.body
+
+
+def run(coroutine):
+    return asyncio.get_event_loop_policy().new_event_loop().run_until_complete(coroutine)
+
+
+@pytest.fixture
+def async_transport():
+    return FakeAsyncTransport()
+
+
+def test_every_api_class_is_mirrored():
+    for name in mws.mws.__all__:
+        cls = getattr(mws.mws, name)
+        if isinstance(cls, type) and issubclass(cls, mws.mws.MWS):
+            assert issubclass(getattr(mws.aio, name), cls)
+
+
+def test_api_methods_return_coroutines(credentials, async_transport):
+    orders_api = mws.aio.Orders(transport=async_transport, **credentials)
+    async_transport.add_response(orders_page(['1']))
+    coroutine = orders_api.list_orders(created_after='2017-01-01')
+    assert asyncio.iscoroutine(coroutine)
+    response = run(coroutine)
+    assert response.parsed.Orders.Order.AmazonOrderId == '1'
+    assert 'Action=ListOrders' in async_transport.requests[0]
+    assert 'CreatedAfter=2017-01-01' in async_transport.requests[0]
+
+
+def test_async_pagination(credentials, async_transport):
+    orders_api = mws.aio.Orders(transport=async_transport, **credentials)
+    async_transport.add_response(orders_page(['1', '2'], next_token='abc'))
+    async_transport.add_response(orders_page(['3'], action='ListOrdersByNextToken'))
+
+    async def collect():
+        return [order.AmazonOrderId async for order in orders_api.iter_records(orders_api.list_orders)]
+
+    assert run(collect()) == ['1', '2', '3']
+    assert 'Action=ListOrdersByNextToken' in async_transport.requests[1]
+
+
+def test_async_retry_and_throttle(credentials, async_transport):
+    throttle = mws.Throttle(limits={'ListOrders': (1, 0.01)})
+    retry = mws.RetryPolicy(backoff_base=0.01)
+    orders_api = mws.aio.Orders(transport=async_transport, throttle=throttle, retry=retry, **credentials)
+    async_transport.add_response(THROTTLED, status=503)
+    async_transport.add_response(orders_page(['1']))
+    response = run(orders_api.list_orders())
+    assert response.retries == 1
+    assert response.backoff_time > 0
+
+
+def test_async_error_raises_mws_error(credentials, async_transport):
+    orders_api = mws.aio.Orders(transport=async_transport, **credentials)
+    async_transport.add_response(THROTTLED, status=503)
+    with pytest.raises(mws.MWSError) as excinfo:
+        run(orders_api.list_orders())
+    assert 'RequestThrottled' in str(excinfo.value)
+
+
+def test_async_transport_against_stub_server(credentials, stub_server):  # noqa: F811
+    async def call():
+        async with mws.aio.AsyncTransport() as transport:
+            orders_api = mws.aio.Orders(domain=stub_domain(stub_server), transport=transport, **credentials)
+            responses = await asyncio.gather(*[orders_api.get_service_status() for _ in range(5)])
+        return responses
+
+    responses = run(call())
+    assert [response.parsed.Status for response in responses] == ['GREEN'] * 5
+    assert responses[0].original == SERVICE_STATUS.decode()
+
+
+def test_async_report_streamed_to_file(credentials, stub_server, tmpdir):  # noqa: F811
+    path = str(tmpdir.join('report.xml'))
+
+    async def call():
+        async with mws.aio.AsyncTransport() as transport:
+            reports_api = mws.aio.Reports(domain=stub_domain(stub_server), transport=transport, **credentials)
+            return await reports_api.get_report('1234', stream_to=path)
+
+    response = run(call())
+    assert isinstance(response, mws.mws.StreamWrapper)
+    assert response.parsed == path
+    assert response.size == len(SERVICE_STATUS)
+    with open(path, 'rb') as report:
+        assert report.read() == SERVICE_STATUS
+
+
+def test_async_feed_uploaded_in_chunks(credentials, stub_server):  # noqa: F811
+    chunks = [b'<Message>%d</Message>' % n for n in range(1000)]
+
+    async def call():
+        async with mws.aio.AsyncTransport() as transport:
+            feeds_api = mws.aio.Feeds(domain=stub_domain(stub_server), transport=transport, **credentials)
+            await feeds_api.submit_feed(iter(chunks), '_POST_PRODUCT_DATA_')
+
+    run(call())
+    (headers, body), = stub_server.uploads
+    assert body == b''.join(chunks)
+    assert headers['Content-Length'] == str(len(body))
+    assert headers['Content-MD5'] == mws.mws.calc_md5(body).decode()
+
+
+def test_async_bulk(credentials, async_transport):
+    products_api = mws.aio.Products(transport=async_transport, **credentials)
+    async_transport.responder = matching_product
+    asins = ['B{:09d}'.format(n) for n in range(15)]
+    results = run(products_api.bulk('get_matching_product', asins + asins[:3], marketplaceid='ATVPDKIKX0DER'))
+    assert list(results) == asins
+    assert results['B000000014'].Product.Title == 'B000000014'
+    assert len(async_transport.requests) == 2
+
+
+def test_async_get_orders_bulk(credentials, async_transport):
+    orders_api = mws.aio.Orders(transport=async_transport, **credentials)
+    async_transport.responder = get_order
+    order_ids = ['{:03d}'.format(n) for n in range(60)] + ['X-MISSING']
+
+    async def collect():
+        return [pair async for pair in orders_api.get_orders_bulk(order_ids)]
+
+    pairs = run(collect())
+    assert [order_id for order_id, _ in pairs] == order_ids
+    assert pairs[-1] == ('X-MISSING', None)
+    assert len(async_transport.requests) == 2
+
+
+def test_async_order_items_from_async_stream(credentials, async_transport):
+    orders_api = mws.aio.Orders(transport=async_transport, **credentials)
+    async_transport.responder = order_items
+
+    async def order_ids():
+        for order_id in ['3', '1', '4']:
+            yield order_id
+
+    async def collect():
+        return [(order, [item.OrderItemId for item in items])
+                async for order, items in orders_api.iter_order_items(order_ids(), ordered=True)]
+
+    assert run(collect()) == [('3', ['3-0', '3-1', '3-2']), ('1', ['1-0']), ('4', ['4-0', '4-1', '4-2', '4-3'])]
+
+
+def test_async_backfill(credentials, async_transport):
+    orders_api = mws.aio.Orders(transport=async_transport, **credentials)
+    async_transport.responder = window_responder(
+        [(date, order_id) for order_id, date in order_dates().items()], 'CreatedAfter', 'CreatedBefore', render_orders)
+
+    async def collect():
+        return [order.AmazonOrderId async for order in orders_api.backfill(orders_api.list_orders, START, END)]
+
+    assert sorted(run(collect())) == sorted(order_dates())
+
+
+def test_async_cache(credentials, async_transport):
+    products_api = mws.aio.Products(transport=async_transport, cache=mws.MemoryCache(), **credentials)
+    async_transport.responder = matching_product
+    run(products_api.get_matching_product('ATVPDKIKX0DER', ['B1']))
+    response = run(products_api.get_matching_product('ATVPDKIKX0DER', ['B1']))
+    assert response.cached
+    assert response.parsed.Product.Title == 'B1'
+    assert len(async_transport.requests) == 1
@@ -0,0 +1,141 @@
+"""
+Testing the date-partitioned `MWS.backfill`.
+"""
+import datetime
+
+import pytest
+
+import mws
+from .test_pagination import ORDERS_PAGE
+# pylint: disable=invalid-name
+
+EVENTS_PAGE = """<?xml version="1.0"?>
+<{action}Response xmlns="http://mws.amazonservices.com/Finances/2015-05-01">
+  <{action}Result>
+    {token}
+    <FinancialEvents><ShipmentEventList>{events}</ShipmentEventList></FinancialEvents>
+  </{action}Result>
+</{action}Response>"""
+
+START = datetime.datetime(2017, 1, 1)
+END = datetime.datetime(2017, 1, 9)
+
+
+def order_dates():
+    """
+    One order a day, 40 on January 3rd, and one at the bound
+    of the windows of January 4th and 5th.
+    """
+    dates = {}
+    for day in range(1, 9):
+        dates['D{}'.format(day)] = '2017-01-0{}T12:00:00Z'.format(day)
+    for minute in range(40):
+        dates['B{:02d}'.format(minute)] = '2017-01-03T08:{:02d}:00.000Z'.format(minute)
+    dates['EDGE'] = '2017-01-05T00:00:00Z'
+    return dates
+
+
+def window_responder(records, after_param, before_param, render):
+    """
+    Returns a responder listing the (date, record) pairs between two dates,
+    both included, two per page.
+    """
+    def respond(params):
+        if params['Action'].endswith('ByNextToken'):
+            after, before, page = params['NextToken'].split('|')
+            page = int(page)
+        else:
+            after, before, page = params[after_param], params[before_param], 0
+        matches = sorted(pair for pair in records if after <= pair[0][:19] + 'Z' <= before)
+        token = ''
+        if len(matches) > page * 2 + 2:
+            token = '<NextToken>{}|{}|{}</NextToken>'.format(after, before, page + 1)
+        return render(params['Action'], token, matches[page * 2:page * 2 + 2]).encode()
+    return respond
+
+
+def render_orders(action, token, matches):
+    orders = ''.join(
+        '<Order><AmazonOrderId>{}</AmazonOrderId><PurchaseDate>{}</PurchaseDate></Order>'.format(order_id, date)
+        for date, order_id in matches)
+    return ORDERS_PAGE.format(action=action, token=token, orders=orders)
+
+
+def render_events(action, token, matches):
+    events = ''.join(
+        '<ShipmentEvent><AmazonOrderId>{}</AmazonOrderId><PostedDate>{}</PostedDate></ShipmentEvent>'.format(
+            order_id, date)
+        for date, order_id in matches)
+    return EVENTS_PAGE.format(action=action, token=token, events=events)
+
+
+@pytest.fixture
+def orders_api(credentials, transport):
+    transport.respond_with(window_responder(
+        [(date, order_id) for order_id, date in order_dates().items()],
+        'CreatedAfter', 'CreatedBefore', render_orders))
+    return mws.Orders(transport=transport, **credentials)
+
+
+def test_backfill_yields_every_order_once(orders_api, transport):
+    orders = list(orders_api.backfill(orders_api.list_orders, START, END, marketplaceids=['ATVPDKIKX0DER']))
+    assert sorted(order.AmazonOrderId for order in orders) == sorted(order_dates())
+    first = transport.requests[0]['params']
+    assert first['MarketplaceId.Id.1'] == 'ATVPDKIKX0DER'
+    assert first['CreatedAfter'] == '2017-01-01T00:00:00Z'
+    assert first['CreatedBefore'] == '2017-01-02T00:00:00Z'
+
+
+def test_backfill_splits_busy_windows(orders_api, transport):
+    orders_api.BACKFILL_MIN_WINDOW = datetime.timedelta(hours=2)
+    orders = list(orders_api.backfill(orders_api.list_orders, START, END, max_workers=2))
+    assert sorted(order.AmazonOrderId for order in orders) == sorted(order_dates())
+    windows = [
+        (request['params']['CreatedAfter'], request['params']['CreatedBefore'])
+        for request in transport.requests if request['params']['Action'] == 'ListOrders']
+    # The first page of a busy window is kept: the rest of the window, after its last order, is split.
+    assert len(set(start for start, _ in windows)) == len(windows)
+    assert ('2017-01-03T08:01:00Z', '2017-01-04T04:00:30Z') in windows
+    assert ('2017-01-07T00:00:00Z', '2017-01-09T00:00:00Z') in windows
+    # The narrowest windows are paged with next tokens.
+    assert transport.actions.count('ListOrdersByNextToken') == 17
+
+
+def test_backfill_follows_tokens_of_pages_out_of_date_order(orders_api, transport):
+    def render_reversed(action, token, matches):
+        return render_orders(action, token, matches[::-1])
+
+    transport.respond_with(window_responder(
+        [(date, order_id) for order_id, date in order_dates().items()],
+        'CreatedAfter', 'CreatedBefore', render_reversed))
+    orders = list(orders_api.backfill(orders_api.list_orders, START, END, partitions=1))
+    assert sorted(order.AmazonOrderId for order in orders) == sorted(order_dates())
+    assert transport.actions.count('ListOrders') == 1
+
+
+def test_backfill_filters_by_other_dates(credentials, transport):
+    orders_api = mws.Orders(transport=transport, **credentials)
+    transport.respond_with(window_responder([('2017-01-02T00:00:00Z', '1')],
+                                            'LastUpdatedAfter', 'LastUpdatedBefore', render_orders))
+    orders = orders_api.backfill(orders_api.list_orders, START, END,
+                                 by=('lastupdatedafter', 'lastupdatedbefore', 'PurchaseDate', 'AmazonOrderId'))
+    assert [order.AmazonOrderId for order in orders] == ['1']
+
+
+def test_backfill_financial_events_keeps_identical_events_of_one_window(credentials, transport):
+    finances_api = mws.Finances(transport=transport, **credentials)
+    events = [('2017-01-02T00:00:00Z', 'A'), ('2017-01-02T00:00:00Z', 'A'), ('2017-01-06T10:00:00Z', 'B')]
+    transport.respond_with(window_responder(events, 'PostedAfter', 'PostedBefore', render_events))
+    records = list(finances_api.backfill(finances_api.list_financial_events, START, END))
+    assert sorted(event.AmazonOrderId for event in records) == ['A', 'A', 'B']
+
+
+def test_backfill_default_end_is_two_minutes_ago(orders_api, transport):
+    list(orders_api.backfill(orders_api.list_orders, datetime.datetime.utcnow() - datetime.timedelta(hours=1)))
+    end = mws.retry.parse_timestamp(transport.requests[0]['params']['CreatedBefore'])
+    assert datetime.timedelta(minutes=2) <= datetime.datetime.utcnow() - end < datetime.timedelta(minutes=3)
+
+
+def test_backfill_requires_a_date_filter(orders_api):
+    with pytest.raises(mws.MWSError):
+        next(orders_api.backfill(orders_api.list_order_items, START, END))
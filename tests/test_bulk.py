@@ -0,0 +1,135 @@
+"""
+Testing bulk ID-list requests and the concurrency helpers behind them.
+"""
+import threading
+import time
+
+import pytest
+
+import mws
+from mws import utils
+from .test_pagination import orders_page
+# pylint: disable=invalid-name
+
+MATCHING_PRODUCT = """<?xml version="1.0"?>
+<{action}Response xmlns="http://mws.amazonservices.com/schema/Products/2011-10-01">
+  {results}
+</{action}Response>"""
+
+
+def matching_product(params):
+    """
+    Answers a GetMatchingProduct or GetMatchingProductForId request
+    with one result per requested ID.
+    """
+    action = params['Action']
+    ids = [value for key, value in sorted(params.items()) if key.startswith(('ASINList.', 'IdList.'))]
+    attribute = 'Id' if action == 'GetMatchingProductForId' else 'ASIN'
+    results = ''.join(
+        '<{action}Result {attribute}="{id}" status="Success"><Product><Title>{id}</Title></Product></{action}Result>'
+        .format(action=action, attribute=attribute, id=id_)
+        for id_ in ids
+    )
+    return MATCHING_PRODUCT.format(action=action, results=results).encode()
+
+
+def test_unique_keeps_first_order():
+    assert utils.unique(['b', 'a', 'b', 'c', 'a']) == ['b', 'a', 'c']
+
+
+def test_chunks():
+    assert list(utils.chunks(iter(range(5)), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(utils.chunks([], 2)) == []
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+def test_concurrent_map_runs_in_parallel(ordered):
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def work(item):
+        with lock:
+            active.append(item)
+            peak.append(len(active))
+        time.sleep(0.01 * (5 - item))
+        with lock:
+            active.remove(item)
+        return item * 10
+
+    results = list(utils.concurrent_map(work, range(5), max_workers=5, ordered=ordered))
+    assert sorted(results) == [(n, n * 10) for n in range(5)]
+    assert max(peak) > 1
+    if ordered:
+        assert [item for item, _ in results] == list(range(5))
+    else:
+        # The slowest call, on the first item, completes last.
+        assert results[-1] == (0, 0)
+
+
+def test_concurrent_map_raises_errors():
+    def work(item):
+        if item == 3:
+            raise ValueError(item)
+        return item
+
+    with pytest.raises(ValueError):
+        list(utils.concurrent_map(work, range(10), max_workers=2))
+
+
+def test_bulk_dedupes_chunks_and_merges(credentials, transport):
+    products_api = mws.Products(transport=transport, **credentials)
+    transport.respond_with(matching_product)
+    asins = ['B{:09d}'.format(n) for n in range(23)] + ['B000000001']
+
+    results = products_api.bulk(products_api.get_matching_product, asins, marketplaceid='ATVPDKIKX0DER')
+
+    assert list(results) == asins[:23]
+    assert results['B000000007'].Product.Title == 'B000000007'
+    assert sorted(
+        len([key for key in request['params'] if key.startswith('ASINList.')])
+        for request in transport.requests
+    ) == [3, 10, 10]
+
+
+def test_bulk_matching_product_for_id_chunks_of_five(credentials, transport):
+    products_api = mws.Products(transport=transport, **credentials)
+    transport.respond_with(matching_product)
+    results = products_api.bulk('get_matching_product_for_id', ['1', '2', '3', '4', '5', '6'],
+                                marketplaceid='ATVPDKIKX0DER', type_='UPC', max_workers=1)
+    assert list(results) == ['1', '2', '3', '4', '5', '6']
+    assert transport.actions == ['GetMatchingProductForId'] * 2
+    assert transport.requests[0]['params']['IdType'] == 'UPC'
+
+
+def test_bulk_rejects_other_methods(credentials, transport):
+    products_api = mws.Products(transport=transport, **credentials)
+    with pytest.raises(mws.MWSError):
+        products_api.bulk(products_api.list_matching_products, ['a'])
+
+
+def get_order(params):
+    """
+    Answers a GetOrder request with the requested orders, except those starting with 'X'.
+    """
+    ids = [value for key, value in params.items() if key.startswith('AmazonOrderId.Id.')]
+    orders = [order_id for order_id in ids if not order_id.startswith('X')]
+    return orders_page(orders, action='GetOrder')
+
+
+def test_get_orders_bulk_ordered_with_missing_ids(credentials, transport):
+    orders_api = mws.Orders(transport=transport, **credentials)
+    transport.respond_with(get_order)
+    order_ids = ['{:03d}'.format(n) for n in range(120)]
+    order_ids[60] = 'X-MISSING'
+
+    pairs = list(orders_api.get_orders_bulk(order_ids + order_ids[:10]))
+
+    assert [order_id for order_id, _ in pairs] == order_ids
+    assert [order_id for order_id, order in pairs if order is None] == ['X-MISSING']
+    assert pairs[119][1].AmazonOrderId == '119'
+    assert transport.actions == ['GetOrder'] * 3
+    assert sorted(
+        len([key for key in request['params'] if key.startswith('AmazonOrderId.Id.')])
+        for request in transport.requests
+    ) == [20, 50, 50]
@@ -0,0 +1,110 @@
+"""
+Testing the response caches of `mws.cache`.
+"""
+import pytest
+
+import mws
+from mws.cache import DiskCache, MemoryCache
+from .test_bulk import matching_product
+from .test_pagination import orders_page
+# pylint: disable=invalid-name
+
+MARKETPLACE_ID = 'ATVPDKIKX0DER'
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture(params=['memory', 'disk'])
+def make_cache(request, tmpdir, clock):
+    def make(**kwargs):
+        if request.param == 'memory':
+            return MemoryCache(clock=clock, **kwargs)
+        return DiskCache(str(tmpdir.join('cache.db')), clock=clock, **kwargs)
+    return make
+
+
+@pytest.fixture
+def products_api(credentials, transport):
+    transport.respond_with(matching_product)
+    return mws.Products(transport=transport, **credentials)
+
+
+def test_repeated_request_skips_network_and_throttle(products_api, transport, make_cache):
+    waits = []
+    products_api.cache = make_cache()
+    products_api.throttle = mws.Throttle(limits={'GetMatchingProduct': (1, 60.0)}, sleep=waits.append)
+    first = products_api.get_matching_product(MARKETPLACE_ID, ['B1'])
+    second = products_api.get_matching_product(MARKETPLACE_ID, ['B1'])
+    assert len(transport.requests) == 1
+    assert waits == []
+    assert (first.cached, second.cached) == (False, True)
+    assert second.response is None
+    assert second.parsed.Product.Title == 'B1'
+    assert second.original == first.original
+
+
+def test_key_ignores_timestamp_and_signature(products_api):
+    first = products_api.prepare(products_api.get_matching_product, MARKETPLACE_ID, ['B1'])
+    second = products_api.prepare(products_api.get_matching_product, MARKETPLACE_ID, ['B1'])
+    second.params['Timestamp'] = '2017-01-01T00:00:00Z'
+    products_api.sign_request(second)
+    assert first.query != second.query
+    assert MemoryCache.key(first) == MemoryCache.key(second)
+    assert 'Timestamp' not in MemoryCache.key(first)
+    other = products_api.prepare(products_api.get_matching_product, MARKETPLACE_ID, ['B2'])
+    assert MemoryCache.key(other) != MemoryCache.key(first)
+
+
+def test_only_listed_actions_are_cached(credentials, transport, make_cache):
+    orders_api = mws.Orders(transport=transport, cache=make_cache(), **credentials)
+    transport.respond_with(lambda params: orders_page(['1']))
+    orders_api.list_orders(created_after='2017-01-01')
+    orders_api.list_orders(created_after='2017-01-01')
+    assert len(transport.requests) == 2
+
+
+def test_ttl_per_action(products_api, transport, clock, make_cache):
+    products_api.cache = make_cache(ttls={'GetMatchingProduct': 60, 'GetMatchingProductForId': 0})
+    products_api.get_matching_product(MARKETPLACE_ID, ['B1'])
+    clock.now += 59
+    assert products_api.get_matching_product(MARKETPLACE_ID, ['B1']).cached
+    clock.now += 1
+    assert not products_api.get_matching_product(MARKETPLACE_ID, ['B1']).cached
+    products_api.get_matching_product_for_id(MARKETPLACE_ID, 'ASIN', ['B1'])
+    assert not products_api.get_matching_product_for_id(MARKETPLACE_ID, 'ASIN', ['B1']).cached
+    assert len(transport.requests) == 4
+
+
+def test_least_recently_used_entries_are_dropped(products_api, transport, clock, make_cache):
+    products_api.cache = make_cache(max_entries=2)
+    for asin in ['B1', 'B2', 'B1', 'B3']:
+        clock.now += 1
+        products_api.get_matching_product(MARKETPLACE_ID, [asin])
+    assert len(products_api.cache) == 2
+    clock.now += 1
+    assert products_api.get_matching_product(MARKETPLACE_ID, ['B1']).cached
+    assert not products_api.get_matching_product(MARKETPLACE_ID, ['B2']).cached
+    products_api.cache.clear()
+    assert len(products_api.cache) == 0
+
+
+def test_disk_cache_is_kept_across_instances(products_api, transport, tmpdir):
+    path = str(tmpdir.join('cache.db'))
+    products_api.cache = DiskCache(path)
+    products_api.get_matching_product(MARKETPLACE_ID, ['B1'])
+    products_api.cache = DiskCache(path)
+    response = products_api.get_matching_product(MARKETPLACE_ID, ['B1'])
+    assert response.cached
+    assert response.parsed.Product.Title == 'B1'
+    assert len(transport.requests) == 1
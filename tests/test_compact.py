@@ -0,0 +1,112 @@
+"""
+Testing compact `__slots__` result nodes.
+"""
+import pytest
+
+import mws
+from mws import utils
+from .test_pagination import orders_page
+from .test_stream_records import FINANCIAL_EVENTS
+# pylint: disable=invalid-name
+
+OFFERS = b"""<?xml version="1.0"?>
+<GetLowestOfferListingsForASINResponse xmlns="http://mws.amazonservices.com/schema/Products/2011-10-01">
+  <GetLowestOfferListingsForASINResult ASIN="B000000001" status="Success">
+    <Product>
+      <LowestOfferListings>
+        <LowestOfferListing>
+          <Qualifiers><ItemCondition>New</ItemCondition><FulfillmentChannel>Amazon</FulfillmentChannel></Qualifiers>
+          <NumberOfOfferListingsConsidered>3</NumberOfOfferListingsConsidered>
+          <Price>
+            <LandedPrice><CurrencyCode>USD</CurrencyCode><Amount>12.99</Amount></LandedPrice>
+          </Price>
+        </LowestOfferListing>
+        <LowestOfferListing>
+          <Qualifiers><ItemCondition>Used</ItemCondition><FulfillmentChannel>Merchant</FulfillmentChannel></Qualifiers>
+          <NumberOfOfferListingsConsidered>1</NumberOfOfferListingsConsidered>
+          <Price>
+            <LandedPrice><CurrencyCode>USD</CurrencyCode><Amount>9.99</Amount></LandedPrice>
+          </Price>
+        </LowestOfferListing>
+      </LowestOfferListings>
+    </Product>
+  </GetLowestOfferListingsForASINResult>
+</GetLowestOfferListingsForASINResponse>"""
+
+
+def test_compact_nodes_read_like_object_dicts():
+    full = utils.parse_xml(OFFERS).GetLowestOfferListingsForASINResponse.GetLowestOfferListingsForASINResult
+    compact = utils.parse_xml(OFFERS, compact=True).GetLowestOfferListingsForASINResponse
+    compact = compact.GetLowestOfferListingsForASINResult
+    assert isinstance(compact, utils.CompactNode)
+    assert compact.ASIN == full.ASIN == 'B000000001'
+    offers = compact.Product.LowestOfferListings.LowestOfferListing
+    assert [offer.Price.LandedPrice.Amount for offer in offers] == ['12.99', '9.99']
+    assert offers[0].Qualifiers['ItemCondition'] == 'New'
+    assert compact.getvalue('status') == 'Success'
+    assert compact.getvalue('Missing', 'default') == 'default'
+    # Records of the same shape share one generated class.
+    assert type(offers[0]) is type(offers[1])
+    assert type(offers[0]).__name__ == 'LowestOfferListing'
+    assert not hasattr(offers[0], '__dict__')
+
+
+def test_compact_node_mapping_methods():
+    order = utils.parse_xml(orders_page(['1']), compact=True).ListOrdersResponse.ListOrdersResult.Orders.Order
+    assert order.keys() == ['AmazonOrderId']
+    assert order.items() == [('AmazonOrderId', '1')]
+    assert 'AmazonOrderId' in order
+    assert order.get('OrderStatus') is None
+    assert order._asdict() == {'AmazonOrderId': '1'}
+    assert repr(order) == "Order(AmazonOrderId='1')"
+    with pytest.raises(KeyError):
+        order['OrderStatus']
+
+
+def test_compact_api_pagination(credentials, transport):
+    orders_api = mws.Orders(transport=transport, compact=True, **credentials)
+    transport.add_response(orders_page(['1', '2'], next_token='abc'))
+    transport.add_response(orders_page(['3'], action='ListOrdersByNextToken'))
+    orders = list(orders_api.iter_records(orders_api.list_orders))
+    assert [order.AmazonOrderId for order in orders] == ['1', '2', '3']
+    assert all(isinstance(order, utils.CompactNode) for order in orders)
+
+
+def test_compact_streamed_financial_events(credentials, transport):
+    finances_api = mws.Finances(transport=transport, compact=True, **credentials)
+    transport.add_response(FINANCIAL_EVENTS)
+    events = list(finances_api.stream_records(finances_api.list_financial_events))
+    assert [type(event).__name__ for event in events] == ['ShipmentEvent'] * 3
+    assert events[2].AmazonOrderId == '3'
+
+
+def test_compact_classes_are_shared_and_bounded(monkeypatch):
+    first = utils.parse_xml(b'<R><Item><A>1</A><B>2</B></Item><Item><B>3</B><A>4</A></Item></R>', compact=True)
+    items = first.R.Item
+    # Children in another order: same class.
+    assert type(items[0]) is type(items[1])
+    assert items[1].keys() == ['A', 'B']
+    monkeypatch.setattr(utils, '_compact_classes', {})
+    monkeypatch.setattr(utils, 'COMPACT_CLASSES_MAX', 10)
+    for n in range(50):
+        utils.parse_xml('<R><Item><F{0}>1</F{0}><G>2</G></Item></R>'.format(n).encode(), compact=True)
+    assert len(utils._compact_classes) <= 10
+
+
+def test_compact_field_names_that_clash():
+    xml = b'<R><Item a-b="1" a_b="2"><items>3</items><get>4</get><Value>5</Value></Item></R>'
+    item = utils.parse_xml(xml, compact=True).R.Item
+    assert item['a-b'] == '1'
+    assert item['a_b'] == '2'
+    assert item['items'] == '3'
+    assert item.get('get') == '4'
+    assert item.Value == '5'
+    assert item.items() == [('Value', '5'), ('a-b', '1'), ('a_b', '2'), ('get', '4'), ('items', '3')]
+    assert item.keys() == ['Value', 'a-b', 'a_b', 'get', 'items']
+
+
+def test_compact_root_getvalue():
+    root = utils.parse_xml(b'<R><NextToken>t</NextToken><Page><Count>2</Count></Page></R>', True)['R']
+    assert root.getvalue('NextToken') == 't'
+    assert root.getvalue('Missing', 'default') == 'default'
+    assert root.Page.getvalue('Count') == '2'
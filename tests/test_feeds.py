@@ -0,0 +1,403 @@
+"""
+Testing the feed helpers: FeedPipeline, parse_processing_report, FeedBody uploads and FeedBuilder.
+"""
+import datetime
+import io
+import xml.etree.ElementTree as ET
+
+import pytest
+
+import mws
+from mws.feeds import FeedJob, FeedPipeline, parse_processing_report
+from mws.mws import FeedBody, calc_md5
+from .test_reports import RESPONSE
+from .test_retry import THROTTLED
+from .test_throttle import FakeClock
+# pylint: disable=invalid-name
+
+SUBMISSION_INFO = """<FeedSubmissionInfo>
+  <FeedSubmissionId>{submission_id}</FeedSubmissionId>
+  <FeedType>{feed_type}</FeedType>
+  <SubmittedDate>{submitted}</SubmittedDate>
+  <FeedProcessingStatus>{status}</FeedProcessingStatus>
+  {dates}
+</FeedSubmissionInfo>"""
+
+PROCESSING_REPORT = """<?xml version="1.0" encoding="UTF-8"?>
+<AmazonEnvelope xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:noNamespaceSchemaLocation="amzn-envelope.xsd">
+  <Header><DocumentVersion>1.02</DocumentVersion></Header>
+  <MessageType>ProcessingReport</MessageType>
+  <Message>
+    <MessageID>1</MessageID>
+    <ProcessingReport>
+      <DocumentTransactionID>{submission_id}</DocumentTransactionID>
+      <StatusCode>Complete</StatusCode>
+      <ProcessingSummary>
+        <MessagesProcessed>3</MessagesProcessed>
+        <MessagesSuccessful>2</MessagesSuccessful>
+        <MessagesWithError>1</MessagesWithError>
+        <MessagesWithWarning>0</MessagesWithWarning>
+      </ProcessingSummary>
+      <Result>
+        <MessageID>2</MessageID>
+        <ResultCode>Error</ResultCode>
+        <ResultMessageCode>8560</ResultMessageCode>
+        <ResultDescription>SKU SKU-2 is missing.</ResultDescription>
+        <AdditionalInfo><SKU>SKU-2</SKU></AdditionalInfo>
+      </Result>
+    </ProcessingReport>
+  </Message>
+</AmazonEnvelope>"""
+
+FLAT_PROCESSING_REPORT = (
+    "Feed Processing Summary:\r\n"
+    "\tNumber of records processed\t\t4\r\n"
+    "\tNumber of records successful\t\t3\r\n"
+    "\r\n"
+    "original-record-number\tsku\terror-code\terror-type\terror-message\r\n"
+    "2\tSKU-2\t90111\tError\tThe SKU data provided is different.\r\n"
+)
+
+EPOCH = datetime.datetime(2017, 1, 1)
+
+
+def amazon_date(seconds):
+    return (EPOCH + datetime.timedelta(seconds=seconds)).strftime('%Y-%m-%dT%H:%M:%S+00:00')
+
+
+class FeedService(object):
+    """
+    Answers Feeds requests: a feed of type "_<seconds>_<final status>_"
+    is processed that many seconds after it is submitted, half of the time
+    waiting in queue.
+    """
+    def __init__(self, clock):
+        self.clock = clock
+        self.submissions = {}
+
+    def __call__(self, params):
+        action = params['Action']
+        if action == 'SubmitFeed':
+            submission_id = str(len(self.submissions) + 1)
+            self.submissions[submission_id] = (params['FeedType'], self.clock())
+            return self.render(action, [submission_id])
+        if action == 'GetFeedSubmissionList':
+            submission_ids = [value for key, value in sorted(params.items())
+                              if key.startswith('FeedSubmissionIdList.')]
+            assert params['MaxCount'] == str(len(submission_ids))
+            return self.render(action, submission_ids)
+        return PROCESSING_REPORT.format(submission_id=params['FeedSubmissionId']).encode()
+
+    def render(self, action, submission_ids):
+        infos = []
+        for submission_id in submission_ids:
+            feed_type, submitted = self.submissions[submission_id]
+            seconds, status = feed_type.strip('_').split('_', 1)
+            age = self.clock() - submitted
+            started, completed = submitted + int(seconds) // 2, submitted + int(seconds)
+            dates = ''
+            if age < int(seconds):
+                status = 'IN_PROGRESS'
+            else:
+                dates = '<StartedProcessingDate>{}</StartedProcessingDate>' \
+                        '<CompletedProcessingDate>{}</CompletedProcessingDate>'.format(
+                            amazon_date(started), amazon_date(completed))
+            infos.append(SUBMISSION_INFO.format(
+                submission_id=submission_id, feed_type=feed_type, submitted=amazon_date(submitted),
+                status='_{}_'.format(status), dates=dates))
+        return RESPONSE.format(action=action, result=''.join(infos)).encode()
+
+
+@pytest.fixture
+def clock():
+    clock = FakeClock()
+    clock.now = 0.0
+    return clock
+
+
+@pytest.fixture
+def feeds_api(credentials, transport, clock):
+    transport.respond_with(FeedService(clock))
+    return mws.Feeds(transport=transport, **credentials)
+
+
+def make_pipeline(feeds_api, clock, **kwargs):
+    return FeedPipeline(feeds_api, sleep=clock.sleep, clock=clock, **kwargs)
+
+
+def test_feeds_are_read_as_they_are_processed(feeds_api, transport, clock):
+    jobs = [FeedJob(b'<feed/>', '_{}_DONE_'.format(seconds)) for seconds in (600, 20, 90)]
+    finished = list(make_pipeline(feeds_api, clock).run(jobs))
+    assert [job.feed_type for job in finished] == ['_20_DONE_', '_90_DONE_', '_600_DONE_']
+    assert [job.status for job in jobs] == ['_DONE_'] * 3
+    assert jobs[0].submission_id == '1'
+    assert jobs[0].summary.messages_with_error == 1
+    # Every outstanding submission is polled at once.
+    first_poll = transport.requests[3]['params']
+    assert first_poll['Action'] == 'GetFeedSubmissionList'
+    assert [first_poll['FeedSubmissionIdList.Id.{}'.format(n)] for n in (1, 2, 3)] == ['1', '2', '3']
+
+
+def test_latency_metrics(feeds_api, transport, clock):
+    job = FeedJob(b'<feed/>', '_3600_DONE_')
+    list(make_pipeline(feeds_api, clock, max_interval=600).run([job]))
+    assert transport.actions.count('GetFeedSubmissionList') < 30
+    assert 3600 <= job.latency < 3600 * 1.3
+    assert job.queue_time == 1800
+    assert job.processing_time == 1800
+    assert max(clock.slept) <= 600
+
+
+def test_cancelled_feeds_have_no_report(feeds_api, transport, clock):
+    job, = make_pipeline(feeds_api, clock).run([FeedJob(b'<feed/>', '_10_CANCELLED_')])
+    assert job.status == '_CANCELLED_'
+    assert job.summary is None
+    assert 'GetFeedSubmissionResult' not in transport.actions
+
+
+def test_failed_submission_is_reported(feeds_api, transport, clock):
+    transport.respond_with(None)
+    transport.add_response(THROTTLED, status_code=503)
+    job, = make_pipeline(feeds_api, clock).run([FeedJob(b'<feed/>', '_10_DONE_')])
+    assert isinstance(job.error, mws.MWSError)
+    assert job.submission_id is None
+
+
+def test_submissions_wait_for_quota_while_polling(feeds_api, transport, clock):
+    feeds_api.throttle = mws.Throttle(limits={'SubmitFeed': (1, 120.0)}, sleep=clock.sleep, clock=clock)
+    jobs = [FeedJob(b'<feed/>', '_10_DONE_'), FeedJob(b'<feed/>', '_10_DONE_')]
+    finished = list(make_pipeline(feeds_api, clock).run(jobs))
+    assert len(finished) == 2
+    # The first feed is processed before the quota allows the second submission.
+    assert transport.actions[:4] == ['SubmitFeed', 'GetFeedSubmissionList', 'GetFeedSubmissionResult', 'SubmitFeed']
+
+
+def test_parse_xml_processing_report():
+    summary = parse_processing_report(PROCESSING_REPORT.format(submission_id='1').encode())
+    assert summary.status_code == 'Complete'
+    assert (summary.messages_processed, summary.messages_successful,
+            summary.messages_with_error, summary.messages_with_warning) == (3, 2, 1, 0)
+    result, = summary.results
+    assert (result.message_id, result.result_code, result.message_code, result.sku) == ('2', 'Error', '8560', 'SKU-2')
+
+
+def test_parse_flat_processing_report():
+    summary = parse_processing_report(FLAT_PROCESSING_REPORT)
+    assert summary.status_code == 'Complete'
+    assert (summary.messages_processed, summary.messages_successful, summary.messages_with_error) == (4, 3, 0)
+    result, = summary.results
+    assert (result.message_id, result.result_code, result.message_code, result.sku) == ('2', 'Error', '90111', 'SKU-2')
+    assert result.description == 'The SKU data provided is different.'
+
+
+FEED = b''.join(b'<Message><MessageID>%d</MessageID></Message>' % n for n in range(5000))
+
+
+class Pipe(io.RawIOBase):
+    """
+    Readable file object that cannot seek, like a pipe.
+    """
+    def __init__(self, data):
+        self._data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._data.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+@pytest.mark.parametrize('make_feed', [
+    lambda path: path,
+    lambda path: open(path, 'rb'),
+    lambda path: Pipe(FEED),
+    lambda path: (FEED[start:start + 1000] for start in range(0, len(FEED), 1000)),
+], ids=['path', 'file', 'pipe', 'chunks'])
+def test_feed_body_is_read_in_chunks(tmpdir, make_feed):
+    path = tmpdir.join('feed.xml')
+    path.write_binary(FEED)
+    body = FeedBody(make_feed(str(path)), chunk_size=4096)
+    assert len(body) == len(FEED)
+    assert body.content_md5 == calc_md5(FEED)
+    assert max(len(chunk) for chunk in body) <= 4096
+    # Read again from the start every time, for retries.
+    assert b''.join(body) == FEED
+    assert b''.join(body) == FEED
+
+
+def test_feed_body_rewinds_to_the_initial_position():
+    feed = io.BytesIO(b'header\n' + FEED)
+    feed.readline()
+    body = FeedBody(feed)
+    assert b''.join(body) == FEED
+    with pytest.raises(mws.MWSError):
+        FeedBody(FEED)
+
+
+def test_retried_feed_is_uploaded_again(credentials, transport):
+    feeds_api = mws.Feeds(transport=transport, retry=mws.RetryPolicy(sleep=lambda delay: None), **credentials)
+    transport.add_response(THROTTLED, status_code=503)
+    transport.add_response(RESPONSE.format(action='SubmitFeed', result='').encode())
+    feeds_api.submit_feed(io.BytesIO(FEED), '_POST_PRODUCT_DATA_')
+    assert [b''.join(request['data']) for request in transport.requests] == [FEED, FEED]
+    assert transport.requests[0]['headers']['Content-MD5'] == calc_md5(FEED).decode()
+
+
+def test_bytes_feed_is_sent_as_is(credentials, transport):
+    feeds_api = mws.Feeds(transport=transport, **credentials)
+    transport.add_response(RESPONSE.format(action='SubmitFeed', result='').encode())
+    feeds_api.submit_feed(FEED, '_POST_PRODUCT_DATA_')
+    assert transport.requests[0]['data'] is FEED
+    feed = bytearray(FEED)
+    transport.add_response(RESPONSE.format(action='SubmitFeed', result='').encode())
+    feeds_api.submit_feed(feed, '_POST_PRODUCT_DATA_')
+    assert transport.requests[1]['data'] is feed
+    assert transport.requests[1]['headers']['Content-MD5'] == calc_md5(FEED).decode()
+
+
+def test_text_feed_is_content_unless_it_names_a_file(credentials, transport, tmpdir):
+    feeds_api = mws.Feeds(transport=transport, **credentials)
+    transport.add_response(RESPONSE.format(action='SubmitFeed', result='').encode())
+    transport.add_response(RESPONSE.format(action='SubmitFeed', result='').encode())
+    feeds_api.submit_feed(FEED.decode('utf-8'), '_POST_PRODUCT_DATA_')
+    assert transport.requests[0]['data'] == FEED
+    path = tmpdir.join('feed.xml')
+    path.write_binary(FEED)
+    feeds_api.submit_feed(u'{}'.format(path), '_POST_PRODUCT_DATA_')
+    assert b''.join(transport.requests[1]['data']) == FEED
+    assert not mws.utils.is_path(u'{}\n'.format(path))
+    assert not mws.utils.is_path(u'{}.missing'.format(path))
+
+
+@pytest.fixture
+def submitted(credentials, transport):
+    """
+    Feeds instance whose SubmitFeed requests all succeed, and the feeds they uploaded.
+    """
+    feeds = []
+
+    def submit(params):
+        feeds.append((params['FeedType'], transport.requests[-1]['data']))
+        return RESPONSE.format(action='SubmitFeed', result='').encode()
+
+    transport.respond_with(submit)
+    return mws.Feeds(transport=transport, **credentials), feeds
+
+
+def test_builder_keeps_the_latest_update_per_sku(submitted):
+    feeds_api, feeds = submitted
+    builder = mws.FeedBuilder(feeds_api, '_POST_PRODUCT_PRICING_DATA_', currency='EUR')
+    builder.add('SKU-1', price='1.00')
+    builder.add('SKU-<2>', price='2.00')
+    builder.add('SKU-1', price='3.00')
+    assert len(builder) == 2
+    builder.flush()
+    (feed_type, feed), = feeds
+    assert feed_type == '_POST_PRODUCT_PRICING_DATA_'
+    envelope = ET.fromstring(feed)
+    assert envelope.find('MessageType').text == 'Price'
+    assert [(message.findtext('MessageID'), message.findtext('Price/SKU'), message.findtext('Price/StandardPrice'))
+            for message in envelope.iter('Message')] == [('1', 'SKU-<2>', '2.00'), ('2', 'SKU-1', '3.00')]
+    assert envelope.find('Message/Price/StandardPrice').get('currency') == 'EUR'
+    assert len(builder) == 0
+    assert builder.flush() is None
+    assert len(feeds) == 1
+
+
+def test_builder_flushes_by_count_and_size(submitted):
+    feeds_api, feeds = submitted
+    builder = mws.FeedBuilder(feeds_api, '_POST_INVENTORY_AVAILABILITY_DATA_', max_messages=2)
+    assert builder.add('SKU-1', quantity=1) is None
+    assert builder.add('SKU-2', quantity=2, fulfillment_latency=3) is not None
+    assert len(feeds) == 1
+    assert b'<FulfillmentLatency>3</FulfillmentLatency>' in feeds[0][1]
+    builder = mws.FeedBuilder(feeds_api, '_POST_INVENTORY_AVAILABILITY_DATA_', max_bytes=200)
+    for n in range(10):
+        builder.add('SKU-{}'.format(n), quantity=n)
+    assert len(feeds) == 3
+    assert 0 < builder.size < 200
+
+
+def test_builder_flushes_by_age_within_quota(submitted):
+    feeds_api, feeds = submitted
+    clock = FakeClock()
+    feeds_api.throttle = mws.Throttle(limits={'SubmitFeed': (1, 600.0)}, sleep=clock.sleep, clock=clock)
+    builder = mws.FeedBuilder(feeds_api, '_POST_INVENTORY_AVAILABILITY_DATA_', max_age=60, clock=clock)
+    builder.add('SKU-1', quantity=1)
+    clock.now += 59
+    assert builder.flush_if_due() is None
+    clock.now += 1
+    assert builder.flush_if_due() is not None
+    builder.add('SKU-1', quantity=2)
+    clock.now += 60
+    # Due by age, but the SubmitFeed quota is used up: updates keep coalescing.
+    assert not builder.is_due()
+    builder.add('SKU-2', quantity=2)
+    clock.now += 540
+    assert builder.flush_if_due() is not None
+    assert len(feeds) == 2
+    assert clock.slept == []
+
+
+def test_builder_merges_flat_file_columns(submitted):
+    feeds_api, feeds = submitted
+    with mws.FeedBuilder(feeds_api, '_POST_FLAT_FILE_PRICEANDQUANTITYONLY_UPDATE_DATA_') as builder:
+        builder.add('SKU-1', price='9.99')
+        builder.add('SKU-2', quantity=4, handling_time=2)
+        builder.add('SKU-1', quantity=5)
+    (_, feed), = feeds
+    assert feed == b'sku\tprice\tquantity\thandling-time\nSKU-2\t\t4\t2\nSKU-1\t9.99\t5\t\n'
+
+
+def test_builder_rejects_incomplete_updates(submitted):
+    feeds_api, _ = submitted
+    builder = mws.FeedBuilder(feeds_api, '_POST_INVENTORY_AVAILABILITY_DATA_')
+    with pytest.raises(mws.MWSError):
+        builder.add('SKU-1', price='1.00')
+    with pytest.raises(mws.MWSError):
+        builder.add('SKU-1', fulfillment_latency=2)
+    with pytest.raises(mws.MWSError):
+        mws.FeedBuilder(feeds_api, '_POST_PRODUCT_DATA_')
+    job = builder.build()
+    assert job is None
+    builder.add('SKU-1', quantity=1)
+    job = builder.build()
+    assert (job.feed_type, job.content_type) == ('_POST_INVENTORY_AVAILABILITY_DATA_', 'text/xml')
+    builder.clear()
+    assert len(builder) == 0 and builder.size == 0
+
+
+def test_builder_keeps_updates_when_the_submission_fails(credentials, transport):
+    feeds_api = mws.Feeds(transport=transport, **credentials)
+    builder = mws.FeedBuilder(feeds_api, '_POST_INVENTORY_AVAILABILITY_DATA_', max_messages=2)
+    builder.add('SKU-1', quantity=1)
+    transport.add_response(THROTTLED, status_code=503)
+    with pytest.raises(mws.MWSError):
+        builder.add('SKU-2', quantity=2)
+    assert len(builder) == 2
+    transport.add_response(RESPONSE.format(action='SubmitFeed', result='').encode())
+    assert builder.flush() is not None
+    assert len(builder) == 0
+    assert transport.requests[0]['data'] == transport.requests[1]['data']
+
+
+def test_builder_does_not_submit_after_an_error(submitted):
+    feeds_api, feeds = submitted
+    with pytest.raises(ValueError):
+        with mws.FeedBuilder(feeds_api, '_POST_INVENTORY_AVAILABILITY_DATA_') as builder:
+            builder.add('SKU-1', quantity=1)
+            raise ValueError
+    assert feeds == []
+    assert len(builder) == 1
+
+
+def test_builder_leaves_out_none_values(submitted):
+    feeds_api, feeds = submitted
+    with mws.FeedBuilder(feeds_api, '_POST_INVENTORY_AVAILABILITY_DATA_') as builder:
+        builder.add(u'SKU-\xe9', quantity=3, fulfillment_latency=None)
+    (_, feed), = feeds
+    message = ET.fromstring(feed).find('Message/Inventory')
+    assert message.findtext('SKU') == u'SKU-\xe9'
+    assert message.find('FulfillmentLatency') is None
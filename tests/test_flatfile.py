@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Testing the streaming flat-file report parser.
+"""
+import datetime
+import io
+from decimal import Decimal
+
+import pytest
+
+import mws
+from mws.flatfile import FlatFileReport, detect_encoding, normalize_header, to_datetime
+from mws.mws import DataWrapper
+# pylint: disable=invalid-name
+
+LISTINGS = (
+    u'sku\tasin\tprice\tquantity\r\n'
+    u'SKU-1\tB000000001\t12.99\t5\r\n'
+    u'SKU-é\tB000000002\t\t0\r\n'
+)
+
+SETTLEMENT = (
+    'settlement-id\tsettlement-start-date\ttotal-amount\torder-id\tamount\tposted-date\n'
+    '111\t2017-08-01 00:00:00 UTC\t1234.56\t\t\t\n'
+    '111\t\t\t123-1\t-3.40\t2017-08-02\n'
+)
+
+
+def test_rows_are_typed_and_headers_mapped():
+    report = FlatFileReport(LISTINGS.encode('cp1252'), '_GET_FLAT_FILE_OPEN_LISTINGS_DATA_')
+    rows = list(report)
+    assert report.columns == ['sku', 'asin', 'price', 'quantity']
+    assert report.encoding == 'cp1252'
+    assert rows[0] == {'sku': 'SKU-1', 'asin': 'B000000001', 'price': Decimal('12.99'), 'quantity': 5}
+    assert rows[1].sku == u'SKU-é'
+    assert rows[1].price is None
+
+
+def test_unknown_report_type_keeps_strings():
+    rows = list(FlatFileReport(SETTLEMENT.encode()))
+    assert rows[0].total_amount == '1234.56'
+
+
+def test_settlement_report_from_chunks():
+    data = SETTLEMENT.encode()
+    chunks = [data[i:i + 7] for i in range(0, len(data), 7)]
+    rows = list(FlatFileReport(iter(chunks), '_GET_V2_SETTLEMENT_REPORT_DATA_FLAT_FILE_V2_'))
+    assert rows[0].settlement_start_date == datetime.datetime(2017, 8, 1)
+    assert rows[0].total_amount == Decimal('1234.56')
+    assert rows[1].amount == Decimal('-3.40')
+    assert rows[1].posted_date == datetime.date(2017, 8, 2)
+
+
+def test_shift_jis_report_split_across_chunks(tmpdir):
+    path = tmpdir.join('report.txt')
+    path.write_binary(u'sku\titem-name\nSKU-1\t商品名\n'.encode('cp932'))
+    report = FlatFileReport(str(path), region='JP')
+    report.CHUNK_SIZE = 3
+    assert [row.item_name for row in report] == [u'商品名']
+    assert report.encoding == 'cp932'
+
+
+def test_from_response_uses_announced_charset(credentials, transport):
+    reports_api = mws.Reports(transport=transport, **credentials)
+    transport.add_response(LISTINGS.encode('cp1252'), headers={'Content-Type': 'text/plain;charset=Cp1252'})
+    sink = io.BytesIO()
+    response = reports_api.get_report('1234', stream_to=sink)
+    report = FlatFileReport.from_response(response)
+    assert [row.sku for row in report] == ['SKU-1', u'SKU-é']
+    assert report.encoding == 'Cp1252'
+
+
+def test_conversion_error_names_line_and_column():
+    report = FlatFileReport(b'sku\tquantity\nSKU-1\t1\nSKU-2\tmany\n', '_GET_AFN_INVENTORY_DATA_',
+                            converters={'quantity': int})
+    with pytest.raises(mws.MWSError) as excinfo:
+        list(report)
+    assert 'Line 3, column quantity' in str(excinfo.value)
+
+
+def test_columnar_batches():
+    data = b'sku\tquantity\n' + b''.join(b'SKU-%d\t%d\n' % (n, n) for n in range(5))
+    batches = list(FlatFileReport(data, '_GET_FLAT_FILE_OPEN_LISTINGS_DATA_').batches(size=2))
+    assert [len(batch.sku) for batch in batches] == [2, 2, 1]
+    assert batches[0] == {'sku': ['SKU-0', 'SKU-1'], 'quantity': [0, 1]}
+
+
+@pytest.mark.parametrize('sample, expected', [
+    (b'\xef\xbb\xbfsku', 'utf-8-sig'),
+    (u'sku\tSKU-é'.encode('utf-8'), 'utf-8'),
+    (u'sku\tSKU-é'.encode('cp1252'), 'cp1252'),
+    (b'sku\tasin', 'cp1252'),
+])
+def test_detect_encoding(sample, expected):
+    assert detect_encoding(sample) == expected
+
+
+def test_detect_encoding_by_region_and_charset():
+    assert detect_encoding(b'sku', region='JP') == 'cp932'
+    assert detect_encoding(b'sku', charset='Windows-31J') == 'cp932'
+
+
+def test_normalize_header():
+    assert normalize_header('amazon-order-id') == 'amazon_order_id'
+    assert normalize_header('Quantity Available') == 'quantity_available'
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2017-08-12T19:40:35+00:00', datetime.datetime(2017, 8, 12, 19, 40, 35)),
+    ('2017-08-12 19:40:35 PST', datetime.datetime(2017, 8, 13, 3, 40, 35)),
+    ('12.08.2017 19:40:35 UTC', datetime.datetime(2017, 8, 12, 19, 40, 35)),
+    ('2017-08-12T19:40:35.000+09:00', datetime.datetime(2017, 8, 12, 10, 40, 35)),
+])
+def test_to_datetime(value, expected):
+    assert to_datetime(value) == expected
+
+
+def test_flat_file_left_unparsed_by_get_report(credentials, transport):
+    reports_api = mws.Reports(transport=transport, **credentials)
+    transport.add_response(SETTLEMENT.encode())
+    response = reports_api.get_report('1234')
+    assert isinstance(response, DataWrapper)
+    assert next(iter(FlatFileReport.from_response(response))).settlement_id == '111'
+
+
+def test_report_streamed_to_path_is_read_from_it(credentials, transport, tmpdir):
+    reports_api = mws.Reports(transport=transport, **credentials)
+    transport.add_response(LISTINGS.encode('cp1252'), headers={'Content-Type': 'text/plain;charset=Cp1252'})
+    # A native str path: bytes on Python 2, where it must not be taken for the report itself.
+    path = str(tmpdir.join('listings.txt'))
+    response = reports_api.get_report('1234', stream_to=path)
+    assert [row.sku for row in FlatFileReport.from_response(response)] == ['SKU-1', u'SKU-é']
+    assert [row.sku for row in FlatFileReport(b'sku\nlisting.txt\n')] == ['listing.txt']
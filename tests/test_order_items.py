@@ -0,0 +1,58 @@
+"""
+Testing the order-item fan-out of `Orders.iter_order_items`.
+"""
+import time
+
+import mws
+from .test_pagination import orders_page
+# pylint: disable=invalid-name
+
+ORDER_ITEMS_PAGE = """<?xml version="1.0"?>
+<{action}Response xmlns="https://mws.amazonservices.com/Orders/2013-09-01">
+  <{action}Result>
+    {token}
+    <AmazonOrderId>{order_id}</AmazonOrderId>
+    <OrderItems>{items}</OrderItems>
+  </{action}Result>
+</{action}Response>"""
+
+
+def order_items(params):
+    """
+    Answers ListOrderItems requests: order N has N items, returned
+    two per page, following next tokens "<order id>:<page>".
+    """
+    if params['Action'] == 'ListOrderItemsByNextToken':
+        order_id, page = params['NextToken'].split(':')
+        page = int(page)
+    else:
+        order_id, page = params['AmazonOrderId'], 0
+        # Earlier orders answer last, to shuffle the completion order.
+        time.sleep(0.01 * (10 - int(order_id)))
+    count = int(order_id)
+    item_ids = ['{}-{}'.format(order_id, n) for n in range(page * 2, min(count, page * 2 + 2))]
+    token = '<NextToken>{}:{}</NextToken>'.format(order_id, page + 1) if count > page * 2 + 2 else ''
+    items = ''.join('<OrderItem><OrderItemId>{}</OrderItemId></OrderItem>'.format(item) for item in item_ids)
+    return ORDER_ITEMS_PAGE.format(action=params['Action'], token=token, order_id=order_id, items=items).encode()
+
+
+def test_items_of_order_ids_in_input_order(credentials, transport):
+    orders_api = mws.Orders(transport=transport, **credentials)
+    transport.respond_with(order_items)
+    pairs = list(orders_api.iter_order_items(['1', '5', '0', '3'], ordered=True))
+    assert [order for order, _ in pairs] == ['1', '5', '0', '3']
+    assert [item.OrderItemId for item in pairs[1][1]] == ['5-0', '5-1', '5-2', '5-3', '5-4']
+    assert pairs[2][1] == []
+    assert transport.actions.count('ListOrderItemsByNextToken') == 2 + 1
+
+
+def test_items_of_parsed_orders_in_completion_order(credentials, transport):
+    orders_api = mws.Orders(transport=transport, **credentials)
+    transport.respond_with(order_items)
+    orders = mws.utils.iterate_path(
+        mws.utils.parse_xml(orders_page(['1', '2', '8'])).ListOrdersResponse.ListOrdersResult, 'Orders.Order')
+    pairs = list(orders_api.iter_order_items(orders, max_workers=3))
+    assert sorted(order.AmazonOrderId for order, _ in pairs) == ['1', '2', '8']
+    assert {order.AmazonOrderId: len(items) for order, items in pairs} == {'1': 1, '2': 2, '8': 8}
+    # Order 8 answers first, order 1 last.
+    assert pairs[-1][0].AmazonOrderId == '1'
@@ -0,0 +1,79 @@
+"""
+Testing `MWS.paginate` and `MWS.iter_records` against canned responses.
+"""
+import pytest
+
+import mws
+# pylint: disable=invalid-name
+
+ORDERS_PAGE = """<?xml version="1.0"?>
+<{action}Response xmlns="https://mws.amazonservices.com/Orders/2013-09-01">
+  <{action}Result>
+    {token}
+    <Orders>{orders}</Orders>
+  </{action}Result>
+</{action}Response>"""
+
+
+def orders_page(order_ids, next_token=None, action='ListOrders'):
+    token = '<NextToken>{}</NextToken>'.format(next_token) if next_token else ''
+    orders = ''.join(
+        '<Order><AmazonOrderId>{}</AmazonOrderId></Order>'.format(order_id)
+        for order_id in order_ids
+    )
+    return ORDERS_PAGE.format(action=action, token=token, orders=orders).encode()
+
+
+@pytest.fixture
+def orders_api(credentials, transport):
+    return mws.Orders(transport=transport, **credentials)
+
+
+def test_paginate_follows_next_tokens(orders_api, transport):
+    transport.add_response(orders_page(['1', '2'], next_token='abc'))
+    transport.add_response(orders_page(['3'], next_token='def', action='ListOrdersByNextToken'))
+    transport.add_response(orders_page(['4'], action='ListOrdersByNextToken'))
+
+    pages = orders_api.paginate(orders_api.list_orders, created_after='2017-01-01')
+    first = next(pages)
+    # Pages are requested lazily, as they are consumed.
+    assert len(transport.requests) == 1
+    assert first.parsed.NextToken == 'abc'
+    assert len(list(pages)) == 2
+
+    assert transport.actions == ['ListOrders', 'ListOrdersByNextToken', 'ListOrdersByNextToken']
+    assert transport.requests[0]['params']['CreatedAfter'] == '2017-01-01'
+    assert transport.requests[1]['params']['NextToken'] == 'abc'
+    assert transport.requests[2]['params']['NextToken'] == 'def'
+
+
+def test_paginate_accepts_method_name(orders_api, transport):
+    transport.add_response(orders_page(['1']))
+    assert len(list(orders_api.paginate('list_orders'))) == 1
+
+
+def test_iter_records_yields_single_and_repeated_records(orders_api, transport):
+    transport.add_response(orders_page(['1', '2'], next_token='abc'))
+    transport.add_response(orders_page(['3'], next_token='def', action='ListOrdersByNextToken'))
+    transport.add_response(orders_page([], action='ListOrdersByNextToken'))
+
+    records = orders_api.iter_records(orders_api.list_orders)
+    assert [order.AmazonOrderId for order in records] == ['1', '2', '3']
+
+
+def test_paginate_rejects_methods_without_next_token(orders_api):
+    with pytest.raises(mws.MWSError):
+        next(orders_api.paginate(orders_api.get_order, ['1']))
+
+
+def test_iterate_path_wildcard():
+    parsed = mws.utils.XML2Dict().fromstring(
+        '<Result><FinancialEvents>'
+        '<ShipmentEventList><ShipmentEvent><Id>1</Id></ShipmentEvent><ShipmentEvent><Id>2</Id></ShipmentEvent>'
+        '</ShipmentEventList>'
+        '<RefundEventList><ShipmentEvent><Id>3</Id></ShipmentEvent></RefundEventList>'
+        '<AdjustmentEventList/>'
+        '</FinancialEvents></Result>'
+    ).Result
+    found = mws.utils.iterate_path(parsed, 'FinancialEvents.*.*')
+    assert [event.Id for event in found] == ['1', '2', '3']
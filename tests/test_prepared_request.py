@@ -0,0 +1,61 @@
+"""
+Testing `PreparedRequest`, built and sent separately.
+"""
+import pytest
+
+import mws
+# pylint: disable=invalid-name
+
+BODY = b'<ListOrdersResponse><ListOrdersResult><NextToken>abc</NextToken></ListOrdersResult></ListOrdersResponse>'
+
+
+@pytest.fixture
+def orders_api(credentials, transport):
+    return mws.Orders(transport=transport, **credentials)
+
+
+def test_prepare_does_not_send(orders_api, transport):
+    prepared = orders_api.prepare(orders_api.list_orders, created_after='2017-01-01', orderstatus=['Shipped'])
+    assert transport.requests == []
+    assert isinstance(prepared, mws.PreparedRequest)
+    assert prepared.action == 'ListOrders'
+    assert prepared.method == 'GET'
+    assert prepared.params['OrderStatus.Status.1'] == 'Shipped'
+    assert prepared.url.startswith('https://mws.amazonservices.com/Orders/2013-09-01?AWSAccessKeyId=')
+    assert '&Signature=' in prepared.query
+    # The instance itself still sends requests.
+    assert orders_api.make_request.__name__ == 'make_request'
+
+
+def test_prepare_by_name_follows_next_token(orders_api):
+    prepared = orders_api.prepare('list_orders', next_token='abc')
+    assert prepared.action == 'ListOrdersByNextToken'
+    assert prepared.method == 'POST'
+    assert prepared.rootkey == 'ListOrdersByNextTokenResult'
+
+
+def test_send_request_sends_prepared_url(orders_api, transport):
+    prepared = orders_api.prepare(orders_api.list_orders)
+    url = prepared.url
+    transport.add_response(BODY)
+    response = orders_api.send_request(prepared)
+    assert transport.requests[0]['url'] == url
+    assert response.parsed.NextToken == 'abc'
+
+
+def test_stale_requests_are_signed_again(orders_api, transport):
+    prepared = orders_api.prepare(orders_api.list_orders)
+    prepared.signed_at -= mws.PreparedRequest.MAX_AGE + 1
+    signed_at = prepared.signed_at
+    transport.add_response(BODY)
+    orders_api.send_request(prepared)
+    assert prepared.signed_at > signed_at
+
+
+def test_prepared_post_keeps_body_and_headers(credentials):
+    feeds_api = mws.Feeds(**credentials)
+    prepared = feeds_api.prepare(feeds_api.submit_feed, b'<feed/>', '_POST_PRODUCT_DATA_')
+    assert prepared.method == 'POST'
+    assert prepared.body == b'<feed/>'
+    assert prepared.headers['Content-Type'] == 'text/xml'
+    assert 'Content-MD5' in prepared.headers
@@ -0,0 +1,107 @@
+"""
+Testing the columnar pricing extraction of Products responses.
+"""
+import math
+from array import array
+
+import pytest
+
+import mws
+from mws.pricing import PricingTable, extract_pricing
+from .test_compact import OFFERS
+# pylint: disable=invalid-name
+
+COMPETITIVE_PRICING = b"""<?xml version="1.0"?>
+<GetCompetitivePricingForASINResponse xmlns="http://mws.amazonservices.com/schema/Products/2011-10-01">
+  <GetCompetitivePricingForASINResult ASIN="B000000002" status="Success">
+    <Product>
+      <Identifiers>
+        <MarketplaceASIN><MarketplaceId>ATVPDKIKX0DER</MarketplaceId><ASIN>B000000002</ASIN></MarketplaceASIN>
+      </Identifiers>
+      <CompetitivePricing>
+        <CompetitivePrices>
+          <CompetitivePrice belongsToRequester="false" condition="New" subcondition="New">
+            <CompetitivePriceId>1</CompetitivePriceId>
+            <Price>
+              <LandedPrice><CurrencyCode>USD</CurrencyCode><Amount>15.99</Amount></LandedPrice>
+              <ListingPrice><CurrencyCode>USD</CurrencyCode><Amount>11.99</Amount></ListingPrice>
+              <Shipping><CurrencyCode>USD</CurrencyCode><Amount>4.00</Amount></Shipping>
+            </Price>
+          </CompetitivePrice>
+        </CompetitivePrices>
+      </CompetitivePricing>
+    </Product>
+  </GetCompetitivePricingForASINResult>
+  <GetCompetitivePricingForASINResult ASIN="B000000003" status="ClientError">
+    <Error><Type>Sender</Type><Code>InvalidParameterValue</Code><Message>Invalid ASIN</Message></Error>
+  </GetCompetitivePricingForASINResult>
+  <ResponseMetadata><RequestId>abc</RequestId></ResponseMetadata>
+</GetCompetitivePricingForASINResponse>"""
+
+MY_PRICE = b"""<?xml version="1.0"?>
+<GetMyPriceForSKUResponse xmlns="http://mws.amazonservices.com/schema/Products/2011-10-01">
+  <GetMyPriceForSKUResult SellerSKU="SKU-1" status="Success">
+    <Product>
+      <Identifiers>
+        <MarketplaceASIN><MarketplaceId>ATVPDKIKX0DER</MarketplaceId><ASIN>B000000004</ASIN></MarketplaceASIN>
+        <SKUIdentifier><MarketplaceId>ATVPDKIKX0DER</MarketplaceId><SellerSKU>SKU-1</SellerSKU></SKUIdentifier>
+      </Identifiers>
+      <Offers>
+        <Offer>
+          <BuyingPrice>
+            <LandedPrice><CurrencyCode>USD</CurrencyCode><Amount>20.00</Amount></LandedPrice>
+            <ListingPrice><CurrencyCode>USD</CurrencyCode><Amount>20.00</Amount></ListingPrice>
+          </BuyingPrice>
+          <RegularPrice><CurrencyCode>USD</CurrencyCode><Amount>25.00</Amount></RegularPrice>
+          <FulfillmentChannel>AMAZON</FulfillmentChannel>
+          <ItemCondition>New</ItemCondition>
+          <SellerSKU>SKU-1</SellerSKU>
+        </Offer>
+      </Offers>
+    </Product>
+  </GetMyPriceForSKUResult>
+</GetMyPriceForSKUResponse>"""
+
+
+def test_lowest_offer_listings():
+    columns = extract_pricing(OFFERS, use_numpy=False)
+    assert columns.asin == ['B000000001', 'B000000001']
+    assert columns.condition == ['New', 'Used']
+    assert columns.fulfillment_channel == ['Amazon', 'Merchant']
+    assert columns.currency == ['USD', 'USD']
+    assert columns.landed_price == array('d', [12.99, 9.99])
+    assert all(math.isnan(price) for price in columns.listing_price)
+    assert columns['count'] == array('l', [3, 1])
+
+
+def test_competitive_pricing_and_errors():
+    table = PricingTable().add(COMPETITIVE_PRICING)
+    columns = table.columns(use_numpy=False)
+    assert len(table) == 1
+    assert columns.condition == ['New']
+    assert list(columns.shipping) == [4.0]
+    assert table.errors == [{'asin': 'B000000003', 'sku': '', 'status': 'ClientError',
+                             'code': 'InvalidParameterValue', 'message': 'Invalid ASIN'}]
+
+
+def test_my_price_from_api_response(credentials, transport):
+    products_api = mws.Products(transport=transport, **credentials)
+    transport.add_response(MY_PRICE)
+    columns = extract_pricing(products_api.get_my_price_for_sku('ATVPDKIKX0DER', ['SKU-1']), use_numpy=False)
+    assert columns.asin == ['B000000004']
+    assert columns.sku == ['SKU-1']
+    assert columns.fulfillment_channel == ['AMAZON']
+    assert list(columns.landed_price) == [20.0]
+
+
+def test_several_responses_make_one_table():
+    columns = extract_pricing([OFFERS, COMPETITIVE_PRICING, MY_PRICE], use_numpy=False)
+    assert columns.asin == ['B000000001', 'B000000001', 'B000000002', 'B000000004']
+
+
+def test_numpy_columns():
+    numpy = pytest.importorskip('numpy')
+    columns = extract_pricing([OFFERS, MY_PRICE])
+    assert columns.landed_price.dtype == numpy.float64
+    assert columns['count'].dtype == numpy.int64
+    assert list(columns.asin[columns.landed_price < 15]) == ['B000000001', 'B000000001']
@@ -0,0 +1,269 @@
+"""
+Testing the report helpers of `mws.reports`: ReportRunner and ReportHarvester.
+"""
+import datetime
+import io
+
+import pytest
+
+import mws
+from mws.reports import ReportJob, ReportRunner
+from .test_retry import THROTTLED
+from .test_throttle import FakeClock
+# pylint: disable=invalid-name
+
+RESPONSE = """<?xml version="1.0"?>
+<{action}Response xmlns="http://mws.amazonaws.com/doc/2009-01-01/">
+  <{action}Result>{result}</{action}Result>
+</{action}Response>"""
+
+REQUEST_INFO = """<ReportRequestInfo>
+  <ReportRequestId>{request_id}</ReportRequestId>
+  <ReportType>{report_type}</ReportType>
+  <ReportProcessingStatus>{status}</ReportProcessingStatus>
+  {report_id}
+</ReportRequestInfo>"""
+
+
+class ReportService(object):
+    """
+    Answers Reports requests: a report of type "_<seconds>_<final status>_"
+    is processed that many seconds after it is requested.
+    """
+    def __init__(self, clock):
+        self.clock = clock
+        self.requests = {}
+
+    def __call__(self, params):
+        action = params['Action']
+        if action == 'RequestReport':
+            request_id = str(len(self.requests) + 1)
+            self.requests[request_id] = (params['ReportType'], self.clock())
+            return self.render(action, [request_id])
+        if action == 'GetReportRequestList':
+            request_ids = [value for key, value in sorted(params.items()) if key.startswith('ReportRequestIdList.')]
+            assert params['MaxCount'] == str(len(request_ids))
+            return self.render(action, request_ids)
+        return 'report {}'.format(params['ReportId']).encode()
+
+    def status(self, request_id):
+        report_type, requested_at = self.requests[request_id]
+        seconds, status = report_type.strip('_').split('_', 1)
+        if self.clock() - requested_at < int(seconds):
+            return '_IN_PROGRESS_'
+        return '_{}_'.format(status)
+
+    def render(self, action, request_ids):
+        infos = ''.join(
+            REQUEST_INFO.format(
+                request_id=request_id, report_type=self.requests[request_id][0], status=self.status(request_id),
+                report_id='<GeneratedReportId>R{}</GeneratedReportId>'.format(request_id)
+                if self.status(request_id) == '_DONE_' else '')
+            for request_id in request_ids)
+        return RESPONSE.format(action=action, result=infos).encode()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def reports_api(credentials, transport, clock):
+    transport.respond_with(ReportService(clock))
+    return mws.Reports(transport=transport, **credentials)
+
+
+def make_runner(reports_api, clock, **kwargs):
+    return ReportRunner(reports_api, sleep=clock.sleep, clock=clock, **kwargs)
+
+
+def test_reports_are_downloaded_as_they_are_done(reports_api, transport, clock):
+    jobs = [ReportJob('_{}_DONE_'.format(seconds), sink=io.BytesIO()) for seconds in (600, 20, 90)]
+    finished = list(make_runner(reports_api, clock).run(jobs))
+    assert [job.report_type for job in finished] == ['_20_DONE_', '_90_DONE_', '_600_DONE_']
+    assert jobs[0].sink.getvalue() == b'report R1'
+    assert [job.status for job in jobs] == ['_DONE_'] * 3
+    assert jobs[0].response.size == len(b'report R1')
+    # Every pending request is polled at once.
+    first_poll = transport.requests[3]['params']
+    assert first_poll['Action'] == 'GetReportRequestList'
+    assert [first_poll['ReportRequestIdList.Id.{}'.format(n)] for n in (1, 2, 3)] == ['1', '2', '3']
+
+
+def test_polls_are_spaced_by_age(reports_api, transport, clock):
+    job = ReportJob('_3600_DONE_')
+    list(make_runner(reports_api, clock, max_interval=600).run([job]))
+    polls = transport.actions.count('GetReportRequestList')
+    # Fixed 5 second polling would take 720 polls.
+    assert polls < 30
+    assert job.latency < 3600 * 1.3
+    assert job.response.parsed == b'report R1'
+    assert max(clock.slept) <= 600
+
+
+def test_quick_reports_are_noticed_quickly(reports_api, clock):
+    job = ReportJob('_12_DONE_')
+    list(make_runner(reports_api, clock).run([job]))
+    assert job.latency <= 15
+
+
+def test_reports_without_data(reports_api, transport, clock):
+    jobs = [ReportJob('_10_DONE_NO_DATA_'), ReportJob('_10_CANCELLED_')]
+    finished = list(make_runner(reports_api, clock).run(jobs))
+    assert sorted(job.status for job in finished) == ['_CANCELLED_', '_DONE_NO_DATA_']
+    assert [job.response for job in finished] == [None, None]
+    assert 'GetReport' not in transport.actions
+
+
+def test_failed_request_is_reported(reports_api, transport, clock):
+    transport.respond_with(None)
+    transport.add_response(THROTTLED, status_code=503)
+    job, = make_runner(reports_api, clock).run([ReportJob('_10_DONE_')])
+    assert isinstance(job.error, mws.MWSError)
+    assert job.request_id is None
+
+
+def test_requests_wait_for_quota_while_polling(reports_api, transport, clock):
+    reports_api.throttle = mws.Throttle(limits={'RequestReport': (1, 60.0)}, sleep=clock.sleep, clock=clock)
+    jobs = [ReportJob('_5_DONE_'), ReportJob('_5_DONE_')]
+    finished = list(make_runner(reports_api, clock).run(jobs))
+    assert len(finished) == 2
+    # The first report is done before the quota allows the second request.
+    assert transport.actions[:4] == ['RequestReport', 'GetReportRequestList', 'GetReport', 'RequestReport']
+
+
+def test_requests_no_longer_listed_are_given_up_on(reports_api, transport, clock):
+    service = transport.responder
+
+    def purged(params):
+        if params['Action'] == 'GetReportRequestList':
+            return service.render(params['Action'], [])
+        return service(params)
+
+    transport.respond_with(purged)
+    job, = make_runner(reports_api, clock, max_wait=3600).run([ReportJob('_10_DONE_')])
+    assert isinstance(job.error, mws.MWSError)
+    assert job.response is None
+    assert 3600 <= job.latency < 3600 + 300
+
+
+REPORT_INFO = """<ReportInfo>
+  <ReportId>{report_id}</ReportId>
+  <ReportType>_GET_ORDERS_DATA_</ReportType>
+  <ReportRequestId>Q{report_id}</ReportRequestId>
+  <AvailableDate>{date}</AvailableDate>
+  <Acknowledged>{acknowledged}</Acknowledged>
+</ReportInfo>"""
+
+
+class ScheduledReports(object):
+    """
+    Answers GetReportList, GetReport and UpdateReportAcknowledgements requests
+    for a dict of report ID -> AvailableDate, listing two reports per page.
+    """
+    def __init__(self, reports):
+        self.reports = reports
+        self.acknowledged = set()
+        self.broken = set()
+
+    def __call__(self, params):
+        action = params['Action']
+        if action == 'GetReport':
+            if params['ReportId'] in self.broken:
+                return THROTTLED, 503
+            return 'report {}'.format(params['ReportId']).encode()
+        if action == 'UpdateReportAcknowledgements':
+            assert params['Acknowledged'] == 'true'
+            self.acknowledged.update(value for key, value in params.items() if key.startswith('ReportIdList.'))
+            return RESPONSE.format(action=action, result='').encode()
+        if action == 'GetReportListByNextToken':
+            after, acknowledged, page = params['NextToken'].split('|')
+            page = int(page)
+        else:
+            after, acknowledged, page = params.get('AvailableFromDate', ''), params.get('Acknowledged', ''), 0
+        reports = sorted(
+            (date, report_id) for report_id, date in self.reports.items()
+            if date[:19] >= after[:19] and not (acknowledged == 'false' and report_id in self.acknowledged))
+        token = ''
+        if len(reports) > page * 2 + 2:
+            token = '<HasNext>true</HasNext><NextToken>{}|{}|{}</NextToken>'.format(after, acknowledged, page + 1)
+        infos = ''.join(
+            REPORT_INFO.format(report_id=report_id, date=date, acknowledged=report_id in self.acknowledged)
+            for date, report_id in reports[page * 2:page * 2 + 2])
+        return RESPONSE.format(action=action, result=token + infos).encode()
+
+
+@pytest.fixture
+def scheduled(transport):
+    scheduled = ScheduledReports({
+        '1': '2017-01-01T00:00:00+00:00',
+        '2': '2017-01-02T00:00:00+00:00',
+        '3': '2017-01-03T00:00:00+00:00',
+    })
+    transport.respond_with(scheduled)
+    return scheduled
+
+
+def harvested(jobs):
+    return sorted(job.report_id for job in jobs)
+
+
+def test_harvester_downloads_new_reports_once(reports_api, transport, scheduled, tmpdir):
+    store = mws.MemoryStore()
+    harvester = mws.ReportHarvester(reports_api, store, sink=str(tmpdir))
+    assert harvested(harvester.run()) == ['1', '2', '3']
+    assert tmpdir.join('2').read() == 'report 2'
+    assert scheduled.acknowledged == {'1', '2', '3'}
+    assert store.get('reports') == {
+        'after': '2017-01-03T00:00:00+00:00', 'seen': {'3': '2017-01-03T00:00:00+00:00'}}
+
+    scheduled.reports['4'] = '2017-01-04T00:00:00+00:00'
+    transport.requests = []
+    assert harvested(harvester.run()) == ['4']
+    assert transport.requests[0]['params']['AvailableFromDate'] == '2017-01-03T00:00:00+00:00'
+    assert transport.requests[0]['params']['Acknowledged'] == 'false'
+    assert transport.actions.count('GetReport') == 1
+
+
+def test_harvester_without_acknowledgements_uses_the_watermark(reports_api, transport, scheduled):
+    sinks = {}
+
+    def sink(info):
+        sinks[info.ReportId] = io.BytesIO()
+        return sinks[info.ReportId]
+
+    harvester = mws.ReportHarvester(reports_api, mws.MemoryStore(), sink=sink, acknowledge=False,
+                                    start=datetime.datetime(2017, 1, 2))
+    assert harvested(harvester.run()) == ['2', '3']
+    assert sinks['3'].getvalue() == b'report 3'
+    assert harvested(harvester.run()) == []
+    assert 'UpdateReportAcknowledgements' not in transport.actions
+
+
+def test_failed_download_is_retried(reports_api, transport, scheduled, tmpdir):
+    store = mws.MemoryStore()
+    scheduled.broken.add('2')
+    harvester = mws.ReportHarvester(reports_api, store, sink=str(tmpdir), max_workers=1)
+    jobs = list(harvester.run())
+    assert [job.report_id for job in jobs if job.error is not None] == ['2']
+    assert scheduled.acknowledged == {'1', '3'}
+    assert store.get('reports')['after'] == '2017-01-02T00:00:00+00:00'
+
+    scheduled.broken.clear()
+    assert harvested(harvester.run()) == ['2']
+    assert scheduled.acknowledged == {'1', '2', '3'}
+    assert store.get('reports')['after'] == '2017-01-03T00:00:00+00:00'
+
+
+def test_harvest_cut_short_keeps_what_was_harvested(reports_api, transport, scheduled, tmpdir):
+    store = mws.MemoryStore()
+    harvester = mws.ReportHarvester(reports_api, store, sink=str(tmpdir), max_workers=1)
+    jobs = harvester.run()
+    first = next(jobs).report_id
+    jobs.close()
+    assert scheduled.acknowledged == {first}
+    assert store.get('reports') == {'after': None, 'seen': {first: scheduled.reports[first]}}
+
+    unacknowledged = mws.ReportHarvester(reports_api, store, sink=str(tmpdir), max_workers=1, acknowledge=False)
+    assert first not in harvested(unacknowledged.run())
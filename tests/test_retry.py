@@ -0,0 +1,117 @@
+"""
+Testing `RetryPolicy` and retries made by `MWS.make_request`.
+"""
+import datetime
+
+import pytest
+import requests
+
+import mws
+from mws.retry import parse_error
+# pylint: disable=invalid-name
+
+THROTTLED = b"""<?xml version="1.0"?>
+<ErrorResponse xmlns="https://mws.amazonservices.com/Orders/2013-09-01">
+  <Error>
+    <Type>Sender</Type>
+    <Code>RequestThrottled</Code>
+    <Message>Request is throttled</Message>
+  </Error>
+  <RequestID>6ffb2b9c-5a41-4a3b-9e2a-a6a3c2b5b9d1</RequestID>
+</ErrorResponse>"""
+
+INVALID = THROTTLED.replace(b'RequestThrottled', b'InvalidParameterValue')
+
+SUCCESS = b'<ListOrdersResponse><ListOrdersResult><NextToken>abc</NextToken></ListOrdersResult></ListOrdersResponse>'
+
+
+class Sleeper(object):
+    def __init__(self):
+        self.slept = []
+
+    def __call__(self, seconds):
+        self.slept.append(seconds)
+
+
+@pytest.fixture
+def sleeper():
+    return Sleeper()
+
+
+def test_parse_error():
+    assert parse_error(THROTTLED) == ('RequestThrottled', 'Request is throttled')
+    assert parse_error(b'not xml at all') == (None, None)
+
+
+def test_backoff_is_jittered_exponential():
+    policy = mws.RetryPolicy(backoff_base=1, backoff_max=10)
+    for attempt, ceiling in [(0, 1), (1, 2), (2, 4), (3, 8), (4, 10), (10, 10)]:
+        delay = policy.backoff(attempt)
+        assert ceiling / 2.0 <= delay <= ceiling
+
+
+def test_only_transient_errors_are_retried():
+    policy = mws.RetryPolicy(max_retries=2)
+    assert policy.get_delay(0, 503, THROTTLED, {}) is not None
+    assert policy.get_delay(0, 500, b'', {}) is not None
+    assert policy.get_delay(0, 400, INVALID, {}) is None
+    # Gives up after max_retries.
+    assert policy.get_delay(2, 503, THROTTLED, {}) is None
+
+
+def test_waits_for_quota_reset():
+    now = datetime.datetime(2017, 8, 30, 12, 30)
+    policy = mws.RetryPolicy(backoff_base=1, backoff_max=1, utcnow=lambda: now)
+    headers = {
+        'x-mws-quota-remaining': '0.0',
+        'x-mws-quota-resetsOn': '2017-08-30T13:00:00.000Z',
+    }
+    assert policy.get_delay(0, 503, THROTTLED, headers) == 1800
+    headers['x-mws-quota-remaining'] = '12.0'
+    assert policy.get_delay(0, 503, THROTTLED, headers) <= 1
+
+
+def test_make_request_retries_then_succeeds(credentials, transport, sleeper):
+    retry = mws.RetryPolicy(backoff_base=2, sleep=sleeper)
+    orders_api = mws.Orders(transport=transport, retry=retry, **credentials)
+    transport.add_response(THROTTLED, status_code=503)
+    transport.add_response(b'', status_code=500)
+    transport.add_response(SUCCESS)
+
+    response = orders_api.list_orders()
+    assert response.parsed.NextToken == 'abc'
+    assert response.retries == 2
+    assert response.backoff_time == sum(sleeper.slept)
+    assert len(transport.requests) == 3
+
+
+def test_make_request_raises_non_retryable_errors(credentials, transport, sleeper):
+    orders_api = mws.Orders(transport=transport, retry=mws.RetryPolicy(sleep=sleeper), **credentials)
+    transport.add_response(INVALID, status_code=400)
+    with pytest.raises(mws.MWSError) as excinfo:
+        orders_api.list_orders()
+    assert excinfo.value.response.status_code == 400
+    assert excinfo.value.retries == 0
+    assert sleeper.slept == []
+
+
+def test_make_request_does_not_retry_by_default(credentials, transport):
+    orders_api = mws.Orders(transport=transport, **credentials)
+    transport.add_response(THROTTLED, status_code=503)
+    with pytest.raises(mws.MWSError):
+        orders_api.list_orders()
+
+
+def test_make_request_retries_network_errors(credentials, transport, sleeper):
+    orders_api = mws.Orders(transport=transport, retry=mws.RetryPolicy(sleep=sleeper), **credentials)
+    transport.add_error(requests.ConnectionError('Connection reset by peer'))
+    transport.add_response(SUCCESS)
+    response = orders_api.list_orders()
+    assert response.retries == 1
+    assert len(sleeper.slept) == 1
+    assert len(transport.requests) == 2
+
+    orders_api.retry = mws.RetryPolicy(retry_network_errors=False, sleep=sleeper)
+    transport.add_error(requests.Timeout('Read timed out'))
+    with pytest.raises(requests.Timeout):
+        orders_api.list_orders()
@@ -0,0 +1,69 @@
+"""
+Testing `MWS.stream_records`, parsing records while pages download.
+"""
+import pytest
+
+import mws
+from mws import utils
+from .test_pagination import orders_page
+# pylint: disable=invalid-name
+
+FINANCIAL_EVENTS = b"""<?xml version="1.0"?>
+<ListFinancialEventsResponse xmlns="http://mws.amazonservices.com/Finances/2015-05-01">
+  <ListFinancialEventsResult>
+    <FinancialEvents>
+      <ShipmentEventList>
+        <ShipmentEvent><AmazonOrderId>1</AmazonOrderId></ShipmentEvent>
+        <ShipmentEvent><AmazonOrderId>2</AmazonOrderId></ShipmentEvent>
+      </ShipmentEventList>
+      <RefundEventList>
+        <ShipmentEvent><AmazonOrderId>3</AmazonOrderId></ShipmentEvent>
+      </RefundEventList>
+    </FinancialEvents>
+  </ListFinancialEventsResult>
+</ListFinancialEventsResponse>"""
+
+
+@pytest.fixture
+def orders_api(credentials, transport):
+    api = mws.Orders(transport=transport, **credentials)
+    # Small chunks, to split records across them.
+    api.STREAM_CHUNK_SIZE = 16
+    return api
+
+
+def test_stream_records_follows_next_tokens(orders_api, transport):
+    transport.add_response(orders_page(['1', '2'], next_token='abc'))
+    transport.add_response(orders_page(['3'], action='ListOrdersByNextToken'))
+
+    records = orders_api.stream_records(orders_api.list_orders, created_after='2017-01-01')
+    assert next(records).AmazonOrderId == '1'
+    # The first record is yielded before the next page is requested.
+    assert len(transport.requests) == 1
+    assert [record.AmazonOrderId for record in records] == ['2', '3']
+    assert transport.actions == ['ListOrders', 'ListOrdersByNextToken']
+    assert transport.requests[1]['params']['NextToken'] == 'abc'
+
+
+def test_stream_records_matches_iter_records(credentials, transport):
+    finances_api = mws.Finances(transport=transport, **credentials)
+    transport.add_response(FINANCIAL_EVENTS)
+    transport.add_response(FINANCIAL_EVENTS)
+    streamed = list(finances_api.stream_records(finances_api.list_financial_events))
+    assert streamed == list(finances_api.iter_records(finances_api.list_financial_events))
+    assert [event.AmazonOrderId for event in streamed] == ['1', '2', '3']
+
+
+def test_stream_records_requires_a_record_path(orders_api):
+    with pytest.raises(mws.MWSError):
+        next(orders_api.stream_records(orders_api.get_order, ['1']))
+
+
+def test_record_builder_sets_records_aside():
+    builder = utils.RecordBuilder([None, 'ListOrdersResult', 'Orders', 'Order'])
+    page = orders_page(['1', '2'], next_token='abc')
+    records = list(builder.iterparse(page[i:i + 10] for i in range(0, len(page), 10)))
+    assert [record.AmazonOrderId for record in records] == ['1', '2']
+    result = builder.root.ListOrdersResponse.ListOrdersResult
+    assert result.NextToken == 'abc'
+    assert 'Order' not in result.Orders
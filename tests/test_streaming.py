@@ -0,0 +1,96 @@
+"""
+Testing report and feed result downloads streamed to a file.
+"""
+import io
+
+import pytest
+
+import mws
+from mws.mws import DataWrapper, StreamWrapper, calc_md5
+# pylint: disable=invalid-name
+
+REPORT = b'sku\tprice\tquantity\n' + b''.join(
+    'SKU-{0}\t{0}.99\t{0}\n'.format(i).encode() for i in range(5000)
+)
+
+
+@pytest.fixture
+def reports_api(credentials, transport):
+    return mws.Reports(transport=transport, **credentials)
+
+
+def test_report_streamed_to_file_object(reports_api, transport):
+    transport.add_response(REPORT, headers={'Content-MD5': calc_md5(REPORT).decode()})
+    sink = io.BytesIO()
+    response = reports_api.get_report('1234', stream_to=sink)
+    assert isinstance(response, StreamWrapper)
+    assert response.parsed is sink
+    assert sink.getvalue() == REPORT
+    assert response.size == len(REPORT)
+    assert response.content_md5 == calc_md5(REPORT)
+    assert not sink.closed
+
+
+def test_report_streamed_to_path(reports_api, transport, tmpdir):
+    path = str(tmpdir.join('report.txt'))
+    transport.add_response(REPORT)
+    response = reports_api.get_report('1234', stream_to=path)
+    assert response.parsed == path
+    with open(path, 'rb') as report:
+        assert report.read() == REPORT
+
+
+def test_streamed_md5_mismatch_raises(reports_api, transport):
+    transport.add_response(REPORT, headers={'Content-MD5': calc_md5(b'other').decode()})
+    sink = io.BytesIO()
+    sink.write(b'previous report\n')
+    with pytest.raises(mws.MWSError) as excinfo:
+        reports_api.get_report('1234', stream_to=sink)
+    assert 'Content-MD5 mismatch' in str(excinfo.value)
+    assert sink.getvalue() == b'previous report\n'
+
+
+def test_streamed_md5_mismatch_leaves_path_untouched(reports_api, transport, tmpdir):
+    path = tmpdir.join('report.txt')
+    path.write_binary(b'previous report')
+    transport.add_response(REPORT, headers={'Content-MD5': calc_md5(b'other').decode()})
+    with pytest.raises(mws.MWSError):
+        reports_api.get_report('1234', stream_to=str(path))
+    assert path.read_binary() == b'previous report'
+    assert tmpdir.listdir() == [path]
+
+
+def test_interrupted_stream_is_discarded_and_closed(reports_api, transport, tmpdir):
+    response = transport.add_response(REPORT)
+    closed = []
+    response.close = lambda: closed.append(True)
+
+    def broken(chunk_size):
+        yield REPORT[:100]
+        raise IOError('connection reset')
+
+    response.iter_content = broken
+    with pytest.raises(IOError):
+        reports_api.get_report('1234', stream_to=str(tmpdir.join('report.txt')))
+    assert tmpdir.listdir() == []
+    assert closed == [True]
+
+
+def test_streamed_request_asks_transport_to_stream(credentials):
+    class RecordingTransport(object):
+        def request(self, method, url, data=None, headers=None, stream=False):
+            self.stream = stream
+            raise RuntimeError('stop')
+
+    transport = RecordingTransport()
+    feeds_api = mws.Feeds(transport=transport, **credentials)
+    with pytest.raises(RuntimeError):
+        feeds_api.get_feed_submission_result('1234', stream_to=io.BytesIO())
+    assert transport.stream is True
+
+
+def test_flat_file_report_skips_xml_parsing(reports_api, transport):
+    transport.add_response(REPORT)
+    response = reports_api.get_report('1234')
+    assert isinstance(response, DataWrapper)
+    assert response.parsed == REPORT
@@ -0,0 +1,195 @@
+"""
+Testing the incremental order sync of `mws.sync.OrderSync` and the `mws.state` stores.
+"""
+import datetime
+import subprocess
+import sys
+
+import pytest
+
+import mws
+from mws.state import FileStore, MemoryStore, SQLiteStore
+from mws.sync import OrderSync
+from .test_pagination import ORDERS_PAGE
+# pylint: disable=invalid-name
+
+EXPIRED_TOKEN = b"""<?xml version="1.0"?>
+<ErrorResponse xmlns="https://mws.amazonservices.com/Orders/2013-09-01">
+  <Error>
+    <Type>Sender</Type>
+    <Code>InvalidParameterValue</Code>
+    <Message>Invalid NextToken</Message>
+  </Error>
+</ErrorResponse>"""
+
+
+class Marketplace(object):
+    """
+    Answers ListOrders requests from a dict of order ID -> LastUpdateDate,
+    both window bounds included, two orders per page.
+    """
+    def __init__(self, orders):
+        self.orders = orders
+
+    def __call__(self, params):
+        if params['Action'] == 'ListOrdersByNextToken':
+            after, before, page = params['NextToken'].split('|')
+            page = int(page)
+        else:
+            after, before, page = params['LastUpdatedAfter'], params['LastUpdatedBefore'], 0
+        matches = sorted((updated, order_id) for order_id, updated in self.orders.items()
+                         if after <= updated[:19] + 'Z' <= before)
+        token = ''
+        if len(matches) > page * 2 + 2:
+            token = '<NextToken>{}|{}|{}</NextToken>'.format(after, before, page + 1)
+        orders = ''.join(
+            '<Order><AmazonOrderId>{}</AmazonOrderId><LastUpdateDate>{}</LastUpdateDate></Order>'.format(
+                order_id, updated)
+            for updated, order_id in matches[page * 2:page * 2 + 2])
+        return ORDERS_PAGE.format(action=params['Action'], token=token, orders=orders).encode()
+
+
+class Clock(object):
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock(datetime.datetime(2017, 1, 2, 12, 0, 30, 500))
+
+
+@pytest.fixture
+def marketplace(transport):
+    marketplace = Marketplace({
+        '1': '2017-01-01T10:00:00Z',
+        '2': '2017-01-02T09:00:00.000Z',
+        '3': '2017-01-02T11:00:00Z',
+        '4': '2017-01-02T11:58:30Z',
+        '5': '2017-01-02T11:59:00Z',
+    })
+    transport.respond_with(marketplace)
+    return marketplace
+
+
+@pytest.fixture
+def orders_api(credentials, transport):
+    return mws.Orders(transport=transport, **credentials)
+
+
+def make_sync(orders_api, store, clock):
+    return OrderSync(orders_api, store, start=datetime.datetime(2017, 1, 1),
+                     utcnow=clock, marketplaceids=['ATVPDKIKX0DER'])
+
+
+def order_ids(orders):
+    return [order.AmazonOrderId for order in orders]
+
+
+def test_first_run_lists_orders_from_start_up_to_the_lag(orders_api, transport, marketplace, clock):
+    store = MemoryStore()
+    sync = make_sync(orders_api, store, clock)
+    assert order_ids(sync.run()) == ['1', '2', '3', '4']
+    params = transport.requests[0]['params']
+    assert params['LastUpdatedAfter'] == '2017-01-01T00:00:00Z'
+    assert params['LastUpdatedBefore'] == '2017-01-02T11:58:30Z'
+    assert params['MarketplaceId.Id.1'] == 'ATVPDKIKX0DER'
+    assert transport.actions == ['ListOrders', 'ListOrdersByNextToken']
+    assert sync.state == {'after': '2017-01-02T11:58:30Z', 'skip': {'4': '2017-01-02T11:58:30Z'}}
+
+
+def test_next_run_lists_only_new_and_changed_orders(orders_api, transport, marketplace, clock):
+    sync = make_sync(orders_api, MemoryStore(), clock)
+    list(sync.run())
+    marketplace.orders['2'] = '2017-01-02T12:01:00Z'
+    marketplace.orders['6'] = '2017-01-02T12:05:00Z'
+    clock.now += datetime.timedelta(minutes=10)
+    # Order 4, at the bound of both windows, is not listed twice.
+    assert order_ids(sync.run()) == ['5', '2', '6']
+    assert transport.requests[-2]['params']['LastUpdatedAfter'] == '2017-01-02T11:58:30Z'
+
+
+def test_run_within_the_lag_requests_nothing(orders_api, transport, marketplace, clock):
+    sync = make_sync(orders_api, MemoryStore(), clock)
+    list(sync.run())
+    count = len(transport.requests)
+    clock.now += datetime.timedelta(seconds=0.2)
+    assert list(sync.run()) == []
+    assert len(transport.requests) == count
+
+
+def test_first_run_requires_a_start(orders_api, marketplace, clock):
+    with pytest.raises(mws.MWSError):
+        list(OrderSync(orders_api, MemoryStore(), utcnow=clock).run())
+
+
+def test_interrupted_run_resumes_with_the_pending_page(orders_api, transport, marketplace, clock):
+    store = MemoryStore()
+    seen = []
+    with pytest.raises(RuntimeError):
+        for order in make_sync(orders_api, store, clock).run():
+            seen.append(order.AmazonOrderId)
+            if len(seen) == 3:
+                raise RuntimeError('crash')
+    assert store.get('orders')['next_token'] == '2017-01-01T00:00:00Z|2017-01-02T11:58:30Z|1'
+
+    clock.now += datetime.timedelta(minutes=10)
+    transport.requests = []
+    assert order_ids(make_sync(orders_api, store, clock).run()) == ['3', '4']
+    assert transport.actions == ['ListOrdersByNextToken']
+    assert store.get('orders')['after'] == '2017-01-02T11:58:30Z'
+
+
+def test_expired_token_restarts_the_window(orders_api, transport, marketplace, clock):
+    store = MemoryStore()
+    store.set('orders', {
+        'after': '2017-01-02T00:00:00Z', 'before': '2017-01-02T11:00:00Z',
+        'next_token': 'stale', 'skip': {}, 'boundary': {},
+    })
+    transport.respond_with(None)
+    transport.add_response(EXPIRED_TOKEN, status_code=400)
+    transport.add_response(marketplace({
+        'Action': 'ListOrders',
+        'LastUpdatedAfter': '2017-01-02T00:00:00Z',
+        'LastUpdatedBefore': '2017-01-02T11:00:00Z',
+    }))
+    assert order_ids(make_sync(orders_api, store, clock).run()) == ['2', '3']
+    assert transport.actions == ['ListOrdersByNextToken', 'ListOrders']
+    assert store.get('orders') == {'after': '2017-01-02T11:00:00Z', 'skip': {'3': '2017-01-02T11:00:00Z'}}
+
+
+@pytest.mark.parametrize('make_store', [
+    lambda tmpdir: MemoryStore(),
+    lambda tmpdir: FileStore(str(tmpdir.join('state.json'))),
+    lambda tmpdir: SQLiteStore(str(tmpdir.join('state.db'))),
+])
+def test_stores(make_store, tmpdir):
+    store = make_store(tmpdir)
+    assert store.get('orders') is None
+    assert store.get('orders', {}) == {}
+    store.set('orders', {'after': '2017-01-01T00:00:00Z', 'skip': {'1': 'x'}})
+    store.set('reports', ['a'])
+    assert store.get('orders') == {'after': '2017-01-01T00:00:00Z', 'skip': {'1': 'x'}}
+    store.delete('orders')
+    store.delete('missing')
+    assert store.get('orders') is None
+    assert store.get('reports') == ['a']
+
+
+def test_persistent_stores_survive_reopening(tmpdir):
+    path = str(tmpdir.join('state.db'))
+    SQLiteStore(path).set('orders', {'after': 'x'})
+    assert SQLiteStore(path).get('orders') == {'after': 'x'}
+    path = str(tmpdir.join('state.json'))
+    FileStore(path).set('orders', {'after': 'x'})
+    assert FileStore(path).get('orders') == {'after': 'x'}
+    assert tmpdir.listdir(lambda entry: entry.ext == '.tmp') == []
+
+
+def test_mws_imports_without_sqlite3():
+    # sys.modules[name] = None makes `import name` fail, as on Pythons built without _sqlite3.
+    code = "import sys; sys.modules['sqlite3'] = None; import mws; mws.MemoryStore().set('a', 1)"
+    subprocess.check_call([sys.executable, '-c', code])
@@ -0,0 +1,102 @@
+"""
+Testing the client-side `Throttle` token buckets with a fake clock.
+"""
+import threading
+
+import mws
+from mws.throttle import TokenBucket
+# pylint: disable=invalid-name
+
+
+class FakeClock(object):
+    """
+    Clock that only moves when slept on.
+    """
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def test_bucket_allows_burst_then_restore_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(6, 60, clock=clock)
+    assert [bucket.reserve() for _ in range(6)] == [0] * 6
+    # Further requests are queued one restore interval apart.
+    assert bucket.reserve() == 60
+    assert bucket.reserve() == 120
+    clock.now += 180
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 60
+
+
+def test_bucket_refills_up_to_max_quota():
+    clock = FakeClock()
+    bucket = TokenBucket(2, 1, clock=clock)
+    bucket.reserve()
+    bucket.reserve()
+    clock.now += 3600
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 1]
+
+
+def test_throttle_keys_by_seller_and_action():
+    clock = FakeClock()
+    throttle = mws.Throttle(limits={'SomeAction': (1, 10)}, sleep=clock.sleep, clock=clock)
+    assert throttle.wait('seller1', 'SomeAction') == 0
+    assert throttle.wait('seller2', 'SomeAction') == 0
+    assert throttle.wait('seller1', 'SomeAction') == 10
+    assert clock.slept == [10]
+    # Unknown actions are never delayed.
+    assert throttle.wait('seller1', 'UnknownAction') == 0
+
+
+def test_next_token_actions_share_base_quota():
+    throttle = mws.Throttle()
+    assert throttle.bucket('seller', 'ListOrdersByNextToken') is throttle.bucket('seller', 'ListOrders')
+    # Unless they have their own documented limits.
+    assert throttle.bucket('seller', 'GetReportListByNextToken') is not throttle.bucket('seller', 'GetReportList')
+
+
+def test_throttle_is_thread_safe():
+    throttle = mws.Throttle(limits={'SomeAction': (5, 1)}, clock=lambda: 0.0)
+    delays = []
+
+    def reserve():
+        delays.append(throttle.reserve('seller', 'SomeAction'))
+
+    threads = [threading.Thread(target=reserve) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(delays) == [0.0] * 5 + [float(n) for n in range(1, 16)]
+
+
+def test_make_request_waits_on_throttle(credentials, transport):
+    clock = FakeClock()
+    throttle = mws.Throttle(limits={'ListOrders': (1, 60)}, sleep=clock.sleep, clock=clock)
+    orders_api = mws.Orders(transport=transport, throttle=throttle, **credentials)
+    body = b'<ListOrdersResponse><ListOrdersResult/></ListOrdersResponse>'
+    transport.add_response(body)
+    transport.add_response(body)
+    orders_api.list_orders()
+    orders_api.list_orders()
+    assert clock.slept == [60]
+
+
+def test_available_does_not_reserve():
+    clock = FakeClock()
+    throttle = mws.Throttle(limits={'RequestReport': (2, 60)}, clock=clock)
+    assert throttle.available('seller', 'RequestReport') == 2
+    throttle.reserve('seller', 'RequestReport')
+    throttle.reserve('seller', 'RequestReport')
+    assert throttle.available('seller', 'RequestReport') == 0
+    clock.now += 30
+    assert throttle.available('seller', 'RequestReport') == 0.5
+    assert throttle.available('seller', 'Unknown') == float('inf')
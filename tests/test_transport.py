@@ -0,0 +1,150 @@
+"""
+Testing the pooled `Transport` against a local stub server.
+"""
+import threading
+
+import pytest
+
+import mws
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+# pylint: disable=invalid-name
+
+SERVICE_STATUS = (
+    b'<?xml version="1.0"?>\n'
+    b'<GetServiceStatusResponse xmlns="https://mws.amazonservices.com/Orders/2013-09-01">'
+    b'<GetServiceStatusResult><Status>GREEN</Status></GetServiceStatusResult>'
+    b'</GetServiceStatusResponse>'
+)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Answers every request with a GetServiceStatus response over HTTP/1.1,
+    recording the client port so connection reuse can be checked,
+    and the headers and body of uploads.
+    """
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def _respond(self):
+        self.server.client_ports.append(self.client_address[1])
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.server.uploads.append((dict(self.headers), self.rfile.read(length)))
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/xml')
+        self.send_header('Content-Length', str(len(SERVICE_STATUS)))
+        self.end_headers()
+        self.wfile.write(SERVICE_STATUS)
+
+    do_GET = _respond
+    do_POST = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+class KeepAliveHandler(StubHandler):
+    """
+    Keeps every connection open, even when the client asks to close it.
+    """
+    def _respond(self):
+        StubHandler._respond(self)
+        self.close_connection = False
+
+    do_GET = _respond
+    do_POST = _respond
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def serve(handler):
+    server = StubServer(('127.0.0.1', 0), handler)
+    server.client_ports = []
+    server.uploads = []
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+@pytest.fixture
+def stub_server():
+    server = serve(StubHandler)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def keep_alive_server():
+    server = serve(KeepAliveHandler)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def stub_domain(server):
+    return 'http://127.0.0.1:{}'.format(server.server_address[1])
+
+
+def test_connection_is_reused_between_calls(credentials, stub_server):
+    orders_api = mws.Orders(domain=stub_domain(stub_server), **credentials)
+    for _ in range(3):
+        response = orders_api.get_service_status()
+        assert response.parsed.Status == 'GREEN'
+    assert len(stub_server.client_ports) == 3
+    assert len(set(stub_server.client_ports)) == 1
+
+
+def test_transport_shared_between_api_instances(credentials, stub_server):
+    transport = mws.Transport(pool_maxsize=2, connect_timeout=1, read_timeout=5)
+    orders_api = mws.Orders(domain=stub_domain(stub_server), transport=transport, **credentials)
+    sellers_api = mws.Sellers(domain=stub_domain(stub_server), transport=transport, **credentials)
+    assert orders_api.transport is sellers_api.transport
+    orders_api.get_service_status()
+    sellers_api.get_service_status()
+    assert len(set(stub_server.client_ports)) == 1
+    assert transport.timeout == (1, 5)
+
+
+def test_keep_alive_disabled_opens_new_connections(credentials, stub_server):
+    transport = mws.Transport(keep_alive=False)
+    orders_api = mws.Orders(domain=stub_domain(stub_server), transport=transport, **credentials)
+    orders_api.get_service_status()
+    orders_api.get_service_status()
+    assert len(set(stub_server.client_ports)) == 2
+
+
+def test_keep_alive_disabled_closes_connections_the_server_keeps_open(credentials, keep_alive_server):
+    transport = mws.Transport(keep_alive=False)
+    orders_api = mws.Orders(domain=stub_domain(keep_alive_server), transport=transport, **credentials)
+    for _ in range(3):
+        orders_api.get_service_status()
+    assert len(set(keep_alive_server.client_ports)) == 3
+    transport.close()
+
+
+def test_each_instance_gets_its_own_transport_by_default(credentials):
+    assert mws.Orders(**credentials).transport is not mws.Orders(**credentials).transport
+
+
+def test_feed_file_is_uploaded_with_its_length(credentials, stub_server, tmpdir):
+    feed = tmpdir.join('feed.txt')
+    feed.write_binary(b'sku\tprice\n' * 50000)
+    feeds_api = mws.Feeds(domain=stub_domain(stub_server), **credentials)
+    feeds_api.submit_feed(str(feed), '_POST_FLAT_FILE_PRICEANDQUANTITYONLY_UPDATE_DATA_',
+                          content_type='text/tab-separated-values')
+    (headers, body), = stub_server.uploads
+    assert body == feed.read_binary()
+    assert headers['Content-Length'] == str(len(body))
+    assert 'Transfer-Encoding' not in headers
+    assert headers['Content-MD5'] == mws.mws.calc_md5(body).decode()
@@ -1,5 +1,15 @@
+import base64
+import hashlib
+import hmac
+
+import mws
 from mws.mws import calc_md5, calc_request_description
 
+try:
+    from urllib.parse import quote
+except ImportError:
+    from urllib import quote
+
 
 def test_calc_md5():
     assert calc_md5(b'mws') == b'mA5nPbh1CSx9M3dbkr3Cyg=='
@@ -22,3 +32,36 @@ def test_calc_request_description(access_key, account_id):
         '&SignatureVersion=2' \
         '&Timestamp=2017-08-12T19%3A40%3A35Z' \
         '&Version=2017-01-01'
+
+
+def legacy_signature(secret_key, method, domain, uri, request_description):
+    sig_data = '\n'.join([method, domain.replace('https://', '').lower(), uri, request_description])
+    return base64.b64encode(hmac.new(secret_key.encode(), sig_data.encode(), hashlib.sha256).digest())
+
+
+def test_signer_matches_legacy_signature(credentials, secret_key, timestamp):
+    api = mws.Products(auth_token='amzn.mws.token', **credentials)
+    prepared = api.prepare_request({
+        'Action': 'GetMatchingProductForId',
+        'MarketplaceId': 'ATVPDKIKX0DER',
+        'IdType': 'SellerSKU',
+        'IdList.Id.1': 'SKU 1/A',
+        'IdList.Id.2': 'SKU~2*B',
+        'Timestamp': timestamp,
+    })
+    params = api.get_params()
+    params.update(prepared.params)
+    description = calc_request_description(params)
+    assert prepared.query.startswith(description + '&Signature=')
+    signature = legacy_signature(secret_key, 'GET', api.domain, api.uri, description)
+    assert prepared.query == '{}&Signature={}'.format(description, quote(signature))
+    assert api.calc_signature('POST', description) == \
+        legacy_signature(secret_key, 'POST', api.domain, api.uri, description)
+
+
+def test_signer_follows_credential_changes(credentials):
+    api = mws.Orders(**credentials)
+    signer = api.signer
+    assert api.signer is signer
+    api.domain = 'https://mws-eu.amazonservices.com'
+    assert api.signer is not signer
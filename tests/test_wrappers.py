@@ -1,6 +1,8 @@
 import pytest
 
-from mws.mws import DataWrapper, MWSError
+import mws
+from mws import utils
+from mws.mws import DataWrapper, DictWrapper, MWSError
 
 
 def test_content_md5_comparison():
@@ -14,3 +16,36 @@ def test_content_md5_check_raises_exception_if_fails():
     hash = 'notthehash'
     with pytest.raises(MWSError):
         DataWrapper(data, {'content-md5': hash})
+
+
+ORDERS = b'<ListOrdersResponse><ListOrdersResult><NextToken>abc</NextToken></ListOrdersResult></ListOrdersResponse>'
+
+
+def test_dict_wrapper_parses_on_first_access(monkeypatch):
+    calls = []
+    parse_xml = utils.parse_xml
+    monkeypatch.setattr(utils, 'parse_xml', lambda *args: calls.append(args) or parse_xml(*args))
+    wrapper = DictWrapper(ORDERS, 'ListOrdersResult')
+    assert wrapper.original == ORDERS.decode()
+    assert calls == []
+    assert wrapper.parsed.NextToken == 'abc'
+    assert wrapper.parsed is wrapper.parsed
+    assert len(calls) == 1
+
+
+def test_dict_wrapper_serves_malformed_xml_as_is():
+    wrapper = DictWrapper(b'<html><body>Oops</html>')
+    assert wrapper.parsed == b'<html><body>Oops</html>'
+    assert wrapper.original == b'<html><body>Oops</html>'
+    corrupted = DictWrapper(b'<html><body>Oops</html>', headers={'content-md5': 'notthehash'})
+    assert corrupted.original == u'<html><body>Oops</html>'
+    with pytest.raises(MWSError):
+        corrupted.parsed
+
+
+def test_raw_responses_are_not_parsed(credentials, transport):
+    orders_api = mws.Orders(transport=transport, raw=True, **credentials)
+    transport.add_response(ORDERS)
+    response = orders_api.list_orders()
+    assert isinstance(response, DataWrapper)
+    assert response.parsed == ORDERS
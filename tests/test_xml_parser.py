@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Testing the single-pass XML parser against XML2Dict.
+"""
+import json
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from mws import utils
+from mws.mws import DictWrapper, remove_namespace
+# pylint: disable=invalid-name
+
+ORDERS = b'''<?xml version="1.0"?>
+<ListOrdersResponse xmlns="https://mws.amazonservices.com/Orders/2013-09-01">
+  <ListOrdersResult>
+    <Orders>
+      <Order>
+        <AmazonOrderId>1</AmazonOrderId>
+        <OrderTotal><CurrencyCode>USD</CurrencyCode><Amount>1.00</Amount></OrderTotal>
+      </Order>
+      <Order><AmazonOrderId>2</AmazonOrderId></Order>
+    </Orders>
+  </ListOrdersResult>
+  <ResponseMetadata><RequestId>abc</RequestId></ResponseMetadata>
+</ListOrdersResponse>'''
+
+PRODUCT = u'''<GetMatchingProductResponse xmlns="http://mws.amazonservices.com/schema/Products/2011-10-01">
+<GetMatchingProductResult ASIN="B000000001" status="Success">
+<Product xmlns:ns2="http://mws.amazonservices.com/schema/Products/2011-10-01/default.xsd" xmlns:x="urn:x">
+<ns2:ItemAttributes xml:lang="en-US"><ns2:Title>Fish &amp; chips – é</ns2:Title><x:Size x:unit="cm">3</x:Size>
+</ns2:ItemAttributes></Product></GetMatchingProductResult></GetMatchingProductResponse>'''
+
+
+def legacy_parse(xml):
+    if isinstance(xml, bytes):
+        xml = xml.decode('utf-8')
+    return utils.XML2Dict().fromstring(remove_namespace(xml))
+
+
+@pytest.mark.parametrize('xml', [ORDERS, PRODUCT, PRODUCT.encode('utf-8')])
+def test_same_shape_as_xml2dict(xml):
+    # Compared as JSON to check key order too.
+    assert json.dumps(utils.parse_xml(xml)) == json.dumps(legacy_parse(xml))
+
+
+def test_namespaces_are_stripped():
+    product = utils.parse_xml(PRODUCT).GetMatchingProductResponse.GetMatchingProductResult.Product
+    assert product.ItemAttributes.Title == u'Fish & chips – é'
+    assert product.ItemAttributes.lang == 'en-US'
+    # Other namespaces are kept, as XML2Dict does.
+    assert product.ItemAttributes.Size.namespace == 'urn:x'
+    assert product.ItemAttributes.Size.unit == {'value': 'cm', 'namespace': 'urn:x'}
+
+
+def test_malformed_xml_raises_parse_error():
+    with pytest.raises(ET.ParseError):
+        utils.parse_xml(b'<Response><Unclosed></Response>')
+
+
+def test_dict_wrapper_parses_bytes_and_keeps_text():
+    wrapper = DictWrapper(ORDERS, 'ListOrdersResult')
+    assert [order.AmazonOrderId for order in wrapper.parsed.Orders.Order] == ['1', '2']
+    assert wrapper.original == ORDERS.decode('utf-8')